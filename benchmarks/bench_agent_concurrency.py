@@ -0,0 +1,173 @@
+"""
+Requests per second per process for the agent entrypoint.
+
+Runs real Strands agents against StubModel, a model stand-in that waits
+--model-latency-ms per call and makes one call to a blocking tool
+(time.sleep for --tool-latency-ms, like database_query or web_search)
+before answering. "shared agent" replays the template before per-session
+agents: one module-level agent serving requests one at a time. The pool rows
+serve --sessions independent sessions through shared/agent_sessions.py at
+increasing concurrency caps. No AWS account or model access is needed.
+Before timing, it checks that session eviction never drops a session in use
+and exits with an error if it does.
+
+Usage:
+    python benchmarks/bench_agent_concurrency.py --requests 200 --sessions 50 --concurrency 1 8 32
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+from common import print_report, summarize
+from shared.agent_sessions import AgentSessionPool
+from strands import Agent, tool
+from strands.models import Model
+
+
+class StubModel(Model):
+    """
+    Model stand-in with fixed latency and canned output.
+
+    The first turn of an invocation asks for the `lookup` tool (when tools
+    are registered); the turn after a tool result streams `reply` in
+    `chunks` text deltas.
+    """
+
+    def __init__(self, latency=0.05, reply='Here is the answer.', chunks=1):
+        self.latency = latency
+        self.reply = reply
+        self.chunks = chunks
+        self.config = {'model_id': 'stub'}
+
+    def update_config(self, **model_config):
+        self.config.update(model_config)
+
+    def get_config(self):
+        return self.config
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        raise NotImplementedError('StubModel does not support structured output')
+        yield
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        last = messages[-1]['content'] if messages else []
+        answered = any('toolResult' in block for block in last)
+        yield {'messageStart': {'role': 'assistant'}}
+        if tool_specs and not answered:
+            yield {'contentBlockStart': {'start': {'toolUse': {'toolUseId': f'tool-{len(messages)}', 'name': 'lookup'}}}}
+            yield {'contentBlockDelta': {'delta': {'toolUse': {'input': json.dumps({'key': 'bench'})}}}}
+            yield {'contentBlockStop': {}}
+            yield {'messageStop': {'stopReason': 'tool_use'}}
+        else:
+            step = max(1, len(self.reply) // self.chunks)
+            for start in range(0, len(self.reply), step):
+                if start:
+                    await asyncio.sleep(self.latency / self.chunks)
+                yield {'contentBlockDelta': {'delta': {'text': self.reply[start:start + step]}}}
+            yield {'contentBlockStop': {}}
+            yield {'messageStop': {'stopReason': 'end_turn'}}
+        yield {'metadata': {'usage': {'inputTokens': 100, 'outputTokens': 20, 'totalTokens': 120},
+                            'metrics': {'latencyMs': int(self.latency * 1000)}}}
+
+
+def make_lookup(latency):
+    """Return a blocking tool that sleeps latency seconds."""
+    @tool
+    def lookup(key: str) -> str:
+        """Look up a value by key."""
+        time.sleep(latency)
+        return f"value for {key}"
+    return lookup
+
+
+def make_agent(model_latency, tool_latency):
+    return Agent(model=StubModel(model_latency), tools=[make_lookup(tool_latency)], callback_handler=None)
+
+
+async def run_pool(pool, requests, sessions):
+    """Send requests spread over sessions through pool; return (durations, wall seconds)."""
+    durations = []
+
+    async def one(index):
+        start = time.perf_counter()
+        async with pool.session(f'session-{index % sessions}') as agent:
+            await agent.invoke_async('What is the value for bench?')
+        durations.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(requests)))
+    return durations, time.perf_counter() - start
+
+
+async def check_eviction():
+    """
+    Check that a new session is kept while the only other session is in use.
+
+    With max_sessions=1 and session 'held' open, checking out 'new' goes over
+    the limit; eviction must skip both in-use sessions rather than drop the
+    one being handed out.
+    """
+    pool = AgentSessionPool(object, max_sessions=1)
+    try:
+        async with pool.session('held') as held:
+            async with pool.session('new') as first:
+                kept = pool._sessions.get('new')
+                if kept is None or kept.agent is not first:
+                    raise SystemExit("eviction dropped the session being checked out")
+            if pool._sessions.get('held') is None or pool._sessions['held'].agent is not held:
+                raise SystemExit("eviction dropped a session that was still in use")
+        async with pool.session('new') as again:
+            if again is not first:
+                raise SystemExit("session 'new' got a fresh agent on its next request")
+    finally:
+        pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--sessions', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--model-latency-ms', type=float, default=50)
+    parser.add_argument('--tool-latency-ms', type=float, default=30)
+    args = parser.parse_args()
+    logging.getLogger('strands').setLevel(logging.ERROR)
+    asyncio.run(check_eviction())
+
+    model_latency = args.model_latency_ms / 1000
+    tool_latency = args.tool_latency_ms / 1000
+    rows, throughput = {}, {}
+
+    # Before: one shared agent, one request at a time
+    shared = make_agent(model_latency, tool_latency)
+    serial_requests = min(args.requests, 50)
+    durations = []
+    start = time.perf_counter()
+    for _ in range(serial_requests):
+        call_start = time.perf_counter()
+        shared('What is the value for bench?')
+        durations.append(time.perf_counter() - call_start)
+        shared.messages.clear()
+    label = 'shared agent (serial)'
+    rows[label] = summarize(durations)
+    throughput[label] = serial_requests / (time.perf_counter() - start)
+
+    for concurrency in args.concurrency:
+        pool = AgentSessionPool(lambda: make_agent(model_latency, tool_latency), max_concurrency=concurrency)
+        durations, wall = asyncio.run(run_pool(pool, args.requests, args.sessions))
+        label = f'session pool, cap {concurrency}'
+        rows[label] = summarize(durations)
+        throughput[label] = args.requests / wall
+        pool.close()
+
+    print_report(f'agent invocation latency ({args.sessions} sessions, incl. queueing)', rows)
+    print('\nrequests/sec per process:')
+    for label, rps in throughput.items():
+        print(f"  {label:<30} {rps:8.1f}")
+
+
+if __name__ == '__main__':
+    main()
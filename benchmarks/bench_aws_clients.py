@@ -0,0 +1,101 @@
+"""
+Per-call boto3 client overhead for the database-query and email-sender tools.
+
+"per call" builds a new client on every call (the behaviour before the
+shared client registry); "shared" reuses the client from
+shared/aws_clients.py. Both make the same stubbed API call through
+botocore's Stubber, so no AWS account or network access is needed.
+
+Usage:
+    python benchmarks/bench_aws_clients.py --iterations 200
+"""
+import argparse
+import os
+
+# Dummy credentials so client construction resolves without an AWS profile
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-west-2')
+
+import boto3
+from botocore.stub import ANY, Stubber
+from common import load_tool, print_report, summarize, time_calls
+from shared import aws_clients
+
+RDS_RESPONSE = {
+    'records': [[{'longValue': 1}, {'stringValue': 'alice'}]],
+    'columnMetadata': [{'label': 'id'}, {'label': 'name'}],
+}
+SES_RESPONSE = {'MessageId': '0100018c-example'}
+RDS_PARAMS = {'resourceArn': ANY, 'secretArn': ANY, 'database': ANY, 'sql': ANY}
+SES_PARAMS = {'Source': ANY, 'Destination': ANY, 'Message': ANY}
+
+
+def stubbed_call(client, method, response, params, **kwargs):
+    """Make one stubbed API call on client."""
+    with Stubber(client) as stubber:
+        stubber.add_response(method, response, params)
+        return getattr(client, method)(**kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=100)
+    args = parser.parse_args()
+
+    rds_kwargs = {
+        'resourceArn': 'arn:aws:rds:us-west-2:123456789012:cluster:bench',
+        'secretArn': 'arn:aws:secretsmanager:us-west-2:123456789012:secret:bench',
+        'database': 'default',
+        'sql': 'SELECT 1',
+    }
+    ses_kwargs = {
+        'Source': 'noreply@example.com',
+        'Destination': {'ToAddresses': ['user@example.com']},
+        'Message': {'Subject': {'Data': 'Hi'}, 'Body': {'Text': {'Data': 'Hello'}}},
+    }
+
+    rows = {
+        'rds-data, client per call': summarize(time_calls(
+            lambda: stubbed_call(boto3.client('rds-data', region_name='us-west-2'),
+                                 'execute_statement', RDS_RESPONSE, RDS_PARAMS, **rds_kwargs),
+            args.iterations
+        )),
+        'rds-data, shared client': summarize(time_calls(
+            lambda: stubbed_call(aws_clients.get_client('rds-data', region='us-west-2'),
+                                 'execute_statement', RDS_RESPONSE, RDS_PARAMS, **rds_kwargs),
+            args.iterations, warmup=1
+        )),
+        'ses, client per call': summarize(time_calls(
+            lambda: stubbed_call(boto3.client('ses', region_name='us-west-2'),
+                                 'send_email', SES_RESPONSE, SES_PARAMS, **ses_kwargs),
+            args.iterations
+        )),
+        'ses, shared client': summarize(time_calls(
+            lambda: stubbed_call(aws_clients.get_client('ses', region='us-west-2'),
+                                 'send_email', SES_RESPONSE, SES_PARAMS, **ses_kwargs),
+            args.iterations, warmup=1
+        )),
+    }
+
+    # End-to-end tool calls against the stubbed shared clients
+    database_tool = load_tool('database-query')
+    email_tool = load_tool('email-sender')
+    rds = aws_clients.get_client('rds-data', region='us-west-2')
+    ses = aws_clients.get_client('ses', region='us-west-2')
+    with Stubber(rds) as rds_stubber, Stubber(ses) as ses_stubber:
+        for _ in range(args.iterations):
+            rds_stubber.add_response('execute_statement', RDS_RESPONSE, RDS_PARAMS)
+            ses_stubber.add_response('send_email', SES_RESPONSE, SES_PARAMS)
+        rows['database_query tool'] = summarize(time_calls(
+            lambda: database_tool.database_query('SELECT id, name FROM users'), args.iterations
+        ))
+        rows['send_email tool'] = summarize(time_calls(
+            lambda: email_tool.send_email('user@example.com', 'Hi', 'Hello'), args.iterations
+        ))
+
+    print_report('boto3 client overhead per call', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""
+Throughput and worst-case latency of the calculator expression engine.
+
+"legacy" is the calculator before the expression engine: a regex scan and
+`eval` of the raw string on every call. "engine, cold" clears the compiled
+expression cache before each call, so every call parses, checks and
+compiles; "engine, warm" serves repeat expressions from the cache. The
+adversarial cases (huge powers, deep nesting, oversized inputs) only run
+against the engine, since several of them would pin a core under `eval`.
+The batch section evaluates one formula over a table of inputs with a
+`calculator` call per row, with `calculator_batch` using NumPy, and with
+`calculator_batch`'s pure-Python fallback. Before timing, every row of a set
+of large integer powers and products from `calculator_batch` is checked
+against `calculator`.
+
+Usage:
+    python benchmarks/bench_calculator.py --iterations 20000 --batch-rows 1000
+"""
+import argparse
+import itertools
+import math
+import re
+import time
+
+from common import load_tool, print_report, summarize, time_calls
+
+# Expressions of the kind agents send: unit conversions, percentages, compound interest, geometry
+CORPUS = [
+    '2 + 2',
+    '2 * (3 + 4)',
+    '15 / 100 * 2499.99',
+    '1250 * 1.0825',
+    '(72 - 32) * 5 / 9',
+    '1000 * (1 + 0.05 / 12) ** (12 * 10)',
+    'sqrt(144)',
+    'sqrt(3 ** 2 + 4 ** 2)',
+    'pi * 2.5 ** 2',
+    'sin(pi / 2) + cos(0)',
+    'log(1024) / log(2)',
+    'log10(1000000)',
+    'exp(2) - e ** 2',
+    'floor(17 / 3)',
+    'ceil(1234 / 100) * 100',
+    'abs(-42.5) * 2',
+    '365 * 24 * 60 * 60',
+    '(1 + 0.07) ** 30',
+    '86400 / 3600',
+    '2 ** 64 - 1',
+]
+
+ADVERSARIAL = [
+    '9**9**9',
+    '2**10**8',
+    '10**100000',
+    '(2**5000)*(2**5000)*(2**5000)',
+    'pow(7, 10**9)',
+    '-' * 900 + '1',
+    '(' * 90 + '1' + ')' * 90,
+    '+'.join(['1'] * 600),
+    '1' * 5000,
+    "__import__('os').system('true')",
+    '(1).__class__.__bases__',
+]
+
+# Batch formulas whose results pass 2**53 or int64; NumPy must not wrap or round them
+BATCH_EXACT = [
+    ('x ** 20', {'x': [2, 3, 10, 7]}),
+    ('10 ** 20 + x', {'x': [0, 1, 2]}),
+    ('3 ** 50 * x', {'x': [1, 2, 3]}),
+    ('x * 10 ** 18', {'x': [9, 10, 100]}),
+    ('2 ** 64 - x', {'x': [0, 1]}),
+    ('max(2 ** 62, x) + 1', {'x': [0, 5]}),
+    ('pow(x, 3) * 1.5', {'x': [1000000, 2]}),
+]
+
+
+def legacy_calculator(expression):
+    """The calculator implementation before the expression engine."""
+    try:
+        allowed_names = {
+            'abs': abs, 'round': round, 'min': min, 'max': max,
+            'sum': sum, 'pow': pow,
+            'sqrt': math.sqrt, 'sin': math.sin, 'cos': math.cos,
+            'tan': math.tan, 'log': math.log, 'log10': math.log10,
+            'exp': math.exp, 'floor': math.floor, 'ceil': math.ceil,
+            'pi': math.pi, 'e': math.e
+        }
+        if re.search(r'[^0-9+\-*/().a-z_\s]', expression.lower()):
+            return "Error: Invalid characters in expression."
+        result = eval(expression, {"__builtins__": {}}, allowed_names)
+        if isinstance(result, float):
+            if result.is_integer():
+                return f"Result: {int(result)}"
+            return f"Result: {round(result, 10)}"
+        return f"Result: {result}"
+    except Exception as e:
+        return f"Error calculating expression: {str(e)}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=10000)
+    parser.add_argument('--batch-rows', type=int, default=1000)
+    args = parser.parse_args()
+
+    calculator_tool = load_tool('calculator')
+    # The undecorated function, so the numbers exclude the strands tool wrapper
+    calculator = getattr(calculator_tool.calculator, '_tool_func', calculator_tool.calculator)
+
+    for expression in CORPUS:
+        expected, actual = legacy_calculator(expression), calculator(expression)
+        if actual != expected:
+            raise SystemExit(f"Mismatch for {expression!r}: legacy {expected!r}, engine {actual!r}")
+    print(f"Engine agrees with the legacy calculator on {len(CORPUS)} corpus expressions")
+
+    calculator_batch = getattr(calculator_tool.calculator_batch, '_tool_func', calculator_tool.calculator_batch)
+    for formula, variables in BATCH_EXACT:
+        (name, values), = variables.items()
+        batch = calculator_batch(formula, variables).splitlines()[1:]
+        for value, line in zip(values, batch):
+            expected = calculator(re.sub(rf'\b{name}\b', f'({value})', formula)).removeprefix('Result: ')
+            actual = line.split(' -> ', 1)[1]
+            if actual != expected:
+                raise SystemExit(f"Mismatch for {formula!r} with {name}={value}: calculator {expected!r}, batch {actual!r}")
+    print(f"calculator_batch agrees with calculator on {len(BATCH_EXACT)} large-integer formulas")
+
+    def cold(expression):
+        calculator_tool._compile_expression.cache_clear()
+        return calculator(expression)
+
+    expressions = itertools.cycle(CORPUS)
+    rows = {
+        'legacy (regex + eval)': summarize(
+            time_calls(lambda: legacy_calculator(next(expressions)), args.iterations, warmup=100)
+        ),
+        'engine, cold': summarize(
+            time_calls(lambda: cold(next(expressions)), args.iterations, warmup=100)
+        ),
+        'engine, warm': summarize(
+            time_calls(lambda: calculator(next(expressions)), args.iterations, warmup=100)
+        ),
+    }
+    print_report(f'calculator corpus ({len(CORPUS)} expressions)', rows)
+
+    print("\nadversarial inputs (engine, cold cache)")
+    worst = 0.0
+    for expression in ADVERSARIAL:
+        calculator_tool._compile_expression.cache_clear()
+        start = time.perf_counter()
+        result = calculator(expression)
+        elapsed = (time.perf_counter() - start) * 1000
+        worst = max(worst, elapsed)
+        label = expression if len(expression) <= 32 else expression[:29] + '...'
+        print(f"{label:<32} {elapsed:>9.3f} ms  {result[:60]}")
+    print(f"worst case: {worst:.3f} ms")
+
+    formula = 'p * (1 + r / 12) ** (12 * y)'
+    rates = [0.01 + i * 0.0001 for i in range(args.batch_rows)]
+    variables = {'p': 1000, 'r': rates, 'y': 10}
+    batch_iterations = max(1, args.iterations // 1000)
+    per_row = [f'1000 * (1 + {r} / 12) ** (12 * 10)' for r in rates]
+
+    def calculator_per_row():
+        # Each row is a distinct expression, so every call parses and compiles
+        calculator_tool._compile_expression.cache_clear()
+        return [calculator(expression) for expression in per_row]
+
+    rows = {
+        'calculator per row': summarize(time_calls(calculator_per_row, batch_iterations)),
+    }
+    if calculator_tool._vector_namespace()[0] is not None:
+        rows['calculator_batch, NumPy'] = summarize(
+            time_calls(lambda: calculator_batch(formula, variables), batch_iterations, warmup=1)
+        )
+    vector_namespace = calculator_tool._vector_namespace
+    calculator_tool._vector_namespace = lambda: (None, None)
+    try:
+        rows['calculator_batch, pure Python'] = summarize(
+            time_calls(lambda: calculator_batch(formula, variables), batch_iterations, warmup=1)
+        )
+    finally:
+        calculator_tool._vector_namespace = vector_namespace
+    print_report(f'{formula} over {args.batch_rows} rows', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Request-path cost and failure behaviour of the agent configuration cache.
+
+A local stand-in for DynamoDB serves this agent's item from the
+`agent-configurations` table with --ddb-latency-ms of latency. "get_item per
+request" reads the table on every request. "cached" reads the template's
+`agent_config`, which the background refresher keeps current.
+
+It then checks the failure behaviour and exits non-zero if a check fails:
+- While the stand-in fails, the last good configuration keeps being served.
+- A change to the item is picked up after the stand-in recovers.
+- When the item is deleted, the configuration falls back to the defaults.
+
+Usage:
+    python benchmarks/bench_config_cache.py --iterations 200 --ddb-latency-ms 10
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+os.environ['AGENT_CONFIG_TTL'] = '0.5'
+os.environ['AGENT_CONFIG_RETRY_INTERVAL'] = '0.1'
+os.environ['AWS_MAX_ATTEMPTS'] = '1'
+
+from common import FixtureServer, load_template, print_report, summarize, time_calls
+
+
+class FakeDynamoDB:
+    """GetItem stand-in holding one item, with latency and an on/off switch."""
+
+    def __init__(self, latency, item):
+        self.latency = latency
+        self.item = item
+        self.available = True
+        self.calls = 0
+
+    def __call__(self, handler):
+        time.sleep(self.latency)
+        self.calls += 1
+        if not self.available:
+            body = {'__type': 'com.amazonaws.dynamodb.v20120810#InternalServerError', 'message': 'unavailable'}
+            return 500, {'Content-Type': 'application/x-amz-json-1.0'}, json.dumps(body)
+        if self.item is None:
+            return 200, {'Content-Type': 'application/x-amz-json-1.0'}, json.dumps({})
+        item = {name: {'S': value} for name, value in self.item.items()}
+        return 200, {'Content-Type': 'application/x-amz-json-1.0'}, json.dumps({'Item': item})
+
+
+def wait_for(predicate, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return predicate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--ddb-latency-ms', type=float, default=10)
+    args = parser.parse_args()
+
+    ddb = FakeDynamoDB(args.ddb_latency_ms / 1000, {
+        'agentRuntimeId': 'AGENT_RUNTIME_ID_VALUE', 'modelId': 'model-v1', 'systemPrompt': 'You are helpful.',
+    })
+    with FixtureServer({'/': ddb}) as server:
+        os.environ['AWS_ENDPOINT_URL_DYNAMODB'] = server.url('')
+        template = load_template()
+        template.app.logger.handlers = [logging.NullHandler()]
+        template.app.logger.propagate = False
+        config = template.agent_config
+        wait_for(lambda: config.stats['loads'] > 0)
+
+        rows = {
+            'get_item per request': summarize(time_calls(template.load_agent_config, min(args.iterations, 100))),
+            'cached': summarize(time_calls(config.get, args.iterations)),
+        }
+        print_report('agent config read on the request path', rows)
+        print(f"\nloaded: {config.get()}")
+
+        failed = []
+
+        def check(name, ok, detail):
+            print(f"{'ok' if ok else 'FAILED':<7} {name}: {detail}")
+            if not ok:
+                failed.append(name)
+
+        print()
+        check('initial load', config.get()['model_id'] == 'model-v1', f"model {config.get()['model_id']}")
+
+        # Outage: the last good config is served
+        ddb.available = False
+        errors_before = config.stats['load_errors']
+        failing = wait_for(lambda: config.stats['load_errors'] >= errors_before + 3)
+        served = [config.get()['model_id'] for _ in range(1000)]
+        check('outage', failing and served.count('model-v1') == 1000,
+              f"{config.stats['load_errors'] - errors_before} failed refresh(es); "
+              f"served {served.count('model-v1')}/1000 requests with the last good config")
+
+        # Recovery: a change made during the outage is picked up
+        ddb.item['modelId'] = 'model-v2'
+        ddb.available = True
+        start = time.perf_counter()
+        picked_up = wait_for(lambda: config.get()['model_id'] == 'model-v2')
+        check('recovery', picked_up,
+              f"new model {'picked up' if picked_up else 'NOT picked up'} "
+              f"{time.perf_counter() - start:.2f}s after DynamoDB recovered")
+
+        # Missing item: the defaults compiled into the template are used
+        ddb.item = None
+        defaults = wait_for(lambda: config.get() == config.defaults)
+        check('missing item', defaults, f"serving {config.get()}")
+
+        print(f"metrics: {config.metrics()}")
+        config.close()
+
+    if failed:
+        print(f"\nFailed checks: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
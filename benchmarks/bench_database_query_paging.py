@@ -0,0 +1,131 @@
+"""
+Large-result handling in the database-query tool.
+
+A local stand-in for the RDS Data API holds a 100k-row table. "full fetch"
+reproduces the behaviour before paging: fetch every row as typed records and
+format the first 20 with string concatenation. "paged" calls
+`database_query`, which pushes the page limit down to the query and asks
+for JSON-formatted records. Before timing, it checks which statements
+`database_query` treats as reads (paged and cached) and which as writes.
+
+Usage:
+    python benchmarks/bench_database_query_paging.py --rows 100000 --iterations 10
+"""
+import argparse
+import json
+import os
+import re
+
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+
+from common import FixtureServer, load_tool, print_report, summarize, time_calls
+
+COLUMNS = [{'label': 'id', 'name': 'id'}, {'label': 'name', 'name': 'name'}, {'label': 'score', 'name': 'score'}]
+_PAGE_RE = re.compile(r'LIMIT (\d+) OFFSET (\d+)$')
+
+# (statement, whether database_query should treat it as a read)
+STATEMENTS = [
+    ('SELECT id, name FROM users', True),
+    ('SELECT "set", copy FROM t', True),
+    ("SELECT ';'", True),
+    ('SELECT load, lock, "do" AS call FROM jobs;', True),
+    ("WITH recent AS (SELECT * FROM orders WHERE note = 'update; delete') SELECT * FROM recent", True),
+    ('WITH moved AS (UPDATE t SET a = 1 RETURNING *) SELECT * FROM moved', False),
+    ('WITH x AS (SELECT 1) INSERT INTO t SELECT * FROM x', False),
+    ('SELECT * INTO archive FROM orders', False),
+    ('SELECT * FROM orders FOR UPDATE', False),
+    ('SELECT 1; DELETE FROM users', False),
+    ('UPDATE users SET name = 1', False),
+    ('CALL refresh_totals()', False),
+]
+
+
+def make_data_api(row_count):
+    """Return a FixtureServer route emulating ExecuteStatement over a row_count-row table."""
+    table = [(i, f'user-{i}', i * 0.5) for i in range(row_count)]
+
+    def execute_statement(handler):
+        request = json.loads(handler.request_body or b'{}')
+        match = _PAGE_RE.search(request.get('sql', ''))
+        rows = table
+        if match:
+            limit, offset = int(match.group(1)), int(match.group(2))
+            rows = table[offset:offset + limit]
+
+        response = {'numberOfRecordsUpdated': 0}
+        if request.get('includeResultMetadata') or request.get('formatRecordsAs') == 'JSON':
+            response['columnMetadata'] = COLUMNS
+        if request.get('formatRecordsAs') == 'JSON':
+            response['formattedRecords'] = json.dumps(
+                [{'id': i, 'name': name, 'score': score} for i, name, score in rows]
+            )
+        else:
+            response['columnMetadata'] = COLUMNS
+            response['records'] = [
+                [{'longValue': i}, {'stringValue': name}, {'doubleValue': score}] for i, name, score in rows
+            ]
+        return 200, {'Content-Type': 'application/json'}, json.dumps(response)
+
+    return execute_statement
+
+
+def full_fetch(rds_client, sql):
+    """The database_query formatting before paging: full response, first 20 rows, += building."""
+    response = rds_client.execute_statement(
+        resourceArn='arn:aws:rds:us-west-2:123456789012:cluster:bench',
+        secretArn='arn:aws:secretsmanager:us-west-2:123456789012:secret:bench',
+        database='default',
+        sql=sql
+    )
+    records = response.get('records', [])
+    headers = [col.get('label', col.get('name', f'col_{i}')) for i, col in enumerate(response['columnMetadata'])]
+    result_text = f"Query returned {len(records)} row(s):\n\n"
+    result_text += " | ".join(headers) + "\n"
+    result_text += "-" * (len(" | ".join(headers))) + "\n"
+    for record in records[:20]:
+        row_values = []
+        for field in record:
+            value = next(iter(field.values()))
+            row_values.append(str(value))
+        result_text += " | ".join(row_values) + "\n"
+    if len(records) > 20:
+        result_text += f"\n... and {len(records) - 20} more row(s)"
+    return result_text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--iterations', type=int, default=5)
+    args = parser.parse_args()
+
+    routes = {'/Execute': make_data_api(args.rows)}
+    with FixtureServer(routes) as server:
+        os.environ['AWS_ENDPOINT_URL_RDS_DATA'] = server.url('')
+        database_tool = load_tool('database-query')
+        for statement, is_read in STATEMENTS:
+            if database_tool._is_read_statement(database_tool._sql_tokens(statement)) != is_read:
+                raise SystemExit(f"{statement!r} should be treated as a {'read' if is_read else 'write'}")
+        print(f"Read/write classification agrees on {len(STATEMENTS)} statements")
+
+        from shared.aws_clients import get_client
+        rds_client = get_client('rds-data', region='us-west-2')
+
+        sql = 'SELECT id, name, score FROM users ORDER BY id'
+        rows = {
+            f'full fetch ({args.rows} rows)': summarize(
+                time_calls(lambda: full_fetch(rds_client, sql), args.iterations, warmup=1)
+            ),
+            'paged (first 20 rows)': summarize(
+                time_calls(lambda: database_tool.database_query(sql), args.iterations, warmup=1)
+            ),
+        }
+        sample = database_tool.database_query(sql, max_rows=3)
+
+    print_report('database_query large result', rows)
+    print(f"\nsample page:\n{sample}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Calls per second for the datetime tool.
+
+"legacy" is get_datetime before the timezone cache: pytz.timezone() on
+every call and nine strftime calls joined from a list. "cached" is the
+current get_datetime (cached resolver, single strftime pass). The second
+table asks for several timezones, once with a legacy call per timezone and
+once with a single get_datetime_many call.
+
+Usage:
+    python benchmarks/bench_datetime.py --iterations 20000
+"""
+import argparse
+import itertools
+from datetime import datetime
+
+import pytz
+from common import load_tool, print_report, summarize, time_calls
+
+TIMEZONES = ['UTC', 'America/New_York', 'Europe/London', 'Asia/Tokyo', 'Australia/Sydney']
+
+
+def legacy_get_datetime(timezone="UTC"):
+    """get_datetime before the timezone cache and single-pass formatter."""
+    try:
+        tz = pytz.timezone(timezone)
+        timezone_note = ""
+    except pytz.exceptions.UnknownTimeZoneError:
+        tz = pytz.UTC
+        timezone_note = f" (Note: '{timezone}' is not a valid timezone, using UTC instead)"
+    now = datetime.now(tz)
+    result = []
+    result.append(f"**Current Date & Time Information**{timezone_note}")
+    result.append("")
+    result.append(f"📅 **Date**: {now.strftime('%A, %B %d, %Y')}")
+    result.append(f"🕐 **Time**: {now.strftime('%I:%M:%S %p')}")
+    result.append(f"⏰ **24-Hour Time**: {now.strftime('%H:%M:%S')}")
+    result.append(f"🌍 **Timezone**: {timezone} ({now.strftime('%Z')})")
+    result.append(f"📍 **UTC Offset**: {now.strftime('%z')}")
+    result.append(f"📊 **ISO Format**: {now.isoformat()}")
+    result.append(f"🗓️  **Day of Year**: Day {now.strftime('%j')} of {now.year}")
+    result.append(f"📆 **Week Number**: Week {now.strftime('%U')}")
+    return "\n".join(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=10000)
+    args = parser.parse_args()
+
+    datetime_tool = load_tool('datetime')
+    # The undecorated functions, so the numbers exclude the strands tool wrapper
+    get_datetime = getattr(datetime_tool.get_datetime, '_tool_func', datetime_tool.get_datetime)
+    get_datetime_many = getattr(datetime_tool.get_datetime_many, '_tool_func', datetime_tool.get_datetime_many)
+
+    legacy_zones = itertools.cycle(TIMEZONES)
+    cached_zones = itertools.cycle(TIMEZONES)
+    rows = {
+        'legacy': summarize(time_calls(lambda: legacy_get_datetime(next(legacy_zones)), args.iterations, warmup=100)),
+        'cached': summarize(time_calls(lambda: get_datetime(next(cached_zones)), args.iterations, warmup=100)),
+    }
+    print_report('get_datetime, one timezone per call', rows)
+
+    batch_iterations = max(1, args.iterations // len(TIMEZONES))
+    rows = {
+        f'legacy x {len(TIMEZONES)} calls': summarize(time_calls(
+            lambda: [legacy_get_datetime(tz) for tz in TIMEZONES], batch_iterations, warmup=10
+        )),
+        'get_datetime_many': summarize(time_calls(
+            lambda: get_datetime_many(TIMEZONES), batch_iterations, warmup=10
+        )),
+    }
+    print_report(f'{len(TIMEZONES)} timezones per request', rows)
+
+
+if __name__ == '__main__':
+    main()
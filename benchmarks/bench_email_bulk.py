@@ -0,0 +1,133 @@
+"""
+Email sending: per-recipient calls vs send_email_bulk, and waiting vs queued sends.
+
+FakeSES stands in for SES. Each call takes --ses-latency-ms, and more than
+--max-send-rate sends in any one-second window are rejected with a
+Throttling error, the way SES enforces an account's maximum send rate.
+"per-recipient calls" is what an agent did before the bulk tool: one
+SendEmail call per recipient, with no pacing or retries.
+"send_email_bulk" paces sends with its token bucket and retries throttled
+recipients. The second table compares how long a send_email tool call
+blocks the agent turn with wait=True (the default) and wait=False.
+
+Usage:
+    python benchmarks/bench_email_bulk.py --recipients 100 --max-send-rate 14 --ses-latency-ms 80
+"""
+import argparse
+import os
+import threading
+import time
+from collections import deque
+
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+
+from botocore.exceptions import ClientError
+from common import load_tool, print_report, summarize, time_calls
+
+
+class FakeSES:
+    """SES stand-in with fixed latency and a sliding one-second send rate limit."""
+
+    def __init__(self, latency, max_send_rate):
+        self.latency = latency
+        self.max_send_rate = max_send_rate
+        self.sent = 0
+        self.throttled = 0
+        self._window = deque()
+        self._lock = threading.Lock()
+
+    def get_send_quota(self):
+        return {'Max24HourSend': 50000.0, 'MaxSendRate': float(self.max_send_rate), 'SentLast24Hours': 0.0}
+
+    def send_email(self, Source, Destination, Message):
+        time.sleep(self.latency)
+        with self._lock:
+            now = time.monotonic()
+            while self._window and now - self._window[0] >= 1.0:
+                self._window.popleft()
+            if len(self._window) >= self.max_send_rate:
+                self.throttled += 1
+                raise ClientError({'Error': {'Code': 'Throttling', 'Message': 'Maximum sending rate exceeded.'}},
+                                  'SendEmail')
+            self._window.append(now)
+            self.sent += 1
+            return {'MessageId': f'message-{self.sent}'}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--recipients', type=int, default=100)
+    parser.add_argument('--max-send-rate', type=int, default=14)
+    parser.add_argument('--ses-latency-ms', type=float, default=80)
+    args = parser.parse_args()
+
+    email_tool = load_tool('email-sender')
+    send_email = getattr(email_tool.send_email, '_tool_func', email_tool.send_email)
+    get_email_status = getattr(email_tool.get_email_status, '_tool_func', email_tool.get_email_status)
+    send_email_bulk = getattr(email_tool.send_email_bulk, '_tool_func', email_tool.send_email_bulk)
+    recipients = [{'to': f'user{i}@example.com', 'name': f'User {i}'} for i in range(args.recipients)]
+    latency = args.ses_latency_ms / 1000
+
+    print(f"{args.recipients} recipients, SES max send rate {args.max_send_rate}/s, {args.ses_latency_ms:.0f}ms per call")
+    print(f"{'case':<28} {'seconds':>8} {'sent':>6} {'failed':>7} {'throttled':>10}")
+
+    # Before: the agent fires one unpaced SendEmail per recipient (tool calls issued in parallel by the agent loop)
+    ses = FakeSES(latency, args.max_send_rate)
+    results = [None] * len(recipients)
+
+    def send_one(index):
+        recipient = recipients[index]
+        message = {'Subject': {'Data': 'Your report is ready'}, 'Body': {'Text': {'Data': f"Hi {recipient['name']}"}}}
+        try:
+            results[index] = ses.send_email('noreply@example.com', {'ToAddresses': [recipient['to']]}, message)
+        except ClientError:
+            results[index] = None
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=send_one, args=(index,)) for index in range(len(recipients))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    failed = sum(1 for result in results if result is None)
+    print(f"{'per-recipient calls':<28} {elapsed:>8.2f} {ses.sent:>6} {failed:>7} {ses.throttled:>10}")
+
+    ses = FakeSES(latency, args.max_send_rate)
+    email_tool.get_client = lambda *a, **k: ses
+    email_tool._EMAIL_RATE_LIMITER = None
+    start = time.perf_counter()
+    summary = send_email_bulk(recipients, subject='Your report is ready', body='Hi {{name}}')
+    elapsed = time.perf_counter() - start
+    failed = args.recipients - ses.sent
+    print(f"{'send_email_bulk':<28} {elapsed:>8.2f} {ses.sent:>6} {failed:>7} {ses.throttled:>10}")
+    print(f"\n{summary.splitlines()[0]}")
+
+    # Single emails: blocking send vs fire-and-forget with a tracking ID
+    ses = FakeSES(latency, 10 ** 6)
+    email_tool.get_client = lambda *a, **k: ses
+    email_tool._EMAIL_RATE_LIMITER = email_tool._EmailTokenBucket(10 ** 6)
+    tracking_ids = []
+
+    def queue_one():
+        result = send_email('user@example.com', 'Hi', 'Hello', cc='team@example.com', wait=False)
+        tracking_ids.append(result.split('Tracking ID: ')[1].split()[0])
+
+    rows = {
+        'send_email(wait=True)': summarize(time_calls(
+            lambda: send_email('user@example.com', 'Hi', 'Hello', cc='team@example.com'), 50
+        )),
+        'send_email(wait=False)': summarize(time_calls(queue_one, 50)),
+    }
+    print_report('send_email time on the agent turn', rows)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline and 'sent' not in get_email_status(tracking_ids[-1]).splitlines()[0]:
+        time.sleep(0.05)
+    statuses = [get_email_status(tracking_id).splitlines()[0].rsplit(' ', 1)[-1] for tracking_id in tracking_ids]
+    print(f"\nqueued emails: {statuses.count('sent')}/{len(statuses)} sent by the background workers")
+    print(get_email_status(tracking_ids[0]))
+
+
+if __name__ == '__main__':
+    main()
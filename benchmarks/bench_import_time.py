@@ -0,0 +1,117 @@
+"""
+Cold-start import cost of each tool, similar to `python -X importtime`.
+
+Every tool in catalog.json is loaded in a fresh interpreter after strands
+(which the agent template always imports), so the numbers are what the
+tool adds to a cold start. The report lists each tool's load time and its
+slowest direct imports. The build can run it to track cold-start
+regressions:
+
+- `--budget-ms` exits non-zero when a tool takes longer than the budget to
+  load.
+- `--json` writes the numbers to a file.
+
+Usage:
+    python benchmarks/bench_import_time.py --top 5
+    python benchmarks/bench_import_time.py --budget-ms 100 --json import_times.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from common import REPO_ROOT
+
+MARKER = '--- tool import starts ---'
+
+LOADER = """
+import sys, time, importlib.util
+sys.path.insert(0, {root!r})
+import strands
+sys.stderr.write({marker!r} + '\\n')
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location('tool_module', {path!r})
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+sys.stderr.write('load_ms=%f\\n' % ((time.perf_counter() - start) * 1000))
+"""
+
+
+def profile_tool(path):
+    """Load the tool at path in a fresh interpreter; return (load ms, [(module, self ms, cumulative ms, depth)])."""
+    code = LOADER.format(root=REPO_ROOT, marker=MARKER, path=path)
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, cwd=REPO_ROOT
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    imports = []
+    load_ms = None
+    seen_marker = False
+    for line in proc.stderr.splitlines():
+        if line == MARKER:
+            seen_marker = True
+        elif line.startswith('load_ms='):
+            load_ms = float(line.split('=', 1)[1])
+        elif seen_marker and line.startswith('import time:') and '|' in line:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            if not self_us.strip().isdigit():
+                continue  # header line
+            depth = (len(name) - len(name.lstrip()) - 1) // 2
+            imports.append((name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000, depth))
+    return load_ms, imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--top', type=int, default=5, help='direct imports to list per tool')
+    parser.add_argument('--runs', type=int, default=3, help='fresh interpreters per tool; the fastest run is kept')
+    parser.add_argument('--budget-ms', type=float, default=None, help='fail when a tool takes longer to load')
+    parser.add_argument('--json', dest='json_path', default=None, help='write the results to this file')
+    args = parser.parse_args()
+
+    with open(os.path.join(REPO_ROOT, 'catalog.json'), encoding='utf-8') as f:
+        tools = json.load(f)['tools']
+
+    results = {}
+    over_budget = []
+    for entry in tools:
+        path = os.path.join(REPO_ROOT, entry['path'])
+        try:
+            runs = [profile_tool(path) for _ in range(max(1, args.runs))]
+        except RuntimeError as e:
+            print(f"\n{entry['id']}: import failed: {e}")
+            results[entry['id']] = {'error': str(e)}
+            continue
+        load_ms, imports = min(runs, key=lambda run: run[0])
+        direct = sorted((item for item in imports if item[3] == 0), key=lambda item: -item[2])
+        results[entry['id']] = {
+            'load_ms': round(load_ms, 3),
+            'modules_imported': len(imports),
+            'imports': [
+                {'module': name, 'self_ms': round(self_ms, 3), 'cumulative_ms': round(cumulative_ms, 3)}
+                for name, self_ms, cumulative_ms, _ in direct
+            ],
+        }
+
+        flag = ''
+        if args.budget_ms is not None and load_ms > args.budget_ms:
+            over_budget.append(entry['id'])
+            flag = f'  OVER BUDGET ({args.budget_ms:.0f} ms)'
+        print(f"\n{entry['id']}: {load_ms:.1f} ms, {len(imports)} new module(s){flag}")
+        for name, _, cumulative_ms, _ in direct[:args.top]:
+            print(f"  {cumulative_ms:>9.2f} ms  {name}")
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if over_budget:
+        print(f"\nTools over the {args.budget_ms:.0f} ms import budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
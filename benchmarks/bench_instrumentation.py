@@ -0,0 +1,69 @@
+"""
+Per-call overhead of the tool instrumentation wrapper.
+
+Times the cheapest tools (calculator, get_datetime), where the wrapper's
+fixed cost is the largest share of the call, with and without
+shared/instrumentation.py. "raw" calls the undecorated function
+(`__wrapped__`). "instrumented" is the wrapper the tools ship with.
+"instrumented, in turn" also records into a per-turn summary, as the
+template does. "profiled turn" runs every call under the sampling profiler
+(INSTRUMENTATION_PROFILE_RATE=1), to show the cost for tenants that have
+profiling turned on.
+
+Usage:
+    python benchmarks/bench_instrumentation.py --iterations 20000
+"""
+import argparse
+import os
+import tempfile
+
+from common import load_tool, print_report, summarize, time_calls
+from shared import instrumentation
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+
+    calculator_tool = load_tool('calculator')
+    datetime_tool = load_tool('datetime')
+    cases = {
+        'calculator': (getattr(calculator_tool.calculator, '_tool_func', calculator_tool.calculator), ('2 * (3 + 4)',)),
+        'get_datetime': (getattr(datetime_tool.get_datetime, '_tool_func', datetime_tool.get_datetime), ('UTC',)),
+    }
+
+    for name, (instrumented_fn, call_args) in cases.items():
+        raw_fn = instrumented_fn.__wrapped__
+        rows = {
+            'raw': summarize(time_calls(lambda: raw_fn(*call_args), args.iterations, warmup=100)),
+            'instrumented': summarize(time_calls(lambda: instrumented_fn(*call_args), args.iterations, warmup=100)),
+        }
+        with instrumentation.record_turn('bench-tenant'):
+            rows['instrumented, in turn'] = summarize(
+                time_calls(lambda: instrumented_fn(*call_args), args.iterations, warmup=100)
+            )
+
+        with tempfile.TemporaryDirectory() as profile_dir:
+            instrumentation.INSTRUMENTATION_PROFILE_TENANTS.add('bench-tenant')
+            instrumentation.INSTRUMENTATION_PROFILE_RATE = 1.0
+            instrumentation.INSTRUMENTATION_PROFILE_DIR = profile_dir
+            with instrumentation.record_turn('bench-tenant'):
+                rows['profiled turn'] = summarize(
+                    time_calls(lambda: instrumented_fn(*call_args), max(1, args.iterations // 20), warmup=10)
+                )
+            instrumentation.INSTRUMENTATION_PROFILE_TENANTS.discard('bench-tenant')
+            instrumentation.INSTRUMENTATION_PROFILE_RATE = 0.0
+            profiles = len(os.listdir(profile_dir))
+        print_report(f'{name}, per call', rows)
+        overhead_us = (rows['instrumented']['mean_ms'] - rows['raw']['mean_ms']) * 1000
+        print(f"  wrapper overhead: {overhead_us:.1f} us/call; {profiles} profiles written")
+
+    snapshot = instrumentation.REGISTRY.snapshot()
+    print('\nrecorded:', {name: stats['calls'] for name, stats in snapshot.items()})
+    print(f"prometheus export: {len(instrumentation.prometheus_text())} bytes; "
+          f"EMF export: {len(instrumentation.emf_documents())} documents")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Tokens returned to the model, and shaping cost, for shared/output_shaping.py.
+
+Shapes synthetic tool output the way the tools do: a long documentation page
+(web_crawler) with and without a query, a site crawl whose pages share
+navigation and footer blocks (web_crawl_site), and a query result
+(database_query) in the old " | " table layout vs the compact encoding.
+For each case it prints the estimated tokens before and after shaping and
+whether the one section that answers the query survived, then times the
+shaping itself.
+
+Usage:
+    python benchmarks/bench_output_shaping.py --iterations 200 --max-tokens 2500
+"""
+import argparse
+
+from common import print_report, summarize, time_calls
+from shared.output_shaping import estimate_tokens, format_table, shape_pages, shape_text
+
+NAV = "[Home](/) | [Guides](/guides/) | [API reference](/api/) | [Pricing](/pricing/) | [Blog](/blog/) | [Sign in](/login)"
+FOOTER = "© 2026 Example Inc. · [Privacy](/privacy) · [Terms](/terms) · [Status](/status) · [Contact support](/support)"
+NEEDLE = "## Rate limits\n\nEach API key may make 600 requests per minute; requests over the limit get HTTP 429 with a Retry-After header."
+
+
+def make_page(index, sections, needle=False):
+    """A crawled page as _format_crawl_result lays it out, with shared navigation and footer."""
+    parts = [f"# Guide page {index}\n", f"**URL:** https://docs.example.com/guide/{index}\n", "## Content\n", NAV, ""]
+    for section in range(sections):
+        parts.append(f"## Section {index}.{section}\n")
+        parts.append(" ".join(
+            f"Sentence {sentence} explains configuration option {section} of component {index} in detail."
+            for sentence in range(12)
+        ) + "\n")
+        if needle and section == sections * 2 // 3:
+            parts.append(NEEDLE + "\n")
+    parts.append(FOOTER)
+    parts.append("\n## Extracted Links\n")
+    parts.extend(f"- [Guide page {link}](https://docs.example.com/guide/{link})" for link in range(40))
+    return "\n".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--max-tokens', type=int, default=2500)
+    parser.add_argument('--pages', type=int, default=10)
+    args = parser.parse_args()
+    budget = args.max_tokens
+
+    page = make_page(0, sections=40, needle=True)
+    site = [make_page(index, sections=8, needle=index == 3) for index in range(args.pages)]
+    headers = ['id', 'customer', 'region', 'status', 'created_at', 'total']
+    rows = [
+        [str(row), f"customer-{row:05d}", 'us-west-2', 'active', f"2026-01-{row % 28 + 1:02d} 12:00:00", f"{row * 3.5:.2f}"]
+        for row in range(200)
+    ]
+
+    cases = {
+        'page, no query': lambda: shape_text(page, budget, pinned=1),
+        'page, query': lambda: shape_text(page, budget, 'api rate limit requests per minute', pinned=1),
+        f'site ({args.pages} pages), query': lambda: shape_pages(site, budget, 'api rate limit', pinned=1),
+        'table (200 rows)': lambda: format_table(headers, rows, budget),
+    }
+
+    print(f"tokens returned (max_tokens={budget})")
+    print(f"{'case':<32} {'before':>8} {'after':>8} {'saved':>7}  notes")
+    for label, shape in cases.items():
+        result = shape()
+        if label.startswith('site'):
+            shaped, repeated = result
+            before = sum(page.original_tokens for page in shaped)
+            after = sum(page.tokens for page in shaped)
+            text = "\n".join(page.text for page in shaped)
+            notes = f"{repeated} repeated blocks dropped; rate limits kept: {'Rate limits' in text}"
+        elif label.startswith('table'):
+            text, shown, before = result
+            after = estimate_tokens(text)
+            full_text, _, full_before = format_table(headers, rows, 10 ** 6)
+            notes = (f"{shown} of {len(rows)} rows fit; all rows: {full_before} -> "
+                     f"{estimate_tokens(full_text)} tokens (compact encoding alone)")
+        else:
+            before, after, text = result.original_tokens, result.tokens, result.text
+            notes = f"rate limits kept: {'Rate limits' in text}"
+        saved = 100.0 * (before - after) / before if before else 0.0
+        print(f"{label:<32} {before:>8} {after:>8} {saved:>6.1f}%  {notes}")
+
+    print_report('shaping cost per call', {
+        label: summarize(time_calls(shape, args.iterations, warmup=5)) for label, shape in cases.items()
+    })
+
+
+if __name__ == '__main__':
+    main()
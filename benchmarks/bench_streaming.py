@@ -0,0 +1,76 @@
+"""
+Time to first byte for buffered vs streamed agent responses.
+
+Loads templates/main.py and serves its entrypoint with agents backed by
+StubModel (see bench_agent_concurrency.py): one model call that requests a
+slow tool (a stand-in for a crawl), then a reply streamed in --chunks
+pieces. "buffered" awaits `invoke`, which returns only after the whole turn.
+"streamed" consumes `stream_response` and records when the first event and
+the final 'done' event arrive. Requires bedrock-agentcore and strands-agents;
+no AWS account or model access is needed.
+
+Usage:
+    python benchmarks/bench_streaming.py --iterations 10 --model-latency-ms 300 --tool-latency-ms 2000
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+os.environ.setdefault('AGENT_CONFIG_TTL', '0')
+
+from bench_agent_concurrency import StubModel, make_lookup
+from common import load_template, print_report, summarize
+from shared.agent_sessions import AgentSessionPool
+from strands import Agent
+
+
+async def measure(template, iterations):
+    buffered, first_event, streamed = [], [], []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await template.invoke({'prompt': 'Crawl the docs and summarize them'})
+        buffered.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        first = None
+        async for event in template.stream_response('Crawl the docs and summarize them', None):
+            if first is None:
+                first = time.perf_counter() - start
+        first_event.append(first)
+        streamed.append(time.perf_counter() - start)
+    return buffered, first_event, streamed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--model-latency-ms', type=float, default=300)
+    parser.add_argument('--tool-latency-ms', type=float, default=2000)
+    parser.add_argument('--chunks', type=int, default=20)
+    args = parser.parse_args()
+
+    template = load_template()
+    template.app.logger.setLevel(logging.WARNING)
+    template.usage_reporter.submit = lambda record: True
+    model_latency = args.model_latency_ms / 1000
+    tool_latency = args.tool_latency_ms / 1000
+    template.agent_sessions = AgentSessionPool(lambda: Agent(
+        model=StubModel(model_latency, reply='The docs cover setup, tools and benchmarks. ' * 5, chunks=args.chunks),
+        tools=[make_lookup(tool_latency)],
+        callback_handler=None,
+    ))
+
+    buffered, first_event, streamed = asyncio.run(measure(template, args.iterations))
+    print_report('agent response timing', {
+        'buffered: response': summarize(buffered),
+        'streamed: first event': summarize(first_event),
+        'streamed: done event': summarize(streamed),
+    })
+
+
+if __name__ == '__main__':
+    main()
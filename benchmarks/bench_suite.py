@@ -0,0 +1,375 @@
+"""
+Offline benchmark suite: every catalog tool and the agent entrypoint, with regression checks.
+
+Each case calls one tool function (or the template's `invoke`) against
+local stand-ins, so no network access or AWS account is needed:
+
+- DuckDuckGo: a FixtureServer serving the saved results page
+  (fixtures/duckduckgo_results.html)
+- crawl targets: a FixtureServer serving a small HTML page (the web_crawler
+  cases need crawl4ai and a browser and are skipped without them)
+- RDS Data API, SES, SQS and DynamoDB: FixtureServers speaking each
+  service's wire protocol. They are reached through
+  AWS_ENDPOINT_URL_<SERVICE>, so calls go through the real boto3
+  serialization and connection pool.
+- the model: StubModel (see bench_agent_concurrency.py)
+
+The result cache is disabled, so every call reaches its stand-in. Each case
+is called once first; if that call returns an "Error..." string, the case is
+reported as failed rather than timed. The report gives p50/p95/p99
+latency and serial throughput per case, from the fastest of `--runs` runs
+(the least disturbed by other load on the machine).
+
+`--save` writes the results to a JSON file. `--baseline` compares the run
+with a saved file and flags a case as a regression when:
+
+- its p50 or p95 latency grew by more than `--threshold` (and by at least
+  `--min-delta-ms`, so microsecond noise is ignored), or
+- its throughput dropped by more than `--threshold`.
+
+The script exits with status 1 when a case regressed or failed.
+
+Usage:
+    python benchmarks/bench_suite.py --iterations 200 --save baseline.json
+    python benchmarks/bench_suite.py --baseline baseline.json --threshold 0.2
+    python benchmarks/bench_suite.py --only calculator database-query invoke
+"""
+import argparse
+import asyncio
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import platform
+import sys
+import time
+import urllib.parse
+import uuid
+from datetime import datetime, timezone
+
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+os.environ['TOOL_CACHE_DISABLED'] = '1'
+os.environ['INSTRUMENTATION_EMF_INTERVAL'] = '0'
+os.environ['EMAIL_MAX_SEND_RATE'] = '1000'
+
+from bench_agent_concurrency import StubModel, make_lookup
+from bench_database_query_paging import make_data_api
+from common import FixtureServer, load_template, load_tool, print_report, read_fixture, summarize, time_calls
+
+CRAWL_PAGE = """<!DOCTYPE html>
+<html>
+<head><title>Fixture Page</title></head>
+<body>
+<h1>Fixture Page</h1>
+<p>This page is served locally so crawl latency measures the crawler, not the network.
+It has enough words in each paragraph to pass the default word count threshold.</p>
+<p>Second paragraph with a <a href="/about">link to the about page</a>.</p>
+</body>
+</html>
+"""
+
+_SES_NAMESPACE = 'http://ses.amazonaws.com/doc/2010-12-01/'
+
+
+class StandIn:
+    """Route callable that adds a fixed latency and counts calls."""
+
+    def __init__(self, handle, latency=0.0):
+        self.handle = handle
+        self.latency = latency
+        self.calls = 0
+
+    def __call__(self, handler):
+        if self.latency:
+            time.sleep(self.latency)
+        self.calls += 1
+        return self.handle(handler)
+
+
+def ses_api(handler):
+    """SES query-protocol stand-in: GetSendQuota and SendEmail."""
+    action = urllib.parse.parse_qs(handler.request_body.decode('utf-8')).get('Action', [''])[0]
+    if action == 'GetSendQuota':
+        result = '<Max24HourSend>50000.0</Max24HourSend><MaxSendRate>1000.0</MaxSendRate>' \
+                 '<SentLast24Hours>0.0</SentLast24Hours>'
+    elif action == 'SendEmail':
+        result = f'<MessageId>{uuid.uuid4()}</MessageId>'
+    else:
+        body = f'<ErrorResponse><Error><Code>InvalidAction</Code><Message>{action}</Message></Error></ErrorResponse>'
+        return 400, {'Content-Type': 'text/xml'}, body
+    body = (
+        f'<{action}Response xmlns="{_SES_NAMESPACE}"><{action}Result>{result}</{action}Result>'
+        f'<ResponseMetadata><RequestId>{uuid.uuid4()}</RequestId></ResponseMetadata></{action}Response>'
+    )
+    return 200, {'Content-Type': 'text/xml'}, body
+
+
+def sqs_api(handler):
+    """SQS JSON-protocol stand-in: SendMessageBatch."""
+    request = json.loads(handler.request_body or b'{}')
+    successful = [
+        {
+            'Id': entry['Id'],
+            'MessageId': str(uuid.uuid4()),
+            'MD5OfMessageBody': hashlib.md5(entry['MessageBody'].encode('utf-8')).hexdigest(),
+        }
+        for entry in request.get('Entries', [])
+    ]
+    return 200, {'Content-Type': 'application/x-amz-json-1.0'}, json.dumps({'Successful': successful, 'Failed': []})
+
+
+def dynamodb_api(handler):
+    """DynamoDB stand-in: GetItem returns no item, so the template keeps its defaults."""
+    return 200, {'Content-Type': 'application/x-amz-json-1.0'}, '{}'
+
+
+def rds_data_routes(latency):
+    """RDS Data API stand-in routes over a 1000-row table."""
+    def json_route(body):
+        return StandIn(lambda handler: (200, {'Content-Type': 'application/json'}, json.dumps(body)), latency)
+
+    def batch_execute(handler):
+        parameter_sets = json.loads(handler.request_body or b'{}').get('parameterSets', [])
+        body = {'updateResults': [{'generatedFields': []} for _ in parameter_sets]}
+        return 200, {'Content-Type': 'application/json'}, json.dumps(body)
+
+    return {
+        '/Execute': StandIn(make_data_api(1000), latency),
+        '/BatchExecute': StandIn(batch_execute, latency),
+        '/BeginTransaction': json_route({'transactionId': 'bench-transaction'}),
+        '/CommitTransaction': json_route({'transactionStatus': 'Transaction Committed'}),
+        '/RollbackTransaction': json_route({'transactionStatus': 'Rollback Complete'}),
+    }
+
+
+def undecorated(tool_function):
+    """Return the function behind a strands @tool, so timings exclude the tool wrapper."""
+    return getattr(tool_function, '_tool_func', tool_function)
+
+
+def build_cases(servers, loop):
+    """Return [(case name, tool id, fn, max iterations)] for every catalog tool and invoke."""
+    cases = []
+
+    search_tool = load_tool('web-search')
+    web_search = undecorated(search_tool.web_search)
+    cases += [
+        ('web_search', 'web-search', lambda: web_search('python tutorials'), None),
+    ]
+
+    calculator_tool = load_tool('calculator')
+    calculator = undecorated(calculator_tool.calculator)
+    calculator_batch = undecorated(calculator_tool.calculator_batch)
+    batch_variables = {'price': [float(i) for i in range(1000)], 'rate': 0.08}
+    cases += [
+        ('calculator', 'calculator', lambda: calculator('sqrt(144) + 2 * (3 + 4) ** 2'), None),
+        ('calculator_batch (1000 rows)', 'calculator', lambda: calculator_batch('price * (1 + rate)', batch_variables),
+         None),
+    ]
+
+    datetime_tool = load_tool('datetime')
+    get_datetime = undecorated(datetime_tool.get_datetime)
+    get_datetime_many = undecorated(datetime_tool.get_datetime_many)
+    zones = ['UTC', 'America/New_York', 'Europe/London', 'Asia/Tokyo', 'Australia/Sydney']
+    cases += [
+        ('get_datetime', 'datetime', lambda: get_datetime('America/New_York'), None),
+        ('get_datetime_many (5 zones)', 'datetime', lambda: get_datetime_many(zones), None),
+    ]
+
+    database_tool = load_tool('database-query')
+    database_query = undecorated(database_tool.database_query)
+    database_query_batch = undecorated(database_tool.database_query_batch)
+    statements = [f'SELECT id, name, score FROM users WHERE id > {i * 100} ORDER BY id' for i in range(3)]
+    parameter_sets = [{'id': i, 'name': f'user-{i}'} for i in range(100)]
+    cases += [
+        ('database_query', 'database-query', lambda: database_query('SELECT id, name, score FROM users ORDER BY id'),
+         None),
+        ('database_query_batch (3 stmts)', 'database-query', lambda: database_query_batch(statements), None),
+        ('database_query_batch (100 sets)', 'database-query', lambda: database_query_batch(
+            sql='INSERT INTO users (id, name) VALUES (:id, :name)', parameter_sets=parameter_sets, transaction=True
+        ), None),
+    ]
+
+    email_tool = load_tool('email-sender')
+    send_email = undecorated(email_tool.send_email)
+    get_email_status = undecorated(email_tool.get_email_status)
+    send_email_bulk = undecorated(email_tool.send_email_bulk)
+    recipients = [{'to': f'user{i}@example.com', 'name': f'User {i}'} for i in range(20)]
+    queued = send_email('user@example.com', 'Hi', 'Hello', wait=False)
+    tracking_id = queued.split('Tracking ID: ')[1].split()[0] if 'Tracking ID: ' in queued else 'email-unknown'
+    cases += [
+        ('send_email', 'email-sender', lambda: send_email('user@example.com', 'Hi', 'Hello', cc='team@example.com'),
+         None),
+        ('get_email_status', 'email-sender', lambda: get_email_status(tracking_id), None),
+        ('send_email_bulk (20 recipients)', 'email-sender', lambda: send_email_bulk(
+            recipients, subject='Your report is ready', body='Hi {{name}}'
+        ), 50),
+    ]
+
+    if importlib.util.find_spec('crawl4ai') is None:
+        cases += [
+            ('web_crawler', 'web-crawler', None, 'crawl4ai is not installed'),
+            ('web_crawl_many (3 urls)', 'web-crawler', None, 'crawl4ai is not installed'),
+            ('web_crawl_site (depth 1)', 'web-crawler', None, 'crawl4ai is not installed'),
+        ]
+    else:
+        crawler_tool = load_tool('web-crawler')
+        web_crawler = undecorated(crawler_tool.web_crawler)
+        web_crawl_many = undecorated(crawler_tool.web_crawl_many)
+        web_crawl_site = undecorated(crawler_tool.web_crawl_site)
+        urls = [servers['pages'].url(f'/page/{i}') for i in range(3)]
+        cases += [
+            ('web_crawler', 'web-crawler', lambda: web_crawler(urls[0]), 20),
+            ('web_crawl_many (3 urls)', 'web-crawler', lambda: web_crawl_many(urls), 20),
+            ('web_crawl_site (depth 1)', 'web-crawler', lambda: web_crawl_site(urls[0], max_depth=1), 20),
+        ]
+
+    template = load_template()
+    template.app.logger.handlers = [logging.NullHandler()]
+    template.app.logger.propagate = False
+    template.agent_sessions = template.AgentSessionPool(lambda: template.Agent(
+        model=StubModel(0.0), tools=[make_lookup(0.0)], callback_handler=None
+    ))
+    cases.append(('invoke', 'template', lambda: loop.run_until_complete(
+        template.invoke({'prompt': 'What is the value for bench?'})
+    ), None))
+    return cases, template
+
+
+def check_result(result):
+    """Return an error description if a case's first call failed, else None."""
+    if isinstance(result, dict):
+        result = result.get('error') or ''
+        return result or None
+    if isinstance(result, str) and result.startswith('Error'):
+        return result.splitlines()[0]
+    return None
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """Return [(case, metric, baseline value, current value)] for cases that regressed."""
+    regressions = []
+    for name, current in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        for metric in ('p50_ms', 'p95_ms'):
+            grew = current[metric] - before[metric]
+            if grew > min_delta_ms and current[metric] > before[metric] * (1 + threshold):
+                regressions.append((name, metric, before[metric], current[metric]))
+        if current['ops_per_sec'] < before['ops_per_sec'] * (1 - threshold):
+            regressions.append((name, 'ops_per_sec', before['ops_per_sec'], current['ops_per_sec']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--runs', type=int, default=3, help='timed runs per case; the run with the lowest p50 is kept')
+    parser.add_argument('--only', nargs='+', default=None, help='case names or tool ids to run')
+    parser.add_argument('--service-latency-ms', type=float, default=0,
+                        help='latency added by every HTTP stand-in (0 measures the code path alone)')
+    parser.add_argument('--save', default=None, help='write the results to this JSON file')
+    parser.add_argument('--baseline', default=None, help='compare with results saved by --save')
+    parser.add_argument('--threshold', type=float, default=0.25, help='fractional change counted as a regression')
+    parser.add_argument('--min-delta-ms', type=float, default=0.05, help='ignore latency changes smaller than this')
+    args = parser.parse_args()
+    logging.getLogger('strands').setLevel(logging.ERROR)
+
+    latency = args.service_latency_ms / 1000
+    page_route = StandIn(lambda handler: (200, {'Content-Type': 'text/html; charset=utf-8'}, CRAWL_PAGE), latency)
+    routes = {
+        'search': {'/html/': StandIn(
+            lambda handler: (200, {'Content-Type': 'text/html; charset=utf-8'}, read_fixture('duckduckgo_results.html')),
+            latency
+        )},
+        'pages': {f'/page/{i}': page_route for i in range(3)},
+        'rds-data': rds_data_routes(latency),
+        'ses': {'/': StandIn(ses_api, latency)},
+        'sqs': {'/': StandIn(sqs_api, latency)},
+        'dynamodb': {'/': StandIn(dynamodb_api, latency)},
+    }
+    servers = {name: FixtureServer(service_routes).__enter__() for name, service_routes in routes.items()}
+    os.environ['SEARCH_URL'] = servers['search'].url('/html/')
+    os.environ['AWS_ENDPOINT_URL_RDS_DATA'] = servers['rds-data'].url('')
+    os.environ['AWS_ENDPOINT_URL_SES'] = servers['ses'].url('')
+    os.environ['AWS_ENDPOINT_URL_SQS'] = servers['sqs'].url('')
+    os.environ['AWS_ENDPOINT_URL_DYNAMODB'] = servers['dynamodb'].url('')
+
+    loop = asyncio.new_event_loop()
+    results, failed, skipped = {}, {}, {}
+    try:
+        cases, template = build_cases(servers, loop)
+        for name, tool_id, fn, limit in cases:
+            if args.only and name not in args.only and tool_id not in args.only:
+                continue
+            if fn is None:
+                skipped[name] = limit
+                continue
+            try:
+                error = check_result(fn())
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            if error:
+                failed[name] = error
+                continue
+            iterations = min(args.iterations, limit) if limit else args.iterations
+            runs = [
+                summarize(time_calls(fn, iterations, warmup=min(5, iterations))) for _ in range(max(1, args.runs))
+            ]
+            results[name] = dict(min(runs, key=lambda run: run['p50_ms']), tool=tool_id)
+        template.usage_reporter.close(timeout=10)
+    finally:
+        loop.close()
+        for server in servers.values():
+            server.__exit__(None, None, None)
+
+    print_report(f'offline benchmark suite ({args.iterations} iterations, '
+                 f'{args.service_latency_ms:g}ms stand-in latency)', results)
+    for name, reason in skipped.items():
+        print(f"{name:<32} skipped: {reason}")
+    for name, error in failed.items():
+        print(f"{name:<32} FAILED: {error}")
+    print("\nstand-in calls: " + ', '.join(
+        f"{name} {sum(route.calls for route in set(service_routes.values()))}"
+        for name, service_routes in routes.items()
+    ))
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({
+                'created': datetime.now(timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'iterations': args.iterations,
+                'service_latency_ms': args.service_latency_ms,
+                'results': results,
+                'skipped': skipped,
+                'failed': failed,
+            }, f, indent=2)
+        print(f"results written to {args.save}")
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline.get('results', {}), args.threshold, args.min_delta_ms)
+        print(f"\ncompared with {args.baseline} ({baseline.get('created', 'unknown date')}, "
+              f"threshold {args.threshold:.0%}):")
+        for name, metric, before, after in regressions:
+            print(f"  REGRESSION {name:<32} {metric:<12} {before:10.3f} -> {after:10.3f} ({after / before - 1:+.0%})"
+                  if before else f"  REGRESSION {name:<32} {metric:<12} {before:10.3f} -> {after:10.3f}")
+        if not regressions:
+            print('  no regressions')
+        missing = sorted(set(baseline.get('results', {})) - set(results) - set(skipped))
+        if missing and not args.only:
+            print(f"  not run this time: {', '.join(missing)}")
+
+    if regressions or failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
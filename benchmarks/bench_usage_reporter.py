@@ -0,0 +1,125 @@
+"""
+Request-path cost of usage reporting in the agent template.
+
+"send_message" makes one synchronous SQS call per record, which is what
+the template did before the background reporter. "submit" queues the
+record for shared/usage_reporter.py's sender thread. Both use a stand-in
+SQS client with a fixed per-call latency, so no AWS account is needed.
+The outage run makes SQS fail for a while, then checks that every record
+is still delivered from the spill file. The record format run compares the
+serialized size and cost of a record carrying the full messages with the
+compact record built by summarize_message.
+
+Usage:
+    python benchmarks/bench_usage_reporter.py --records 2000 --sqs-latency-ms 20 --message-chars 50000
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from common import print_report, summarize, time_calls
+from shared import usage_reporter
+
+
+class FakeSQS:
+    """SQS stand-in that sleeps latency seconds per call and can be switched off."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.available = True
+        self.calls = 0
+        self.delivered = 0
+        self._lock = threading.Lock()
+
+    def send_message(self, QueueUrl, MessageBody):
+        return self.send_message_batch(QueueUrl, [{'Id': '0', 'MessageBody': MessageBody}])
+
+    def send_message_batch(self, QueueUrl, Entries):
+        time.sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+            if not self.available:
+                raise ConnectionError('SQS unavailable')
+            self.delivered += len(Entries)
+        return {'Successful': [{'Id': entry['Id']} for entry in Entries]}
+
+
+def record(index):
+    return {'id': str(index), 'tenant_id': 'bench', 'input_tokens': 1200, 'output_tokens': 350, 'total_tokens': 1550}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=1000)
+    parser.add_argument('--sqs-latency-ms', type=float, default=20)
+    parser.add_argument('--message-chars', type=int, default=50000)
+    args = parser.parse_args()
+
+    latency = args.sqs_latency_ms / 1000
+    spill_dir = tempfile.mkdtemp()
+    counter = iter(range(10 ** 9))
+
+    sync_sqs = FakeSQS(latency)
+    sync_iterations = min(args.records, 200)
+    rows = {
+        'send_message (sync)': summarize(time_calls(
+            lambda: sync_sqs.send_message('queue', str(record(next(counter)))), sync_iterations
+        )),
+    }
+
+    sqs = FakeSQS(latency)
+    reporter = usage_reporter.UsageReporter(
+        'queue', lambda: sqs, max_batch_delay=0.05, spill_path=os.path.join(spill_dir, 'spill.jsonl')
+    )
+    rows['submit (background)'] = summarize(time_calls(lambda: reporter.submit(record(next(counter))), args.records))
+    start = time.perf_counter()
+    reporter.close(timeout=60)
+    drain = time.perf_counter() - start
+    print_report('usage report cost on the request path', rows)
+    print(f"\nbackground: {sqs.delivered} record(s) in {sqs.calls} SendMessageBatch call(s), drained {drain:.2f}s after the last submit")
+    print(f"metrics: {reporter.metrics()}")
+
+    # Outage: SQS fails, records spill to disk and are replayed once it recovers
+    quiet = logging.getLogger('usage-reporter-bench')
+    quiet.addHandler(logging.NullHandler())
+    quiet.propagate = False
+    usage_reporter.USAGE_SPILL_REPLAY_INTERVAL = 0.2
+    sqs = FakeSQS(latency)
+    sqs.available = False
+    reporter = usage_reporter.UsageReporter(
+        'queue', lambda: sqs, max_batch_delay=0.05, max_retries=2, retry_backoff=0.01,
+        spill_path=os.path.join(spill_dir, 'outage.jsonl'), logger=quiet
+    )
+    for index in range(100):
+        reporter.submit(record(index))
+    time.sleep(1.0)
+    spilled = reporter.metrics()['spilled']
+    sqs.available = True
+    deadline = time.monotonic() + 10
+    while sqs.delivered < 100 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    reporter.close()
+    print(f"\noutage: {spilled} record(s) spilled while SQS was down; {sqs.delivered}/100 delivered after recovery")
+
+    # Record format: full message bodies vs counts, hashes and previews
+    user_message = ('Summarize the attached quarterly report. ' * (args.message_chars // 41 + 1))[:args.message_chars]
+    response_message = {'role': 'assistant', 'content': [{'text': 'The report shows revenue growth. ' * (args.message_chars // 33 + 1)}]}
+    full = lambda: json.dumps({**record(0), 'user_message': user_message, 'response_message': response_message})
+    compact = lambda: json.dumps({
+        **record(0),
+        **usage_reporter.summarize_message(user_message, 'user_message'),
+        **usage_reporter.summarize_message(response_message, 'response_message'),
+    })
+    rows = {
+        f'full messages ({len(full())} bytes)': summarize(time_calls(full, 200)),
+        f'compact ({len(compact())} bytes)': summarize(time_calls(compact, 200)),
+    }
+    print_report(f'usage record build + serialize, {args.message_chars}-char messages', rows)
+
+
+if __name__ == '__main__':
+    main()
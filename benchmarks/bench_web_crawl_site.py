@@ -0,0 +1,104 @@
+"""
+Crawl time and bandwidth for a multi-page site: one page per call vs web_crawl_site.
+
+A FixtureServer serves a --pages page documentation site (each page links
+to two children) with ETag validators, and answers conditional requests
+with 304 Not Modified. "web_crawler per page" is how an agent covered a site
+before the site crawl mode: one web_crawler call per page, in order. The
+web_crawl_site rows crawl the same pages: first with an empty crawl store,
+then again the next day, when every page revalidates as unchanged and is
+not rendered again. Requires crawl4ai and its browser.
+
+Usage:
+    python benchmarks/bench_web_crawl_site.py --pages 30
+"""
+import argparse
+import os
+import tempfile
+import time
+
+# Measure the crawls themselves, not the result cache in front of web_crawler
+os.environ['TOOL_CACHE_DISABLED'] = '1'
+os.environ['CRAWLER_STORE_PATH'] = os.path.join(tempfile.mkdtemp(), 'crawl-store.sqlite3')
+
+from common import FixtureServer, load_tool
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head><title>Guide page {index}</title></head>
+<body>
+<h1>Guide page {index}</h1>
+<p>This documentation page is served locally so crawl time measures the crawler and
+the number of pages rendered, not the network. {filler}</p>
+{links}
+</body>
+</html>
+"""
+
+
+class Site:
+    """Routes for a tree of pages with ETags; counts requests, 304s and body bytes served."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes_sent = 0
+        self.routes = {f'/guide/{index}': self._route(index) for index in range(pages)}
+
+    def _route(self, index):
+        children = [child for child in (index * 2 + 1, index * 2 + 2) if child < self.pages]
+        links = '\n'.join(f'<p><a href="/guide/{child}">Guide page {child}</a></p>' for child in children)
+        body = PAGE.format(index=index, filler='Words to read. ' * 200, links=links).encode('utf-8')
+        etag = f'"guide-{index}-v1"'
+
+        def respond(handler):
+            self.requests += 1
+            if handler.headers.get('If-None-Match') == etag:
+                self.not_modified += 1
+                return 304, {'ETag': etag}, b''
+            self.bytes_sent += len(body)
+            return 200, {'Content-Type': 'text/html; charset=utf-8', 'ETag': etag}, body
+        return respond
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pages', type=int, default=30)
+    args = parser.parse_args()
+
+    site = Site(args.pages)
+    crawler_tool = load_tool('web-crawler')
+    web_crawler = getattr(crawler_tool.web_crawler, '_tool_func', crawler_tool.web_crawler)
+    web_crawl_site = getattr(crawler_tool.web_crawl_site, '_tool_func', crawler_tool.web_crawl_site)
+    # Enough depth to reach every page of the binary tree
+    depth = min(crawler_tool.CRAWLER_SITE_MAX_DEPTH, args.pages.bit_length())
+
+    print(f"{args.pages}-page site")
+    print(f"{'case':<34} {'seconds':>8} {'requests':>9} {'304s':>6} {'KB served':>10}")
+    with FixtureServer(site.routes) as server:
+        web_crawler(server.url('/guide/0'))  # warm the browser pool
+
+        def run(label, fn):
+            requests, not_modified, bytes_sent = site.requests, site.not_modified, site.bytes_sent
+            start = time.perf_counter()
+            output = fn()
+            elapsed = time.perf_counter() - start
+            print(f"{label:<34} {elapsed:>8.2f} {site.requests - requests:>9} "
+                  f"{site.not_modified - not_modified:>6} {(site.bytes_sent - bytes_sent) / 1024:>10.1f}")
+            return output
+
+        run('web_crawler per page', lambda: [web_crawler(server.url(f'/guide/{index}')) for index in range(args.pages)])
+        first = run('web_crawl_site, first crawl', lambda: web_crawl_site(
+            server.url('/guide/0'), max_depth=depth, max_pages=args.pages
+        ))
+        again = run('web_crawl_site, unchanged revisit', lambda: web_crawl_site(
+            server.url('/guide/0'), max_depth=depth, max_pages=args.pages
+        ))
+
+    crawler_tool._CRAWLER_POOL.shutdown()
+    print(f"\n{first.splitlines()[0]}\n{again.splitlines()[0]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Cold vs warm crawl latency for the web-crawler tool.
+
+"cold" launches and tears down a browser for every crawl (the behaviour
+before the crawler pool); "warm" goes through the shared pool that the
+`web_crawler` tool uses.
+
+Usage:
+    python benchmarks/bench_web_crawler_pool.py --iterations 20
+"""
+import argparse
+import asyncio
+import os
+
+# Measure the browser pool itself, not the result cache in front of it
+os.environ['TOOL_CACHE_DISABLED'] = '1'
+
+from common import FixtureServer, load_tool, print_report, summarize, time_calls
+from crawl4ai import AsyncWebCrawler, BrowserConfig
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head><title>Fixture Page</title></head>
+<body>
+<h1>Fixture Page</h1>
+<p>This page is served locally so crawl latency measures the browser, not the network.
+It has enough words in each paragraph to pass the default word count threshold.</p>
+<p>Second paragraph with a <a href="/about">link to the about page</a> and an
+<a href="https://example.com/">external link</a> for link extraction.</p>
+</body>
+</html>
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=10)
+    args = parser.parse_args()
+
+    crawler_tool = load_tool('web-crawler')
+    routes = {'/': (200, {'Content-Type': 'text/html; charset=utf-8'}, PAGE)}
+
+    with FixtureServer(routes) as server:
+        url = server.url('/')
+
+        async def cold_crawl():
+            browser_config = BrowserConfig(headless=True, verbose=False)
+            async with AsyncWebCrawler(config=browser_config) as crawler:
+                return await crawler_tool._crawl_website(crawler, url, True, False, 10)
+
+        cold = time_calls(lambda: asyncio.run(cold_crawl()), args.iterations)
+        warm = time_calls(lambda: crawler_tool.web_crawler(url), args.iterations, warmup=1)
+
+    crawler_tool._CRAWLER_POOL.shutdown()
+    print_report('web_crawler latency', {
+        'cold (browser per call)': summarize(cold),
+        'warm (crawler pool)': summarize(warm),
+    })
+    print(f"\npool stats: {crawler_tool._CRAWLER_POOL.stats}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+HTTP overhead and throughput for the web-search tool.
+
+Compares a fresh connection per search (plain `requests.post`, the behaviour
+before the pooled session) with the tool's keep-alive session, then measures
+throughput of concurrent `web_search` calls from a thread pool, the way
+Strands runs sync tools, with SEARCH_MAX_IN_FLIGHT set to --concurrency.
+Searches go to a local stub server serving a saved DuckDuckGo results page;
+the result cache is disabled so every call hits the server.
+
+Usage:
+    python benchmarks/bench_web_search_http.py --iterations 200 --concurrency 8
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ['TOOL_CACHE_DISABLED'] = '1'
+
+import requests
+from common import FixtureServer, load_tool, print_report, read_fixture, summarize, time_calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+
+    page = read_fixture('duckduckgo_results.html')
+    routes = {'/html/': (200, {'Content-Type': 'text/html; charset=utf-8'}, page)}
+
+    with FixtureServer(routes) as server:
+        os.environ['SEARCH_URL'] = server.url('/html/')
+        os.environ['SEARCH_MAX_IN_FLIGHT'] = str(args.concurrency)
+        search_tool = load_tool('web-search')
+        params = {'q': 'python tutorials', 'kl': 'us-en'}
+        rows = {}
+        connections = {}
+
+        def new_connection():
+            response = requests.post(
+                search_tool.SEARCH_URL, data=params, headers=search_tool.SEARCH_HEADERS, timeout=10
+            )
+            response.raise_for_status()
+
+        def pooled():
+            response = search_tool._search_session().post(search_tool.SEARCH_URL, data=params, timeout=10)
+            response.raise_for_status()
+
+        for label, fn in (('post, new connection', new_connection), ('post, pooled session', pooled)):
+            before = server.connection_count
+            rows[label] = summarize(time_calls(fn, args.iterations, warmup=1))
+            connections[label] = server.connection_count - before
+
+        rows['web_search (sync)'] = summarize(
+            time_calls(lambda: search_tool.web_search('python tutorials'), args.iterations)
+        )
+
+        def one(i):
+            start = time.perf_counter()
+            search_tool.web_search(f'python tutorials {i}')
+            return time.perf_counter() - start
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency * 2) as executor:
+            samples = list(executor.map(one, range(args.iterations)))
+        elapsed = time.perf_counter() - started
+        rows[f'web_search x{args.concurrency} threads'] = summarize(samples)
+
+    print_report('web_search HTTP overhead', rows)
+    print()
+    for label, count in connections.items():
+        print(f"{label}: {count} TCP connection(s) for {args.iterations} request(s)")
+    print(f"concurrent web_search throughput: {args.iterations / elapsed:.1f} searches/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Result extraction speed for the web-search tool.
+
+Compares the streaming extractor used by `web_search` with the original
+full BeautifulSoup tree walk over saved DuckDuckGo pages, after checking
+that both produce identical results for every fixture and every
+max_results from 1 to 10.
+
+Usage:
+    python benchmarks/bench_web_search_parse.py --iterations 500
+"""
+import argparse
+import urllib.parse
+
+from bs4 import BeautifulSoup
+from common import load_tool, print_report, read_fixture, summarize, time_calls
+
+FIXTURES = ['duckduckgo_results.html', 'duckduckgo_legacy_results.html']
+
+
+def soup_parse_results(html, max_results):
+    """The BeautifulSoup extraction web_search used before the streaming extractor."""
+    soup = BeautifulSoup(html, 'html.parser')
+    results = []
+    result_divs = soup.find_all('div', class_='result')
+    if not result_divs:
+        result_divs = soup.find_all('div', class_='results_links')
+
+    for result_div in result_divs[:max_results]:
+        try:
+            title_elem = result_div.find('a', class_='result__a')
+            if not title_elem:
+                title_elem = result_div.find('a', class_='large')
+            if title_elem:
+                title = title_elem.get_text(strip=True)
+                link = title_elem.get('href', '')
+                snippet_elem = result_div.find('a', class_='result__snippet')
+                if not snippet_elem:
+                    snippet_elem = result_div.find('div', class_='result__snippet')
+                if not snippet_elem:
+                    snippet_elem = result_div.find('td', class_='result-snippet')
+                snippet = snippet_elem.get_text(strip=True) if snippet_elem else 'No description available'
+                if link.startswith('/'):
+                    if 'uddg=' in link:
+                        link = urllib.parse.unquote(link.split('uddg=')[1].split('&')[0])
+                results.append({'title': title, 'snippet': snippet, 'url': link})
+        except Exception:
+            continue
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    search_tool = load_tool('web-search')
+
+    for name in FIXTURES:
+        html = read_fixture(name)
+        for max_results in range(1, 11):
+            expected = soup_parse_results(html, max_results)
+            actual = search_tool._parse_results(html, max_results)
+            if actual != expected:
+                raise SystemExit(
+                    f"Mismatch for {name} with max_results={max_results}:\n"
+                    f"expected {expected}\nactual   {actual}"
+                )
+    print(f"Extractors agree on {len(FIXTURES)} fixture(s) for max_results 1-10")
+
+    for name in FIXTURES:
+        html = read_fixture(name)
+        rows = {}
+        for max_results in (5, 10):
+            rows[f'BeautifulSoup, max_results={max_results}'] = summarize(
+                time_calls(lambda: soup_parse_results(html, max_results), args.iterations, warmup=5)
+            )
+            rows[f'streaming, max_results={max_results}'] = summarize(
+                time_calls(lambda: search_tool._parse_results(html, max_results), args.iterations, warmup=5)
+            )
+        print_report(f'result extraction: {name} ({len(html)} bytes)', rows)
+
+
+if __name__ == '__main__':
+    main()
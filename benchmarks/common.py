@@ -0,0 +1,168 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Tool modules live in hyphenated directories (tools/web-crawler/tool.py), so
+they are loaded by path rather than imported as packages.
+"""
+import importlib.util
+import math
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+
+def load_tool(tool_id):
+    """Load tools/<tool_id>/tool.py as a module and return it."""
+    path = os.path.join(REPO_ROOT, 'tools', tool_id, 'tool.py')
+    module_name = f"{tool_id.replace('-', '_')}_tool"
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_template():
+    """Load templates/main.py as a module without starting the server."""
+    path = os.path.join(REPO_ROOT, 'templates', 'main.py')
+    spec = importlib.util.spec_from_file_location('agent_template', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def read_fixture(name):
+    """Return the contents of benchmarks/fixtures/<name> as text."""
+    with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def percentile(samples, pct):
+    """Return the pct-th percentile of samples using nearest-rank."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(samples):
+    """Summarize a list of durations (seconds) in milliseconds."""
+    total = sum(samples)
+    return {
+        'n': len(samples),
+        'mean_ms': statistics.mean(samples) * 1000 if samples else 0.0,
+        'p50_ms': percentile(samples, 50) * 1000,
+        'p95_ms': percentile(samples, 95) * 1000,
+        'p99_ms': percentile(samples, 99) * 1000,
+        'max_ms': max(samples) * 1000 if samples else 0.0,
+        'ops_per_sec': len(samples) / total if total else 0.0,
+    }
+
+
+def time_calls(fn, iterations, warmup=0):
+    """Call fn() warmup + iterations times and return the timed durations."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def print_report(title, rows):
+    """Print a table of {label: summary} rows produced by summarize()."""
+    print(f"\n{title}")
+    print(f"{'case':<32} {'n':>6} {'mean ms':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'ops/s':>10}")
+    for label, stats in rows.items():
+        print(
+            f"{label:<32} {stats['n']:>6} {stats['mean_ms']:>10.3f} {stats['p50_ms']:>10.3f} "
+            f"{stats['p95_ms']:>10.3f} {stats['p99_ms']:>10.3f} {stats['ops_per_sec']:>10.1f}"
+        )
+
+
+class FixtureServer:
+    """
+    Local HTTP server for benchmarks.
+
+    `routes` maps a path to (status, headers, body) or to a callable taking
+    the request handler and returning that tuple. Unknown paths return 404.
+    `connection_count` counts accepted TCP connections, so keep-alive reuse
+    shows up as fewer connections than requests.
+
+    Example:
+        with FixtureServer({'/': (200, {'Content-Type': 'text/html'}, b'<p>hi</p>')}) as server:
+            requests.get(server.url('/'))
+    """
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.request_count = 0
+        self.connection_count = 0
+        self._server = None
+        self._thread = None
+
+    def url(self, path='/'):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{path}"
+
+    def __enter__(self):
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                fixture.connection_count += 1
+                # Avoid Nagle/delayed-ACK stalls between the header and body writes
+                self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                super().setup()
+
+            def _respond(self):
+                fixture.request_count += 1
+                length = int(self.headers.get('Content-Length') or 0)
+                self.request_body = self.rfile.read(length) if length else b''
+                route = fixture.routes.get(self.path.split('?')[0])
+                if route is None:
+                    status, headers, body = 404, {'Content-Type': 'text/plain'}, b'not found'
+                elif callable(route):
+                    status, headers, body = route(self)
+                else:
+                    status, headers, body = route
+                if isinstance(body, str):
+                    body = body.encode('utf-8')
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = _respond
+            do_POST = _respond
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join(timeout=5)
@@ -0,0 +1,523 @@
+"""
+Catalog compiler and deployment bundle builder.
+
+`index` validates catalog.json, every tool's config.json and tool.py, and
+the shared modules once, and writes a compiled index
+(dist/catalog.index.json): each tool's function schemas, dependencies,
+shared modules and content hash, plus the deduplicated dependency set of
+the whole catalog. Deployments can read that one file instead of resolving
+every config on each build. The index is deterministic, so `--check` can
+fail CI when the committed sources and a published index disagree.
+
+`bundle` builds the deployable source for a selection of tools: main.py
+with the tool sources injected at the template's marker, only the shared
+modules the template and those tools import, and a requirements.txt with
+only their dependencies (optionalDependencies only with --optional).
+Bundles are content addressed: the directory name is a hash of everything
+that goes into it, so rebuilding an unchanged selection is a no-op and a
+deployment whose bundle key matches the running one can be skipped.
+
+Only the standard library is needed; tool sources are parsed, not imported.
+
+Usage:
+    python scripts/build_catalog.py index [--check]
+    python scripts/build_catalog.py bundle web-search calculator [--optional]
+"""
+import argparse
+import ast
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Output settings (can be overridden with environment variables)
+BUILD_DIST_DIR = os.environ.get('BUILD_DIST_DIR', os.path.join(REPO_ROOT, 'dist'))
+
+# Bumped when the bundle layout changes, so older bundles are not reused
+BUILD_FORMAT_VERSION = 1
+
+BUILD_TEMPLATE_PATH = 'templates/main.py'
+BUILD_INJECTION_MARKER = '# Tools will be injected here by the build system'
+BUILD_CONFIG_FIELDS = ('name', 'displayName', 'description', 'category', 'version', 'dependencies', 'parameters')
+
+# Import names that differ from the distribution that provides them. Anything
+# not listed maps to itself, with underscores as hyphens.
+BUILD_IMPORT_PACKAGES = {
+    'bedrock_agentcore': 'bedrock-agentcore',
+    'botocore': 'boto3',
+    'bs4': 'beautifulsoup4',
+    'starlette': 'bedrock-agentcore',
+    'strands': 'strands-agents',
+    'urllib3': 'requests',
+    'yaml': 'PyYAML',
+}
+
+_BUILD_JSON_TYPES = {
+    'str': 'string', 'int': 'integer', 'float': 'number', 'bool': 'boolean',
+    'list': 'array', 'dict': 'object', 'List': 'array', 'Dict': 'object',
+}
+
+
+class CatalogError(Exception):
+    """The catalog failed validation; `errors` lists every problem found."""
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} catalog error(s):\n" + '\n'.join(f"  - {e}" for e in errors))
+        self.errors = errors
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def requirement_name(requirement):
+    """Return the normalized (PEP 503) project name of a requirement string."""
+    match = re.match(r'\s*([A-Za-z0-9][A-Za-z0-9._-]*)', requirement)
+    name = match.group(1) if match else requirement.strip()
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+
+def _imports(tree):
+    """Return (third-party packages, shared modules) imported anywhere in a module."""
+    packages, shared = set(), set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and not node.level and node.module:
+            names = [node.module]
+            if node.module == 'shared':
+                shared.update(alias.name for alias in node.names)
+        else:
+            continue
+        for name in names:
+            top = name.split('.')[0]
+            if top == 'shared':
+                if '.' in name:
+                    shared.add(name.split('.')[1])
+            elif top not in sys.stdlib_module_names and top != '__future__':
+                packages.add(requirement_name(BUILD_IMPORT_PACKAGES.get(top, top.replace('_', '-'))))
+    return packages, shared
+
+
+def _bindings(tree, owner):
+    """Map each module-level name a source binds to what it is bound to."""
+    bindings = {}
+
+    def visit(body):
+        for node in body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                bindings[node.name] = f"defined in {owner}"
+            elif isinstance(node, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                for target in targets:
+                    for name in ast.walk(target):
+                        if isinstance(name, ast.Name):
+                            bindings[name.id] = f"defined in {owner}"
+            elif isinstance(node, ast.Import):
+                for alias in node.names:
+                    bound = alias.asname or alias.name.split('.')[0]
+                    bindings[bound] = f"import {alias.name if alias.asname else bound}"
+            elif isinstance(node, ast.ImportFrom):
+                for alias in node.names:
+                    bindings[alias.asname or alias.name] = f"from {node.module} import {alias.name}"
+            elif isinstance(node, (ast.If, ast.Try)):
+                visit(node.body)
+                visit(node.orelse)
+                for handler in getattr(node, 'handlers', ()):
+                    visit(handler.body)
+                visit(getattr(node, 'finalbody', ()))
+
+    visit(tree.body)
+    return bindings
+
+
+def _is_tool(decorator):
+    target = decorator.func if isinstance(decorator, ast.Call) else decorator
+    return (isinstance(target, ast.Name) and target.id == 'tool') or \
+        (isinstance(target, ast.Attribute) and target.attr == 'tool')
+
+
+def _annotation_schema(annotation):
+    """Translate a parameter annotation into a JSON schema fragment."""
+    if annotation is None:
+        return {}
+    if isinstance(annotation, ast.Subscript):
+        base = annotation.value.id if isinstance(annotation.value, ast.Name) else getattr(annotation.value, 'attr', '')
+        if base in ('Optional', 'Union'):
+            members = annotation.slice.elts if isinstance(annotation.slice, ast.Tuple) else [annotation.slice]
+            return _union_schema(members)
+        if base in ('list', 'List'):
+            return {'type': 'array', 'items': _annotation_schema(annotation.slice)}
+        return {'type': _BUILD_JSON_TYPES.get(base, 'object')}
+    if isinstance(annotation, ast.BinOp) and isinstance(annotation.op, ast.BitOr):
+        return _union_schema([annotation.left, annotation.right])
+    if isinstance(annotation, ast.Name):
+        return {'type': _BUILD_JSON_TYPES[annotation.id]} if annotation.id in _BUILD_JSON_TYPES else {}
+    return {}
+
+
+def _union_schema(members):
+    """Schema for X | Y: None members make the parameter nullable, which tool calls express by omitting it."""
+    schemas, pending = [], list(members)
+    while pending:
+        member = pending.pop(0)
+        if isinstance(member, ast.BinOp) and isinstance(member.op, ast.BitOr):
+            pending[:0] = [member.left, member.right]
+        elif not (isinstance(member, ast.Constant) and member.value is None):
+            schemas.append(_annotation_schema(member))
+    return schemas[0] if len(schemas) == 1 else {'anyOf': schemas}
+
+
+def _arg_descriptions(docstring):
+    """Parse the `Args:` section of a Google-style docstring into {name: description}."""
+    descriptions, current, entry_indent = {}, None, None
+    lines = iter(docstring.splitlines())
+    for line in lines:
+        if line.strip() == 'Args:':
+            break
+    for line in lines:
+        stripped = line.strip()
+        if not stripped:
+            continue
+        indent = len(line) - len(line.lstrip())
+        if entry_indent is None:
+            entry_indent = indent
+        if indent < entry_indent:
+            break
+        match = re.match(r'(\w+)(?:\s*\([^)]*\))?:\s*(.*)', stripped)
+        if indent == entry_indent and match:
+            current = match.group(1)
+            descriptions[current] = match.group(2)
+        elif current:
+            descriptions[current] += ' ' + stripped
+    return descriptions
+
+
+def _function_schema(node):
+    """Build the tool schema (name, description, JSON schema of parameters) for a @tool function."""
+    docstring = ast.get_docstring(node) or ''
+    described = _arg_descriptions(docstring)
+    args = node.args.args
+    defaults = [None] * (len(args) - len(node.args.defaults)) + list(node.args.defaults)
+    properties, required = {}, []
+    for arg, default in zip(args, defaults):
+        schema = _annotation_schema(arg.annotation)
+        if arg.arg in described:
+            schema['description'] = described[arg.arg]
+        if default is None:
+            required.append(arg.arg)
+        else:
+            try:
+                schema['default'] = ast.literal_eval(default)
+            except ValueError:
+                pass
+        properties[arg.arg] = schema
+    return {
+        'name': node.name,
+        'description': re.split(r'\n\s*\n', docstring.strip())[0].strip(),
+        'inputSchema': {'type': 'object', 'properties': properties, 'required': required},
+    }
+
+
+def compile_catalog(root=REPO_ROOT):
+    """
+    Validate the catalog and return the compiled index (a JSON-serializable dict).
+
+    Raises CatalogError listing every problem found, rather than stopping at
+    the first one.
+    """
+    errors = []
+    catalog = json.loads(_read_bytes(os.path.join(root, 'catalog.json')))
+
+    shared_dir = os.path.join(root, 'shared')
+    shared = {}
+    for filename in sorted(os.listdir(shared_dir)):
+        if not filename.endswith('.py') or filename == '__init__.py':
+            continue
+        source = _read_bytes(os.path.join(shared_dir, filename))
+        packages, imports = _imports(ast.parse(source, filename))
+        shared[filename[:-3]] = {'hash': _sha256(source), 'dependencies': sorted(packages), 'imports': sorted(imports)}
+
+    template_source = _read_bytes(os.path.join(root, BUILD_TEMPLATE_PATH))
+    template_tree = ast.parse(template_source, BUILD_TEMPLATE_PATH)
+    template_packages, template_shared = _imports(template_tree)
+    if BUILD_INJECTION_MARKER not in template_source.decode('utf-8'):
+        errors.append(f"{BUILD_TEMPLATE_PATH}: injection marker {BUILD_INJECTION_MARKER!r} not found")
+    namespace = {name: (BUILD_TEMPLATE_PATH, bound) for name, bound in _bindings(template_tree, 'the template').items()}
+
+    tools, requirements = {}, {}
+    for entry in catalog.get('tools', []):
+        tool_id = entry.get('id')
+        label = f"tool {tool_id!r}"
+        paths = {key: entry.get(key) for key in ('path', 'configPath')}
+        missing = [key for key, path in paths.items() if not path or not os.path.isfile(os.path.join(root, path))]
+        if not tool_id or missing:
+            errors.append(f"{label}: catalog entry has no readable {', '.join(missing) or 'id'}")
+            continue
+        if tool_id in tools:
+            errors.append(f"{label}: listed more than once in catalog.json")
+            continue
+
+        config_bytes = _read_bytes(os.path.join(root, paths['configPath']))
+        source_bytes = _read_bytes(os.path.join(root, paths['path']))
+        try:
+            config = json.loads(config_bytes)
+        except ValueError as e:
+            errors.append(f"{label}: invalid {paths['configPath']}: {str(e)}")
+            continue
+        try:
+            tree = ast.parse(source_bytes, paths['path'])
+        except SyntaxError as e:
+            errors.append(f"{label}: {paths['path']} does not parse: {str(e)}")
+            continue
+
+        errors.extend(f"{label}: config.json is missing {field!r}" for field in BUILD_CONFIG_FIELDS if field not in config)
+        if config.get('name', tool_id) != tool_id:
+            errors.append(f"{label}: config.json name {config['name']!r} does not match the catalog id")
+        if config.get('version', entry.get('version')) != entry.get('version'):
+            errors.append(f"{label}: catalog version {entry.get('version')} != config.json version {config['version']}")
+
+        dependencies = config.get('dependencies', [])
+        optional = config.get('optionalDependencies', [])
+        shared_modules = config.get('sharedModules', [])
+        for field, value in (('dependencies', dependencies), ('optionalDependencies', optional),
+                             ('sharedModules', shared_modules)):
+            if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+                errors.append(f"{label}: {field} must be a list of strings")
+        if not all(isinstance(v, list) for v in (dependencies, optional, shared_modules)):
+            continue
+
+        errors.extend(f"{label}: shared module {name!r} does not exist" for name in shared_modules if name not in shared)
+        packages, imported_shared = _imports(tree)
+        declared = {requirement_name(r) for r in dependencies + optional} | template_packages
+        errors.extend(f"{label}: imports {package!r} but does not declare it in dependencies"
+                      for package in sorted(packages - declared))
+        errors.extend(f"{label}: imports shared.{name} but does not list it in sharedModules"
+                      for name in sorted(imported_shared - set(shared_modules)))
+        for requirement in dependencies + optional:
+            previous = requirements.setdefault(requirement_name(requirement), requirement)
+            if previous != requirement:
+                errors.append(f"{label}: requirement {requirement!r} conflicts with {previous!r} from another tool")
+
+        # Every tool is injected into the template's module, so a name two
+        # sources bind differently would silently replace one of them
+        for name, bound in _bindings(tree, label).items():
+            owner, existing = namespace.setdefault(name, (label, bound))
+            if existing != bound:
+                errors.append(f"{label}: module-level name {name!r} clashes with {owner} ({existing})")
+
+        functions = [
+            _function_schema(node) for node in tree.body
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and any(map(_is_tool, node.decorator_list))
+        ]
+        if not functions:
+            errors.append(f"{label}: {paths['path']} defines no @tool function")
+
+        tools[tool_id] = {
+            'name': entry.get('name'),
+            'description': entry.get('description'),
+            'category': entry.get('category'),
+            'version': entry.get('version'),
+            'path': paths['path'],
+            'configPath': paths['configPath'],
+            'functions': functions,
+            'parameters': config.get('parameters', {}),
+            'dependencies': dependencies,
+            'optionalDependencies': optional,
+            'sharedModules': shared_modules,
+            'hash': _sha256(b'\0'.join([config_bytes, source_bytes])),
+        }
+
+    for name, module in shared.items():
+        errors.extend(f"shared module {name!r}: imports missing shared module {imported!r}"
+                      for imported in module['imports'] if imported not in shared)
+    errors.extend(f"{BUILD_TEMPLATE_PATH}: imports missing shared module {name!r}"
+                  for name in sorted(template_shared) if name not in shared)
+    if errors:
+        raise CatalogError(errors)
+
+    return {
+        'formatVersion': BUILD_FORMAT_VERSION,
+        'catalogVersion': catalog.get('version'),
+        'template': {
+            'path': BUILD_TEMPLATE_PATH,
+            'hash': _sha256(template_source),
+            'dependencies': sorted(template_packages),
+            'sharedModules': sorted(template_shared),
+        },
+        'shared': shared,
+        'tools': tools,
+        'dependencies': sorted(requirements.values(), key=requirement_name),
+    }
+
+
+def _shared_closure(index, names):
+    """Return names plus every shared module they import, transitively."""
+    closure, pending = set(), list(names)
+    while pending:
+        name = pending.pop()
+        if name not in closure:
+            closure.add(name)
+            pending.extend(index['shared'][name]['imports'])
+    return sorted(closure)
+
+
+def plan_bundle(index, tool_ids, include_optional=False):
+    """
+    Resolve a tool selection into a bundle manifest.
+
+    Tools are ordered as in the catalog, so the same selection always gives
+    the same key whatever order it was asked for in.
+    """
+    unknown = sorted(set(tool_ids) - set(index['tools']))
+    if unknown:
+        raise CatalogError([f"unknown tool {tool_id!r}" for tool_id in unknown])
+    selected = [tool_id for tool_id in index['tools'] if tool_id in set(tool_ids)]
+
+    shared_names = set(index['template']['sharedModules'])
+    requirements = {name: name for name in index['template']['dependencies']}
+    for tool_id in selected:
+        tool = index['tools'][tool_id]
+        shared_names.update(tool['sharedModules'])
+        for requirement in tool['dependencies'] + (tool['optionalDependencies'] if include_optional else []):
+            requirements[requirement_name(requirement)] = requirement
+    shared_names = _shared_closure(index, shared_names)
+    for name in shared_names:
+        for package in index['shared'][name]['dependencies']:
+            requirements.setdefault(package, package)
+
+    manifest = {
+        'formatVersion': BUILD_FORMAT_VERSION,
+        'template': index['template']['hash'],
+        'tools': {tool_id: {'version': index['tools'][tool_id]['version'], 'hash': index['tools'][tool_id]['hash']}
+                  for tool_id in selected},
+        'shared': {name: index['shared'][name]['hash'] for name in shared_names},
+        'requirements': [requirements[name] for name in sorted(requirements)],
+    }
+    manifest['key'] = _sha256(json.dumps(manifest, sort_keys=True).encode('utf-8'))[:24]
+    return manifest
+
+
+def render_main(index, manifest, root=REPO_ROOT):
+    """Return the template source with the selected tools injected at the marker."""
+    with open(os.path.join(root, BUILD_TEMPLATE_PATH), encoding='utf-8') as f:
+        template = f.read()
+    blocks = []
+    for tool_id, tool in manifest['tools'].items():
+        with open(os.path.join(root, index['tools'][tool_id]['path']), encoding='utf-8') as f:
+            source = f.read()
+        blocks.append(f"# --- tool: {tool_id} {tool['version']} ---\n{source.rstrip()}\n")
+    return template.replace(BUILD_INJECTION_MARKER, '\n'.join(blocks) or BUILD_INJECTION_MARKER, 1)
+
+
+def build_bundle(tool_ids, include_optional=False, dist_dir=BUILD_DIST_DIR, root=REPO_ROOT, index=None):
+    """
+    Build (or reuse) the bundle for a tool selection.
+
+    Returns (path, manifest, built); built is False when a bundle with the
+    same key already existed, in which case nothing was written.
+    """
+    index = index or compile_catalog(root)
+    manifest = plan_bundle(index, tool_ids, include_optional)
+    bundles_dir = os.path.join(dist_dir, 'bundles')
+    path = os.path.join(bundles_dir, manifest['key'])
+    if os.path.isfile(os.path.join(path, 'manifest.json')):
+        return path, manifest, False
+
+    os.makedirs(bundles_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=f".{manifest['key']}-", dir=bundles_dir)
+    try:
+        main_source = render_main(index, manifest, root)
+        compile(main_source, 'main.py', 'exec')
+        with open(os.path.join(staging, 'main.py'), 'w', encoding='utf-8') as f:
+            f.write(main_source)
+        os.makedirs(os.path.join(staging, 'shared'))
+        for name in ['__init__'] + list(manifest['shared']):
+            shutil.copyfile(os.path.join(root, 'shared', f"{name}.py"), os.path.join(staging, 'shared', f"{name}.py"))
+        with open(os.path.join(staging, 'requirements.txt'), 'w', encoding='utf-8') as f:
+            f.write(''.join(f"{requirement}\n" for requirement in manifest['requirements']))
+        os.chmod(staging, 0o755)
+        # Written last: a bundle directory without a manifest is incomplete
+        with open(os.path.join(staging, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        try:
+            os.rename(staging, path)
+        except OSError:
+            # Another build of the same key finished first; its output is identical
+            if not os.path.isfile(os.path.join(path, 'manifest.json')):
+                raise
+            shutil.rmtree(staging, ignore_errors=True)
+            return path, manifest, False
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return path, manifest, True
+
+
+def _write_index(index, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, sort_keys=True, ensure_ascii=False)
+        f.write('\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--dist', default=BUILD_DIST_DIR, help='output directory (default: %(default)s)')
+    commands = parser.add_subparsers(dest='command', required=True)
+    index_parser = commands.add_parser('index', help='validate the catalog and write catalog.index.json')
+    index_parser.add_argument('--check', action='store_true',
+                              help='only check that the existing index is up to date; exit 1 if not')
+    bundle_parser = commands.add_parser('bundle', help='build the deployment bundle for a tool selection')
+    bundle_parser.add_argument('tools', nargs='+', help='catalog ids of the tools to include')
+    bundle_parser.add_argument('--optional', action='store_true', help='also install optionalDependencies')
+    args = parser.parse_args(argv)
+
+    try:
+        index = compile_catalog()
+    except CatalogError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+
+    if args.command == 'index':
+        path = os.path.join(args.dist, 'catalog.index.json')
+        if args.check:
+            try:
+                with open(path, encoding='utf-8') as f:
+                    current = json.load(f)
+            except (OSError, ValueError):
+                current = None
+            if current != index:
+                print(f"{path} is out of date; run: python scripts/build_catalog.py index", file=sys.stderr)
+                return 1
+            print(f"{path} is up to date")
+            return 0
+        _write_index(index, path)
+        print(f"Wrote {path}: {len(index['tools'])} tools, {len(index['dependencies'])} dependencies")
+        return 0
+
+    try:
+        path, manifest, built = build_bundle(args.tools, args.optional, args.dist, index=index)
+    except CatalogError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    print(f"{'Built' if built else 'Up to date'}: {path}")
+    print(f"  key: {manifest['key']}")
+    print(f"  tools: {', '.join(manifest['tools'])}")
+    print(f"  shared: {', '.join(manifest['shared'])}")
+    print(f"  requirements: {', '.join(manifest['requirements'])}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,7 @@
+"""
+Runtime helpers shared by several tools.
+
+Tools that import from this package list the modules they need under
+`sharedModules` in their config.json so the build system ships them
+alongside the injected tool code.
+"""
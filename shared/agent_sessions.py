@@ -0,0 +1,163 @@
+"""
+Per-session agents and a concurrency cap for the async agent entrypoint.
+
+A Strands Agent holds its conversation history and refuses to run two
+invocations at once, so one module-level agent serializes every request in
+the process and mixes all callers into one conversation. AgentSessionPool
+keeps one agent per session ID, built by a factory. An agent is evicted
+after AGENT_SESSION_IDLE_TTL seconds without use, or when more than
+AGENT_MAX_SESSIONS are held. Requests for the same session run one at a
+time. Requests for different sessions run concurrently, up to
+AGENT_MAX_CONCURRENCY per process. Requests without a session ID get a
+fresh agent that is not kept.
+
+Strands runs synchronous tools (database_query, send_email, web_search, ...)
+with asyncio.to_thread, i.e. on the event loop's default executor. The pool
+installs a ThreadPoolExecutor with AGENT_TOOL_THREADS workers as that
+default executor, so blocking tool calls from concurrent requests don't
+queue behind the interpreter's small default pool.
+
+Example:
+    sessions = AgentSessionPool(lambda: Agent(model=MODEL_ID))
+    async with sessions.session(context.session_id) as agent:
+        result = await agent.invoke_async(message)
+"""
+import asyncio
+import contextlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Session settings (can be overridden with environment variables)
+AGENT_MAX_CONCURRENCY = int(os.environ.get('AGENT_MAX_CONCURRENCY', '32'))
+AGENT_MAX_SESSIONS = int(os.environ.get('AGENT_MAX_SESSIONS', '256'))
+AGENT_SESSION_IDLE_TTL = float(os.environ.get('AGENT_SESSION_IDLE_TTL', '900'))
+AGENT_TOOL_THREADS = int(os.environ.get('AGENT_TOOL_THREADS', '64'))
+AGENT_QUEUE_TIMEOUT = float(os.environ.get('AGENT_QUEUE_TIMEOUT', '30'))
+
+
+class AgentBusyError(RuntimeError):
+    """Raised when no invocation slot frees up within the queue timeout."""
+
+
+class _Session:
+    __slots__ = ('agent', 'lock', 'last_used', 'active')
+
+    def __init__(self, agent):
+        self.agent = agent
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+        self.active = 0
+
+
+class AgentSessionPool:
+    """
+    Agents keyed by session ID, with a per-process cap on concurrent invocations.
+
+    Must be used from one event loop (the runtime's worker loop).
+    """
+
+    def __init__(self, factory, max_concurrency=AGENT_MAX_CONCURRENCY, max_sessions=AGENT_MAX_SESSIONS,
+                 idle_ttl=AGENT_SESSION_IDLE_TTL, tool_threads=AGENT_TOOL_THREADS,
+                 queue_timeout=AGENT_QUEUE_TIMEOUT):
+        self.max_concurrency = max_concurrency
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.tool_threads = tool_threads
+        self.queue_timeout = queue_timeout
+        self._factory = factory
+        self._sessions = OrderedDict()
+        self._slots = None
+        self._loop = None
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self.stats = {'invocations': 0, 'agents_created': 0, 'evicted': 0, 'rejected': 0, 'active': 0, 'waiting': 0}
+
+    @contextlib.asynccontextmanager
+    async def session(self, session_id=None):
+        """
+        Yield the agent for session_id once a slot and the session are free.
+
+        Raises AgentBusyError if the process stays at max_concurrency for
+        longer than queue_timeout seconds.
+        """
+        slots = self._bind_loop()
+        self.stats['waiting'] += 1
+        try:
+            await asyncio.wait_for(slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.stats['rejected'] += 1
+            raise AgentBusyError(
+                f"Agent is at capacity ({self.max_concurrency} concurrent requests); try again shortly"
+            ) from None
+        finally:
+            self.stats['waiting'] -= 1
+        self.stats['active'] += 1
+        try:
+            session = self._checkout(session_id)
+            try:
+                async with session.lock:
+                    self.stats['invocations'] += 1
+                    yield session.agent
+            finally:
+                session.active -= 1
+                session.last_used = time.monotonic()
+        finally:
+            self.stats['active'] -= 1
+            slots.release()
+
+    def metrics(self):
+        """Return session counts and invocation counters."""
+        return dict(self.stats, sessions=len(self._sessions))
+
+    def close(self):
+        """Drop every session and stop the tool thread pool."""
+        self._sessions.clear()
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def _bind_loop(self):
+        # The semaphore and the default executor belong to the loop serving requests
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.tool_threads, thread_name_prefix='agent-tool')
+                loop.set_default_executor(self._executor)
+        return self._slots
+
+    def _checkout(self, session_id):
+        if session_id is None:
+            session = self._new_session()
+            session.active += 1
+        else:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._new_session()
+                self._sessions[session_id] = session
+            self._sessions.move_to_end(session_id)
+            # Mark the session in use first so eviction can't drop the one being handed out
+            session.active += 1
+            self._evict()
+        return session
+
+    def _new_session(self):
+        self.stats['agents_created'] += 1
+        return _Session(self._factory())
+
+    def _evict(self):
+        """Drop idle sessions past their TTL, then the least recently used over max_sessions."""
+        now = time.monotonic()
+        for session_id, session in list(self._sessions.items()):
+            over_limit = len(self._sessions) > self.max_sessions
+            if not over_limit and now - session.last_used < self.idle_ttl:
+                break
+            if session.active == 0:
+                del self._sessions[session_id]
+                self.stats['evicted'] += 1
@@ -0,0 +1,89 @@
+"""
+Process-wide registry of boto3 clients and resources.
+
+Creating a boto3 client loads botocore service models and resolves
+credentials, which costs tens of milliseconds. Clients are thread-safe, so
+tools and the agent template share one client per (service, region) built
+with tuned connection pool, retry and timeout settings. boto3 itself is
+only imported when the first client is created, so importing this module
+(and the tools that use it) stays cheap.
+
+Example:
+    ses = get_client('ses')
+    table = get_resource('dynamodb').Table('agent-configurations')
+"""
+import os
+import threading
+
+# Client settings (can be overridden with environment variables)
+AWS_REGION = os.environ.get('AWS_REGION', 'us-west-2')
+AWS_MAX_POOL_CONNECTIONS = int(os.environ.get('AWS_MAX_POOL_CONNECTIONS', '25'))
+AWS_MAX_ATTEMPTS = int(os.environ.get('AWS_MAX_ATTEMPTS', '3'))
+AWS_RETRY_MODE = os.environ.get('AWS_RETRY_MODE', 'standard')
+AWS_CONNECT_TIMEOUT = float(os.environ.get('AWS_CONNECT_TIMEOUT', '5'))
+AWS_READ_TIMEOUT = float(os.environ.get('AWS_READ_TIMEOUT', '60'))
+
+_lock = threading.Lock()
+_session = None
+_clients = {}
+_resources = {}
+
+
+def client_config(**overrides):
+    """Return the botocore Config used for every shared client, with optional overrides."""
+    from botocore.config import Config
+
+    settings = {
+        'max_pool_connections': AWS_MAX_POOL_CONNECTIONS,
+        'retries': {'max_attempts': AWS_MAX_ATTEMPTS, 'mode': AWS_RETRY_MODE},
+        'connect_timeout': AWS_CONNECT_TIMEOUT,
+        'read_timeout': AWS_READ_TIMEOUT,
+    }
+    settings.update(overrides)
+    return Config(**settings)
+
+
+def get_client(service, region=None):
+    """Return the shared boto3 client for service in region, creating it on first use."""
+    key = (service, region or AWS_REGION)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    with _lock:
+        if key not in _clients:
+            _clients[key] = _get_session().client(
+                service, region_name=key[1], config=client_config()
+            )
+        return _clients[key]
+
+
+def get_resource(service, region=None):
+    """Return the shared boto3 resource for service in region, creating it on first use."""
+    key = (service, region or AWS_REGION)
+    resource = _resources.get(key)
+    if resource is not None:
+        return resource
+    with _lock:
+        if key not in _resources:
+            _resources[key] = _get_session().resource(
+                service, region_name=key[1], config=client_config()
+            )
+        return _resources[key]
+
+
+def reset():
+    """Forget every cached client and resource (e.g. after rotating credentials)."""
+    global _session
+    with _lock:
+        _clients.clear()
+        _resources.clear()
+        _session = None
+
+
+def _get_session():
+    # boto3 sessions are not thread-safe, so clients are only created under _lock
+    global _session
+    if _session is None:
+        import boto3.session
+        _session = boto3.session.Session()
+    return _session
@@ -0,0 +1,111 @@
+"""
+In-process agent configuration, refreshed from a remote store in the background.
+
+The template compiles its model ID and system prompt in as placeholder
+constants. ConfigCache starts from those values and overlays whatever its
+loader returns (for the template, this agent's item in the
+`agent-configurations` DynamoDB table). A daemon thread reloads it every
+AGENT_CONFIG_TTL seconds. get() only ever reads memory, so the store is
+never on the request path. If a load fails, the last good configuration
+keeps being served and the load is retried with backoff, starting at
+AGENT_CONFIG_RETRY_INTERVAL seconds.
+
+Example:
+    config = ConfigCache(load_item, defaults={'model_id': MODEL_ID})
+    config.start()
+    config.get()['model_id']
+"""
+import logging
+import os
+import threading
+import time
+
+# Refresh settings (can be overridden with environment variables)
+AGENT_CONFIG_TTL = float(os.environ.get('AGENT_CONFIG_TTL', '60'))
+AGENT_CONFIG_RETRY_INTERVAL = float(os.environ.get('AGENT_CONFIG_RETRY_INTERVAL', '5'))
+
+
+class ConfigCache:
+    """
+    Last good configuration, kept current by a background refresher.
+
+    loader() returns a dict of overrides (None values and unknown keys are
+    ignored; an empty dict means "use the defaults") or raises. A ttl of 0
+    disables loading, so get() always returns the defaults.
+    """
+
+    def __init__(self, loader, defaults, ttl=AGENT_CONFIG_TTL, retry_interval=AGENT_CONFIG_RETRY_INTERVAL,
+                 logger=None):
+        self.defaults = dict(defaults)
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self._loader = loader
+        self._logger = logger or logging.getLogger(__name__)
+        self._config = dict(defaults)
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._closed = False
+        self.stats = {'loads': 0, 'load_errors': 0, 'changes': 0, 'last_error': None, 'version': 0}
+
+    def get(self):
+        """Return the current configuration (a dict that must not be modified) without blocking."""
+        if self._thread is None:
+            self.start()
+        return self._config
+
+    def start(self):
+        """Start the background refresher; the first load begins immediately."""
+        with self._lock:
+            if self._thread is not None or self._closed or self.ttl <= 0:
+                return
+            self._thread = threading.Thread(target=self._run, name='config-refresh', daemon=True)
+            self._thread.start()
+
+    def refresh(self):
+        """Load the configuration once. Returns True on success; on failure the last good config is kept."""
+        try:
+            overrides = self._loader() or {}
+        except Exception as e:
+            with self._lock:
+                self.stats['load_errors'] += 1
+                self.stats['last_error'] = str(e)
+            self._logger.warning(f"Config refresh failed, keeping last good config: {str(e)}")
+            return False
+        config = dict(self.defaults)
+        config.update({key: value for key, value in overrides.items() if key in self.defaults and value is not None})
+        with self._lock:
+            self.stats['loads'] += 1
+            self.stats['last_error'] = None
+            self._loaded_at = time.monotonic()
+            if config != self._config:
+                # Replace rather than mutate, so readers never see a half-applied update
+                self._config = config
+                self.stats['changes'] += 1
+                self.stats['version'] += 1
+        return True
+
+    def metrics(self):
+        """Return load counters and the age (seconds) of the served configuration."""
+        with self._lock:
+            metrics = dict(self.stats)
+            loaded_at = self._loaded_at
+        metrics['age_s'] = round(time.monotonic() - loaded_at, 3) if loaded_at is not None else None
+        metrics['stale'] = loaded_at is None or time.monotonic() - loaded_at > self.ttl
+        return metrics
+
+    def close(self):
+        """Stop the background refresher."""
+        self._closed = True
+        self._wake.set()
+
+    def _run(self):
+        failures = 0
+        while not self._closed:
+            if self.refresh():
+                failures, delay = 0, self.ttl
+            else:
+                failures += 1
+                delay = min(self.ttl, self.retry_interval * (2 ** (failures - 1)))
+            self._wake.wait(delay)
@@ -0,0 +1,563 @@
+"""
+Per-tool call metrics: latency, CPU time, payload sizes, cache hits, tokens saved and outcome.
+
+Tools are wrapped with @instrumented (below @tool, so Strands still sees the
+original signature and docstring). Every call is recorded in in-process
+histograms: wall time, CPU time of the calling thread, bytes in (the
+arguments) and bytes out (the result). Counters track outcomes: "ok", "error"
+(the tool returned an "Error..." string) and "exception". Result cache
+lookups made during the call are counted as hits or misses, and output
+shaping (shared/output_shaping.py) adds the tokens it cut from the result.
+Recording takes a lock once per call and adds a few microseconds.
+
+Metrics can be read in three ways:
+    - prometheus_text() returns cumulative metrics in Prometheus text format
+    - emf_documents() returns CloudWatch Embedded Metric Format documents
+      for the calls since the previous export
+    - record_turn() collects a per-turn summary to attach to the usage record
+
+Setting INSTRUMENTATION_PROFILE_TENANTS turns on a sampling profiler for a
+fraction of tool calls made in turns of those tenants. The profiler writes
+folded stacks (flamegraph input) to INSTRUMENTATION_PROFILE_DIR. Use
+set_profiler_hook() to plug in a different profiler.
+
+Example:
+    @tool
+    @instrumented
+    def web_search(query: str) -> str: ...
+
+    with record_turn(tenant_id) as metrics:
+        agent(message)
+    metrics.summary()  # {'web_search': {'calls': 2, 'wall_ms': 812.4, ...}}
+"""
+import bisect
+import contextlib
+import contextvars
+import functools
+import inspect
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, namedtuple
+
+# Instrumentation settings (can be overridden with environment variables)
+INSTRUMENTATION_DISABLED = os.environ.get('INSTRUMENTATION_DISABLED', '').lower() in ('1', 'true', 'yes')
+INSTRUMENTATION_EMF_NAMESPACE = os.environ.get('INSTRUMENTATION_EMF_NAMESPACE', 'AgentTools')
+INSTRUMENTATION_EMF_INTERVAL = float(os.environ.get('INSTRUMENTATION_EMF_INTERVAL', '60'))
+INSTRUMENTATION_PROFILE_TENANTS = {
+    tenant.strip() for tenant in os.environ.get('INSTRUMENTATION_PROFILE_TENANTS', '').split(',') if tenant.strip()
+}
+INSTRUMENTATION_PROFILE_RATE = float(os.environ.get('INSTRUMENTATION_PROFILE_RATE', '0.1'))
+INSTRUMENTATION_PROFILE_INTERVAL = float(os.environ.get('INSTRUMENTATION_PROFILE_INTERVAL', '0.005'))
+INSTRUMENTATION_PROFILE_DIR = os.environ.get('INSTRUMENTATION_PROFILE_DIR', '/tmp/agent-profiles')
+
+# Histogram bucket upper bounds
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+SIZE_BUCKETS_BYTES = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_HISTOGRAMS = (
+    ('wall_ms', 'Wall time per call in milliseconds', 'Milliseconds', LATENCY_BUCKETS_MS),
+    ('cpu_ms', 'CPU time of the calling thread per call in milliseconds', 'Milliseconds', LATENCY_BUCKETS_MS),
+    ('bytes_in', 'Size of the call arguments in bytes', 'Bytes', SIZE_BUCKETS_BYTES),
+    ('bytes_out', 'Size of the result in bytes', 'Bytes', SIZE_BUCKETS_BYTES),
+)
+
+# One finished tool call; the first four fields are the histogram values, in _HISTOGRAMS order
+CallRecord = namedtuple(
+    'CallRecord',
+    ('wall_ms', 'cpu_ms', 'bytes_in', 'bytes_out', 'outcome', 'error_class', 'cache_hits', 'cache_misses', 'tokens_saved')
+)
+
+_CALL = contextvars.ContextVar('tool_call', default=None)
+_TURN = contextvars.ContextVar('tool_turn', default=None)
+
+
+class Histogram:
+    """Fixed-bucket histogram (bucket counts, sum and count)."""
+
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def percentile(self, pct):
+        """Approximate percentile: the upper bound of the bucket holding it."""
+        if not self.count:
+            return None
+        rank = pct / 100.0 * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+
+class _ToolMetrics:
+    __slots__ = ('histograms', 'outcomes', 'error_classes', 'cache_hits', 'cache_misses', 'tokens_saved')
+
+    def __init__(self):
+        self.histograms = {name: Histogram(bounds) for name, _, _, bounds in _HISTOGRAMS}
+        self.outcomes = Counter()
+        self.error_classes = Counter()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.tokens_saved = 0
+
+    def record_many(self, calls):
+        histograms = [(histogram, histogram.counts, histogram.bounds) for histogram in self.histograms.values()]
+        outcomes = self.outcomes
+        for call in calls:
+            for (histogram, counts, bounds), value in zip(histograms, call):
+                counts[bisect.bisect_left(bounds, value)] += 1
+                histogram.sum += value
+            outcomes[call.outcome] += 1
+            if call.error_class:
+                self.error_classes[call.error_class] += 1
+            self.cache_hits += call.cache_hits
+            self.cache_misses += call.cache_misses
+            self.tokens_saved += call.tokens_saved
+        for histogram, _, _ in histograms:
+            histogram.count += len(calls)
+
+    def copy(self):
+        metrics = _ToolMetrics()
+        for name, histogram in self.histograms.items():
+            metrics.histograms[name].counts = list(histogram.counts)
+            metrics.histograms[name].sum = histogram.sum
+            metrics.histograms[name].count = histogram.count
+        metrics.outcomes = Counter(self.outcomes)
+        metrics.error_classes = Counter(self.error_classes)
+        metrics.cache_hits = self.cache_hits
+        metrics.cache_misses = self.cache_misses
+        metrics.tokens_saved = self.tokens_saved
+        return metrics
+
+    def minus(self, previous):
+        """Return the calls recorded since previous (an earlier copy), or None if there were none."""
+        if previous is None:
+            return self.copy() if self.histograms['wall_ms'].count else None
+        if self.histograms['wall_ms'].count == previous.histograms['wall_ms'].count:
+            return None
+        metrics = _ToolMetrics()
+        for name, histogram in self.histograms.items():
+            before = previous.histograms[name]
+            delta = metrics.histograms[name]
+            delta.counts = [count - old for count, old in zip(histogram.counts, before.counts)]
+            delta.sum = histogram.sum - before.sum
+            delta.count = histogram.count - before.count
+        metrics.outcomes = self.outcomes - previous.outcomes
+        metrics.error_classes = self.error_classes - previous.error_classes
+        metrics.cache_hits = self.cache_hits - previous.cache_hits
+        metrics.cache_misses = self.cache_misses - previous.cache_misses
+        metrics.tokens_saved = self.tokens_saved - previous.tokens_saved
+        return metrics
+
+
+class MetricsRegistry:
+    """
+    Process-wide tool metrics.
+
+    Calls are appended to a pending list and folded into the cumulative
+    histograms in batches (or when metrics are read), which keeps the cost
+    on the tool's call path to an append. EMF exports report the difference
+    from the previous export.
+    """
+
+    def __init__(self, fold_batch=256):
+        self.fold_batch = fold_batch
+        self._lock = threading.Lock()
+        self._pending = []
+        self._tools = {}
+        self._exported = {}
+        self.profiles = 0
+
+    def record(self, tool_name, call):
+        with self._lock:
+            self._pending.append((tool_name, call))
+            if len(self._pending) >= self.fold_batch:
+                self._fold()
+
+    def _fold(self):
+        # Called with the lock held
+        pending, self._pending = self._pending, []
+        by_tool = {}
+        for tool_name, call in pending:
+            by_tool.setdefault(tool_name, []).append(call)
+        for tool_name, calls in by_tool.items():
+            tool_metrics = self._tools.get(tool_name)
+            if tool_metrics is None:
+                tool_metrics = self._tools[tool_name] = _ToolMetrics()
+            tool_metrics.record_many(calls)
+
+    def snapshot(self):
+        """Return {tool: {'calls', 'outcomes', 'p50_ms', 'p95_ms', 'p99_ms', ...}} for quick inspection."""
+        with self._lock:
+            self._fold()
+            return {name: _summarize(metrics) for name, metrics in self._tools.items()}
+
+    def prometheus_text(self):
+        """Render cumulative metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            self._fold()
+            tools = sorted(self._tools.items())
+            for name, help_text, _, bounds in _HISTOGRAMS:
+                metric = f'agent_tool_{name}'
+                lines.append(f'# HELP {metric} {help_text}')
+                lines.append(f'# TYPE {metric} histogram')
+                for tool_name, metrics in tools:
+                    histogram = metrics.histograms[name]
+                    cumulative = 0
+                    for bound, count in zip(bounds, histogram.counts):
+                        cumulative += count
+                        lines.append(f'{metric}_bucket{{tool="{tool_name}",le="{bound}"}} {cumulative}')
+                    lines.append(f'{metric}_bucket{{tool="{tool_name}",le="+Inf"}} {histogram.count}')
+                    lines.append(f'{metric}_sum{{tool="{tool_name}"}} {histogram.sum:.3f}')
+                    lines.append(f'{metric}_count{{tool="{tool_name}"}} {histogram.count}')
+            lines.append('# HELP agent_tool_calls_total Tool calls by outcome')
+            lines.append('# TYPE agent_tool_calls_total counter')
+            for tool_name, metrics in tools:
+                for outcome, count in sorted(metrics.outcomes.items()):
+                    lines.append(f'agent_tool_calls_total{{tool="{tool_name}",outcome="{outcome}"}} {count}')
+            lines.append('# HELP agent_tool_errors_total Failed tool calls by error class')
+            lines.append('# TYPE agent_tool_errors_total counter')
+            for tool_name, metrics in tools:
+                for error_class, count in sorted(metrics.error_classes.items()):
+                    label = error_class.replace('\\', '\\\\').replace('"', '\\"')
+                    lines.append(f'agent_tool_errors_total{{tool="{tool_name}",error_class="{label}"}} {count}')
+            lines.append('# HELP agent_tool_cache_lookups_total Result cache lookups made by tool calls')
+            lines.append('# TYPE agent_tool_cache_lookups_total counter')
+            for tool_name, metrics in tools:
+                lines.append(f'agent_tool_cache_lookups_total{{tool="{tool_name}",result="hit"}} {metrics.cache_hits}')
+                lines.append(f'agent_tool_cache_lookups_total{{tool="{tool_name}",result="miss"}} {metrics.cache_misses}')
+            lines.append('# HELP agent_tool_tokens_saved_total Estimated tokens cut from tool results by output shaping')
+            lines.append('# TYPE agent_tool_tokens_saved_total counter')
+            for tool_name, metrics in tools:
+                lines.append(f'agent_tool_tokens_saved_total{{tool="{tool_name}"}} {metrics.tokens_saved}')
+        return '\n'.join(lines) + '\n'
+
+    def emf_documents(self, namespace=INSTRUMENTATION_EMF_NAMESPACE, dimensions=None):
+        """
+        Return one CloudWatch EMF document per tool for the calls since the previous export.
+
+        Histograms are sent as Values/Counts pairs (bucket upper bounds and
+        counts), so CloudWatch can compute percentiles. Extra dimensions
+        (e.g. {'TenantId': ...}) are added to every document.
+        """
+        with self._lock:
+            self._fold()
+            interval = {}
+            for tool_name, metrics in self._tools.items():
+                delta = metrics.minus(self._exported.get(tool_name))
+                if delta is not None:
+                    interval[tool_name] = delta
+                    self._exported[tool_name] = metrics.copy()
+        timestamp = int(time.time() * 1000)
+        documents = []
+        for tool_name, metrics in sorted(interval.items()):
+            dimension_values = dict(dimensions or {}, Tool=tool_name)
+            metric_definitions = []
+            document = dict(dimension_values)
+            for name, _, unit, bounds in _HISTOGRAMS:
+                histogram = metrics.histograms[name]
+                pairs = [
+                    (bound if bound != float('inf') else bounds[-1] * 2, count)
+                    for bound, count in zip(list(bounds) + [float('inf')], histogram.counts) if count
+                ]
+                document[name] = {'Values': [value for value, _ in pairs], 'Counts': [count for _, count in pairs]}
+                metric_definitions.append({'Name': name, 'Unit': unit})
+            for outcome in ('ok', 'error', 'exception'):
+                document[f'calls_{outcome}'] = metrics.outcomes.get(outcome, 0)
+                metric_definitions.append({'Name': f'calls_{outcome}', 'Unit': 'Count'})
+            document['cache_hits'] = metrics.cache_hits
+            document['cache_misses'] = metrics.cache_misses
+            document['tokens_saved'] = metrics.tokens_saved
+            metric_definitions += [
+                {'Name': 'cache_hits', 'Unit': 'Count'},
+                {'Name': 'cache_misses', 'Unit': 'Count'},
+                {'Name': 'tokens_saved', 'Unit': 'Count'},
+            ]
+            document['_aws'] = {
+                'Timestamp': timestamp,
+                'CloudWatchMetrics': [{
+                    'Namespace': namespace,
+                    'Dimensions': [list(dimension_values)],
+                    'Metrics': metric_definitions,
+                }],
+            }
+            documents.append(document)
+        return documents
+
+    def reset(self):
+        with self._lock:
+            self._pending.clear()
+            self._tools.clear()
+            self._exported.clear()
+
+
+REGISTRY = MetricsRegistry()
+
+
+class TurnMetrics:
+    """Tool calls made during one agent turn, summarized for the usage record."""
+
+    def __init__(self, tenant_id=None):
+        self.tenant_id = tenant_id
+        self.profile = tenant_id in INSTRUMENTATION_PROFILE_TENANTS or '*' in INSTRUMENTATION_PROFILE_TENANTS
+        self._lock = threading.Lock()
+        self._tools = {}
+
+    def record(self, tool_name, call):
+        with self._lock:
+            totals = self._tools.get(tool_name)
+            if totals is None:
+                totals = self._tools[tool_name] = {
+                    'calls': 0, 'errors': 0, 'wall_ms': 0.0, 'cpu_ms': 0.0,
+                    'bytes_out': 0, 'cache_hits': 0, 'tokens_saved': 0,
+                }
+            totals['calls'] += 1
+            totals['errors'] += call.outcome != 'ok'
+            totals['wall_ms'] += call.wall_ms
+            totals['cpu_ms'] += call.cpu_ms
+            totals['bytes_out'] += call.bytes_out
+            totals['cache_hits'] += call.cache_hits
+            totals['tokens_saved'] += call.tokens_saved
+
+    def summary(self):
+        """Return {tool: {'calls', 'errors', 'wall_ms', 'cpu_ms', 'bytes_out', 'cache_hits', 'tokens_saved'}}."""
+        with self._lock:
+            return {
+                name: dict(totals, wall_ms=round(totals['wall_ms'], 3), cpu_ms=round(totals['cpu_ms'], 3))
+                for name, totals in self._tools.items()
+            }
+
+
+@contextlib.contextmanager
+def record_turn(tenant_id=None):
+    """Collect the tool calls made in this context (one agent turn) into a TurnMetrics."""
+    metrics = TurnMetrics(tenant_id)
+    _TURN.set(metrics)
+    try:
+        yield metrics
+    finally:
+        # Plain set rather than reset(token): streaming turns may exit in a different context
+        _TURN.set(None)
+
+
+def instrumented(fn):
+    """Record metrics for every call of a tool function (sync or async)."""
+    if INSTRUMENTATION_DISABLED:
+        return fn
+    tool_name = fn.__name__
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            call = _start_call(tool_name, args, kwargs)
+            try:
+                result = await fn(*args, **kwargs)
+            except BaseException as e:
+                _finish_call(tool_name, call, None, e)
+                raise
+            _finish_call(tool_name, call, result, None)
+            return result
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        call = _start_call(tool_name, args, kwargs)
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            _finish_call(tool_name, call, None, e)
+            raise
+        _finish_call(tool_name, call, result, None)
+        return result
+    return wrapper
+
+
+def note_cache_lookup(hit):
+    """Count a result cache lookup against the tool call in progress, if any."""
+    call = _CALL.get()
+    if call is not None:
+        call[0 if hit else 1] += 1
+
+
+def note_tokens_saved(tokens):
+    """Add tokens cut from the result by output shaping to the tool call in progress, if any."""
+    call = _CALL.get()
+    if call is not None and tokens > 0:
+        call[2] += tokens
+
+
+def set_profiler_hook(hook):
+    """
+    Replace the sampling profiler.
+
+    hook(tool_name, thread_id) must return a context manager that profiles
+    the call while it is open; pass None to restore the built-in sampler.
+    """
+    global _profiler_hook
+    _profiler_hook = hook or _StackSampler
+
+
+def prometheus_text():
+    return REGISTRY.prometheus_text()
+
+
+def emf_documents(namespace=INSTRUMENTATION_EMF_NAMESPACE, dimensions=None):
+    return REGISTRY.emf_documents(namespace, dimensions)
+
+
+def start_emf_reporter(interval=INSTRUMENTATION_EMF_INTERVAL, namespace=INSTRUMENTATION_EMF_NAMESPACE, dimensions=None, stream=None):
+    """
+    Write EMF documents as JSON lines every interval seconds from a daemon thread.
+
+    The CloudWatch agent (or Lambda/AgentCore log ingestion) turns each line
+    into metrics. Nothing is written for intervals without tool calls.
+    Returns None without starting a thread when interval is 0.
+    """
+    if interval <= 0:
+        return None
+    def run():
+        while True:
+            time.sleep(interval)
+            out = stream or sys.stdout
+            for document in REGISTRY.emf_documents(namespace, dimensions):
+                out.write(json.dumps(document) + '\n')
+            out.flush()
+
+    thread = threading.Thread(target=run, name='emf-reporter', daemon=True)
+    thread.start()
+    return thread
+
+
+class _StackSampler:
+    """
+    Sampling profiler for one tool call.
+
+    A daemon thread snapshots the calling thread's stack every
+    INSTRUMENTATION_PROFILE_INTERVAL seconds; on exit the folded stacks are
+    written to INSTRUMENTATION_PROFILE_DIR/<tool>-<timestamp>.folded.
+    """
+
+    def __init__(self, tool_name, thread_id):
+        self.tool_name = tool_name
+        self.thread_id = thread_id
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._sample, name='tool-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        if not self.stacks:
+            return False
+        try:
+            os.makedirs(INSTRUMENTATION_PROFILE_DIR, exist_ok=True)
+            path = os.path.join(
+                INSTRUMENTATION_PROFILE_DIR, f'{self.tool_name}-{time.time_ns()}.folded'
+            )
+            with open(path, 'w', encoding='utf-8') as f:
+                for stack, count in self.stacks.most_common():
+                    f.write(f'{stack} {count}\n')
+        except OSError:
+            pass
+        return False
+
+    def _sample(self):
+        while not self._stop.wait(INSTRUMENTATION_PROFILE_INTERVAL):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+                frame = frame.f_back
+            if frames:
+                self.stacks[';'.join(reversed(frames))] += 1
+
+
+_profiler_hook = _StackSampler
+
+
+def _start_call(tool_name, args, kwargs):
+    """Return (started, cpu_started, bytes_in, call counts, context token, profiler) for a new call."""
+    bytes_in = 0
+    for value in (*args, *kwargs.values()):
+        bytes_in += len(value) if isinstance(value, str) else len(str(value))
+    # Cache hits, cache misses and tokens saved, filled in by note_* during the call
+    counts = [0, 0, 0]
+    token = _CALL.set(counts)
+    profiler = None
+    current_turn = _TURN.get()
+    if current_turn is not None and current_turn.profile and random.random() < INSTRUMENTATION_PROFILE_RATE:
+        try:
+            profiler = _profiler_hook(tool_name, threading.get_ident())
+            profiler.__enter__()
+            REGISTRY.profiles += 1
+        except Exception:
+            profiler = None
+    return time.perf_counter(), time.thread_time(), bytes_in, counts, token, profiler
+
+
+def _finish_call(tool_name, call, result, error):
+    started, cpu_started, bytes_in, counts, token, profiler = call
+    wall_ms = (time.perf_counter() - started) * 1000
+    cpu_ms = (time.thread_time() - cpu_started) * 1000
+    if profiler is not None:
+        try:
+            profiler.__exit__(None, None, None)
+        except Exception:
+            pass
+    try:
+        _CALL.reset(token)
+    except ValueError:
+        _CALL.set(None)
+
+    if error is not None:
+        outcome, error_class = 'exception', type(error).__name__
+    elif isinstance(result, str) and result.startswith('Error'):
+        outcome, error_class = 'error', result.split(':', 1)[0][:60]
+    else:
+        outcome, error_class = 'ok', None
+    text = result if isinstance(result, str) else ('' if result is None else str(result))
+    bytes_out = len(text) if text.isascii() else len(text.encode('utf-8'))
+    record = CallRecord(wall_ms, cpu_ms, bytes_in, bytes_out, outcome, error_class, *counts)
+    REGISTRY.record(tool_name, record)
+    current_turn = _TURN.get()
+    if current_turn is not None:
+        current_turn.record(tool_name, record)
+
+
+def _summarize(metrics):
+    wall = metrics.histograms['wall_ms']
+    return {
+        'calls': wall.count,
+        'outcomes': dict(metrics.outcomes),
+        'wall_ms_mean': round(wall.sum / wall.count, 3) if wall.count else None,
+        'p50_ms': wall.percentile(50),
+        'p95_ms': wall.percentile(95),
+        'p99_ms': wall.percentile(99),
+        'cpu_ms_total': round(metrics.histograms['cpu_ms'].sum, 3),
+        'bytes_out_total': int(metrics.histograms['bytes_out'].sum),
+        'cache_hits': metrics.cache_hits,
+        'cache_misses': metrics.cache_misses,
+        'tokens_saved': metrics.tokens_saved,
+    }
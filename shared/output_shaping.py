@@ -0,0 +1,325 @@
+"""
+Token-budget output shaping for tools that return documents and tables.
+
+Everything a tool returns is sent back to the model as input tokens, so
+tools take a max_tokens budget per call and shape their output to fit it,
+instead of cutting it at fixed character or row limits:
+
+    - shape_text() splits markdown into blocks (a heading stays with the
+      block that follows it) and keeps the blocks most relevant to the
+      query (BM25), in document order, with "[...]" where blocks were left
+      out. Without a query it keeps the leading blocks, cutting at block
+      boundaries rather than mid-sentence.
+    - shape_pages() shapes several pages under one budget. Blocks that
+      repeat across pages (navigation, footers, cookie banners) are kept
+      only on the first page they appear on, and the budget is shared so
+      short pages leave room for long ones.
+    - format_table() renders rows as CSV with the header once. Columns with
+      the same value in every row are listed once above the table, long
+      cells are shortened, and rows stop at the budget.
+
+Token counts are estimates (OUTPUT_CHARS_PER_TOKEN characters per token),
+which is close enough for budgeting without a tokenizer dependency. The
+tokens cut from each result are added to the tool call's `tokens_saved`
+metric (see shared/instrumentation.py), and shaping_note() gives a one-line
+notice for the model when a result was cut.
+
+Example:
+    shaped = shape_text(page, max_tokens=1500, query='pricing tiers', pinned=1)
+    return shaped.text + shaping_note(shaped.original_tokens, shaped.tokens, max_tokens)
+"""
+import csv
+import io
+import math
+import os
+import re
+from collections import Counter, namedtuple
+from shared.instrumentation import note_tokens_saved
+
+# Shaping settings (can be overridden with environment variables)
+OUTPUT_CHARS_PER_TOKEN = float(os.environ.get('OUTPUT_CHARS_PER_TOKEN', '4'))
+OUTPUT_BLOCK_TOKENS = int(os.environ.get('OUTPUT_BLOCK_TOKENS', '300'))
+OUTPUT_MAX_CELL_CHARS = int(os.environ.get('OUTPUT_MAX_CELL_CHARS', '200'))
+
+# Bounds for the max_tokens argument of the tools
+OUTPUT_MIN_TOKENS = 100
+OUTPUT_MAX_TOKENS = 32000
+
+# A shaped result: the text, its estimated tokens, and the estimated tokens before shaping
+Shaped = namedtuple('Shaped', ('text', 'tokens', 'original_tokens'))
+
+_GAP = '[...]'
+_TERM_RE = re.compile(r'\w+')
+_SENTENCE_RE = re.compile(r'(?<=[.!?])\s+')
+_STOP_WORDS = frozenset(
+    'a an and are as at be by for from how in is it of on or that the this to was what when where which who '
+    'why with'.split()
+)
+_BM25_K1 = 1.2
+_BM25_B = 0.75
+
+
+def estimate_tokens(text):
+    """Estimate the number of model tokens in text."""
+    return math.ceil(len(text) / OUTPUT_CHARS_PER_TOKEN)
+
+
+def clamp_budget(max_tokens):
+    """Limit a tool's max_tokens argument to [OUTPUT_MIN_TOKENS, OUTPUT_MAX_TOKENS]."""
+    return min(max(OUTPUT_MIN_TOKENS, int(max_tokens)), OUTPUT_MAX_TOKENS)
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Shorten text to about max_tokens, at a word boundary where possible, marking the cut with '…'."""
+    max_chars = int(max_tokens * OUTPUT_CHARS_PER_TOKEN)
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max(0, max_chars - 1)]
+    space = cut.rfind(' ')
+    if space > max_chars // 2:
+        cut = cut[:space]
+    return cut.rstrip() + '…'
+
+
+def split_blocks(markdown):
+    """
+    Split markdown into blocks at blank lines.
+
+    A heading is joined to the block after it, so a kept block keeps its
+    context. Blocks longer than OUTPUT_BLOCK_TOKENS are split between lines,
+    and lines that are still too long between sentences.
+    """
+    paragraphs = [part.strip('\n') for part in re.split(r'\n[ \t]*\n', markdown) if part.strip()]
+    blocks, heading = [], None
+    for paragraph in paragraphs:
+        if heading is not None:
+            paragraph = f"{heading}\n\n{paragraph}"
+            heading = None
+        if paragraph.lstrip().startswith('#') and '\n' not in paragraph:
+            heading = paragraph
+            continue
+        blocks.extend(_split_long(paragraph))
+    if heading is not None:
+        blocks.append(heading)
+    return blocks
+
+
+def _split_long(block):
+    max_chars = OUTPUT_BLOCK_TOKENS * OUTPUT_CHARS_PER_TOKEN
+    if len(block) <= max_chars:
+        return [block]
+    pieces = []
+    for separator, parts in (('\n', block.split('\n')), (' ', _SENTENCE_RE.split(block))):
+        if len(parts) < 2:
+            continue
+        current, size = [], 0
+        for part in parts:
+            if current and size + len(part) > max_chars:
+                pieces.append(separator.join(current))
+                current, size = [], 0
+            current.append(part)
+            size += len(part) + 1
+        pieces.append(separator.join(current))
+        return [piece for text in pieces for piece in _split_long(text)] if len(pieces) > 1 else pieces
+    return pieces or [block]
+
+
+def _terms(text):
+    return [term for term in _TERM_RE.findall(text.lower()) if term not in _STOP_WORDS]
+
+
+def rank_blocks(blocks, query):
+    """BM25 score of each block against query; all zeros when the query has no terms."""
+    query_terms = set(_terms(query or ''))
+    if not query_terms or not blocks:
+        return [0.0] * len(blocks)
+    documents = [Counter(_terms(block)) for block in blocks]
+    lengths = [sum(document.values()) for document in documents]
+    average_length = (sum(lengths) / len(lengths)) or 1.0
+    idf = {}
+    for term in query_terms:
+        frequency = sum(1 for document in documents if term in document)
+        idf[term] = math.log(1 + (len(documents) - frequency + 0.5) / (frequency + 0.5))
+    scores = []
+    for document, length in zip(documents, lengths):
+        score = 0.0
+        for term in query_terms:
+            count = document.get(term)
+            if count:
+                norm = _BM25_K1 * (1 - _BM25_B + _BM25_B * length / average_length)
+                score += idf[term] * count * (_BM25_K1 + 1) / (count + norm)
+        scores.append(score)
+    return scores
+
+
+def _select(blocks, budget, query, pinned, skip=(), partial=True):
+    """
+    Pick blocks to keep within budget and join them in document order.
+
+    The first `pinned` blocks are always kept. The rest are taken by
+    relevance (ties in document order); without query terms they are taken
+    in document order up to the first block that does not fit. The
+    highest-ranked block left out is then shortened to fill what remains of
+    the budget, unless partial is False. Blocks in skip are left out.
+    Returns (text, tokens).
+    """
+    costs = [estimate_tokens(block) + 1 for block in blocks]
+    candidates = [i for i in range(len(blocks)) if i not in skip]
+    keep = {i: blocks[i] for i in candidates[:pinned]}
+    used = sum(costs[i] for i in keep)
+    scores = rank_blocks(blocks, query)
+    ranked = sorted(candidates[pinned:], key=lambda i: (-scores[i], i))
+    left_out = None
+    for i in ranked:
+        # Leave room for the gap markers the output may need
+        if used + costs[i] + 2 <= budget:
+            keep[i] = blocks[i]
+            used += costs[i]
+        else:
+            left_out = i if left_out is None else left_out
+            if not any(scores):
+                break
+    if partial and left_out is not None and budget - used > 20:
+        keep[left_out] = truncate_to_tokens(blocks[left_out], budget - used - 4)
+
+    # Mark where content was left out; dropped repeats are not marked
+    parts, omitted = [], False
+    for i in range(len(blocks)):
+        if i in keep:
+            if omitted:
+                parts.append(_GAP)
+                omitted = False
+            parts.append(keep[i])
+        elif i not in skip:
+            omitted = True
+    if omitted:
+        parts.append(_GAP)
+    text = '\n\n'.join(parts)
+    return text, estimate_tokens(text)
+
+
+def shape_text(text, max_tokens, query='', pinned=0, partial=True):
+    """
+    Fit markdown into max_tokens, keeping the blocks most relevant to query.
+
+    The first `pinned` blocks (for example a title and URL line) are always
+    kept. With partial=False blocks are kept whole or not at all (for
+    records such as search results). Text that already fits is returned
+    unchanged.
+    """
+    original = estimate_tokens(text)
+    if original <= max_tokens:
+        return Shaped(text, original, original)
+    shaped, tokens = _select(split_blocks(text), max_tokens, query, pinned, partial=partial)
+    note_tokens_saved(original - tokens)
+    return Shaped(shaped, tokens, original)
+
+
+def shape_pages(pages, max_tokens, query='', pinned=0):
+    """
+    Fit several pages into max_tokens together.
+
+    Blocks repeated across pages (and within a page) are kept only where
+    they first appear; the first `pinned` blocks of each page are never
+    dropped. The budget is shared out so that pages needing less than an
+    equal share leave the rest to the others. Returns (list of Shaped, in
+    page order, number of repeated blocks dropped).
+    """
+    page_blocks = [split_blocks(page) for page in pages]
+    seen, skips = set(), []
+    for blocks in page_blocks:
+        skip = set()
+        for i, block in enumerate(blocks):
+            if i < pinned:
+                continue
+            key = ' '.join(block.lower().split())
+            if key in seen:
+                skip.add(i)
+            seen.add(key)
+        skips.append(skip)
+    repeated = sum(len(skip) for skip in skips)
+
+    # Estimated the way _select counts, so a page given its full need is not cut
+    needs = [
+        sum(estimate_tokens(block) + 1 for i, block in enumerate(blocks) if i not in skip) + 2
+        for blocks, skip in zip(page_blocks, skips)
+    ]
+    shares = [0] * len(pages)
+    remaining = max_tokens
+    for position, index in enumerate(sorted(range(len(pages)), key=lambda i: needs[i])):
+        shares[index] = min(needs[index], remaining // (len(pages) - position))
+        remaining -= shares[index]
+
+    shaped = []
+    for page, blocks, skip, share in zip(pages, page_blocks, skips, shares):
+        original = estimate_tokens(page)
+        if not skip and original <= share:
+            shaped.append(Shaped(page, original, original))
+            continue
+        text, tokens = _select(blocks, share, query, pinned, skip)
+        shaped.append(Shaped(text, tokens, original))
+    note_tokens_saved(sum(page.original_tokens - page.tokens for page in shaped))
+    return shaped, repeated
+
+
+def shaping_note(original_tokens, tokens, max_tokens, repeated=0):
+    """One line telling the model that output was shaped, or '' if nothing was cut."""
+    if tokens >= original_tokens:
+        return ''
+    note = f"\n\n[Shaped to ~{tokens:,} of ~{original_tokens:,} tokens (max_tokens={max_tokens})"
+    if repeated:
+        note += f"; {repeated} block(s) repeated across pages shown once"
+    return note + ". Call again with a larger max_tokens or a more specific query for other parts.]"
+
+
+def format_table(headers, rows, max_tokens):
+    """
+    Render rows compactly within max_tokens.
+
+    Returns (text, number of rows shown, estimated tokens of the shown rows in
+    the " | " table layout). At least one row is always shown; rows that do
+    not fit are left for the caller to page through.
+    """
+    width = len(headers) or (len(rows[0]) if rows else 0)
+    constant = {}
+    if len(rows) >= 3 and len(headers) > 1:
+        for column, header in enumerate(headers):
+            values = {row[column] for row in rows}
+            if len(values) == 1:
+                constant[column] = f"{header}={next(iter(values))}"
+        if len(constant) == len(headers):
+            constant = {}
+    columns = [column for column in range(width) if column not in constant]
+
+    lines = []
+    if constant:
+        lines.append(f"Same in every row: {', '.join(constant.values())}")
+    if headers:
+        lines.append(_csv_line([headers[column] for column in columns]))
+    used = sum(estimate_tokens(line) + 1 for line in lines)
+    shown = 0
+    for row in rows:
+        line = _csv_line([_shorten_cell(row[column]) for column in columns])
+        cost = estimate_tokens(line) + 1
+        if shown and used + cost > max_tokens:
+            break
+        lines.append(line)
+        used += cost
+        shown += 1
+    text = '\n'.join(lines)
+    header_lines = [' | '.join(headers), '-' * len(' | '.join(headers))] if headers else []
+    original = estimate_tokens('\n'.join(header_lines + [' | '.join(row) for row in rows[:shown]]))
+    note_tokens_saved(original - estimate_tokens(text))
+    return text, shown, original
+
+
+def _shorten_cell(value):
+    if len(value) <= OUTPUT_MAX_CELL_CHARS:
+        return value
+    return value[:OUTPUT_MAX_CELL_CHARS - 1] + '…'
+
+
+def _csv_line(values):
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator='').writerow(values)
+    return buffer.getvalue()
@@ -0,0 +1,343 @@
+"""
+Content-addressed result cache for tools that fetch from the network.
+
+Each tool gets its own named cache with its own TTL. Entries live in an
+in-memory LRU tier bounded by entry count and size, and optionally in a
+SQLite file shared by every cache in the process (and by other processes
+pointing at the same file). Entries that are past their TTL but within the
+stale window are served immediately while a background refresh fetches a
+new value.
+
+Entries can carry tags (for example the tables a query read). Invalidating
+a tag drops every entry stored under it, and a value computed while its
+tags were being invalidated is never stored.
+
+Example:
+    cache = get_cache('web_search', ttl=300)
+    key = make_key('web_search', normalize_query(query), max_results=5)
+    text = cache.get_or_compute(key, lambda: run_search(query))
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from shared.instrumentation import note_cache_lookup
+
+# Defaults (can be overridden with environment variables)
+CACHE_MAX_ENTRIES = int(os.environ.get('TOOL_CACHE_MAX_ENTRIES', '1024'))
+CACHE_MAX_BYTES = int(os.environ.get('TOOL_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+CACHE_DB_PATH = os.environ.get('TOOL_CACHE_DB_PATH', '')
+CACHE_DISABLED = os.environ.get('TOOL_CACHE_DISABLED', '').lower() in ('1', 'true', 'yes')
+
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+_LOOKUP_RESULTS = {'hits': True, 'stale_hits': True, 'misses': False}
+
+
+def normalize_query(query):
+    """Normalize a search query so trivially different spellings share a key."""
+    return ' '.join(query.split()).casefold()
+
+
+def normalize_url(url):
+    """
+    Normalize a URL for cache keys and dedup.
+
+    Lowercases the scheme and host, drops default ports and fragments, sorts
+    query parameters and gives bare hosts a "/" path.
+    """
+    parts = urllib.parse.urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    if parts.username:
+        host = f"{parts.username}@{host}"
+    query = urllib.parse.urlencode(sorted(urllib.parse.parse_qsl(parts.query, keep_blank_values=True)))
+    return urllib.parse.urlunsplit((scheme, host, parts.path or '/', query, ''))
+
+
+def make_key(tool_name, target, **options):
+    """Build a content-addressed key from the normalized target and output-affecting options."""
+    material = json.dumps([tool_name, target, sorted(options.items())], default=str)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class _DiskTier:
+    """SQLite-backed cache tier shared by every ResultCache in the process."""
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            'key TEXT PRIMARY KEY, namespace TEXT, value TEXT, stored_at REAL, expires_at REAL)'
+        )
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, stored_at FROM results WHERE key = ?', (key,)
+            ).fetchone()
+        return row
+
+    def put(self, key, namespace, value, stored_at, expires_at):
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)',
+                (key, namespace, value, stored_at, expires_at)
+            )
+
+    def delete(self, keys):
+        with self._lock:
+            self._conn.executemany('DELETE FROM results WHERE key = ?', [(key,) for key in keys])
+
+    def prune(self, now):
+        with self._lock:
+            self._conn.execute('DELETE FROM results WHERE expires_at < ?', (now,))
+
+
+class ResultCache:
+    """
+    Two-tier TTL cache with LRU eviction and stale-while-revalidate.
+
+    Values are strings (formatted tool output). Thread-safe.
+    """
+
+    def __init__(self, name, ttl, stale_ttl=0, max_entries=CACHE_MAX_ENTRIES,
+                 max_bytes=CACHE_MAX_BYTES, disk=None):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._disk = disk
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._refreshing = set()
+        self._puts = 0
+        # Tag bookkeeping: tag -> keys, key -> tags, and the generation each tag was last invalidated
+        self._tag_keys = {}
+        self._key_tags = {}
+        self._tag_generations = {}
+        self._generation = 0
+        self._cleared_at = 0
+        self.stats = {
+            'hits': 0, 'stale_hits': 0, 'disk_hits': 0, 'misses': 0,
+            'evictions': 0, 'refreshes': 0, 'refresh_errors': 0, 'invalidations': 0,
+        }
+
+    def get_or_compute(self, key, compute, should_cache=None, tags=()):
+        """
+        Return the cached value for key, computing and storing it on a miss.
+
+        Stale values are returned immediately and refreshed in the background.
+        Exceptions from compute propagate and nothing is cached; values for
+        which should_cache(value) is false are returned but not stored.
+        Values are stored under tags so invalidate_tags() can drop them.
+        """
+        if CACHE_DISABLED:
+            return compute()
+
+        entry = self._lookup(key)
+        now = time.time()
+        if entry is not None:
+            value, stored_at = entry
+            age = now - stored_at
+            if age <= self.ttl:
+                self._count('hits')
+                return value
+            if age <= self.ttl + self.stale_ttl:
+                self._count('stale_hits')
+                self._refresh_in_background(key, compute, should_cache, tags)
+                return value
+
+        self._count('misses')
+        generation = self._generation
+        value = compute()
+        if should_cache is None or should_cache(value):
+            self.put(key, value, tags=tags, computed_at=generation)
+        return value
+
+    def get(self, key):
+        """Return the value for key if it is fresh, otherwise None."""
+        if CACHE_DISABLED:
+            return None
+        entry = self._lookup(key)
+        if entry is not None and time.time() - entry[1] <= self.ttl:
+            self._count('hits')
+            return entry[0]
+        self._count('misses')
+        return None
+
+    def put(self, key, value, stored_at=None, tags=(), computed_at=None):
+        """
+        Store value under key in every tier.
+
+        computed_at is the generation observed before the value was computed;
+        the value is dropped if any of its tags were invalidated since then.
+        """
+        stored_at = time.time() if stored_at is None else stored_at
+        if not self._put_memory(key, value, stored_at, tags, computed_at):
+            return
+        if self._disk is not None:
+            try:
+                self._disk.put(key, self.name, value, stored_at, stored_at + self.ttl + self.stale_ttl)
+                self._puts += 1
+                if self._puts % 500 == 0:
+                    self._disk.prune(stored_at)
+            except sqlite3.Error:
+                pass
+
+    def invalidate_tags(self, tags):
+        """Drop every entry stored under any of tags, in every tier."""
+        with self._lock:
+            self._generation += 1
+            keys = set()
+            for tag in tags:
+                self._tag_generations[tag] = self._generation
+                keys.update(self._tag_keys.pop(tag, ()))
+            for key in keys:
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self._bytes -= len(entry[0])
+                self._forget_tags(key)
+            self.stats['invalidations'] += len(keys)
+        if self._disk is not None and keys:
+            try:
+                self._disk.delete(keys)
+            except sqlite3.Error:
+                pass
+
+    def clear(self):
+        """Drop every in-memory entry."""
+        with self._lock:
+            self._generation += 1
+            self._cleared_at = self._generation
+            self.stats['invalidations'] += len(self._entries)
+            self._entries.clear()
+            self._tag_keys.clear()
+            self._key_tags.clear()
+            self._bytes = 0
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        if self._disk is None:
+            return None
+        try:
+            row = self._disk.get(key)
+        except sqlite3.Error:
+            return None
+        if row is None or time.time() - row[1] > self.ttl + self.stale_ttl:
+            return None
+        self._count('disk_hits')
+        self._put_memory(key, row[0], row[1])
+        return row[0], row[1]
+
+    def _put_memory(self, key, value, stored_at, tags=(), computed_at=None):
+        # Returns False when the value was invalidated while it was being computed
+        size = len(value)
+        with self._lock:
+            if computed_at is not None and (
+                self._cleared_at > computed_at
+                or any(self._tag_generations.get(tag, 0) > computed_at for tag in tags)
+            ):
+                return False
+            if size > self.max_bytes:
+                return True
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous[0])
+                self._forget_tags(key)
+            self._entries[key] = (value, stored_at)
+            self._bytes += size
+            if tags:
+                self._key_tags[key] = tuple(tags)
+                for tag in tags:
+                    self._tag_keys.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                evicted_key, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self._forget_tags(evicted_key)
+                self.stats['evictions'] += 1
+        return True
+
+    def _forget_tags(self, key):
+        # Caller holds self._lock
+        for tag in self._key_tags.pop(key, ()):
+            keys = self._tag_keys.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_keys[tag]
+
+    def _refresh_in_background(self, key, compute, should_cache, tags=()):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                generation = self._generation
+                value = compute()
+                if should_cache is None or should_cache(value):
+                    self.put(key, value, tags=tags, computed_at=generation)
+                self._count('refreshes')
+            except Exception:
+                self._count('refresh_errors')
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name=f'{self.name}-cache-refresh', daemon=True).start()
+
+    def _count(self, counter):
+        with self._lock:
+            self.stats[counter] += 1
+        if counter in _LOOKUP_RESULTS:
+            # Attribute the lookup to the instrumented tool call in progress
+            note_cache_lookup(_LOOKUP_RESULTS[counter])
+
+
+_registry_lock = threading.Lock()
+_caches = {}
+_disk_tier = None
+
+
+def get_cache(name, ttl, stale_ttl=0, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES,
+              persistent=True):
+    """
+    Return the process-wide cache for a tool, creating it on first use.
+
+    Persistent caches share the SQLite tier at TOOL_CACHE_DB_PATH when it is
+    set; pass persistent=False to keep a cache in memory only.
+    """
+    global _disk_tier
+    with _registry_lock:
+        if name not in _caches:
+            if CACHE_DB_PATH and _disk_tier is None:
+                try:
+                    _disk_tier = _DiskTier(CACHE_DB_PATH)
+                except sqlite3.Error:
+                    _disk_tier = None
+            _caches[name] = ResultCache(
+                name, ttl, stale_ttl=stale_ttl, max_entries=max_entries,
+                max_bytes=max_bytes, disk=_disk_tier if persistent else None
+            )
+        return _caches[name]
+
+
+def cache_stats():
+    """Return hit/miss counters for every registered cache."""
+    with _registry_lock:
+        return {name: dict(cache.stats) for name, cache in _caches.items()}
@@ -0,0 +1,387 @@
+"""
+Background, batched delivery of usage records to SQS.
+
+The agent template used to call `sqs.send_message` on the request path of
+every invocation. UsageReporter instead queues records in memory and a
+daemon thread sends them with `send_message_batch`. A batch goes out when
+it holds 10 records, or when its oldest record has waited
+USAGE_MAX_BATCH_DELAY seconds.
+
+Failed entries are retried with exponential backoff. Records that still
+can't be sent, or that arrive while the queue is full, are appended to a
+local spill file as JSON lines. The spill file is replayed every
+USAGE_SPILL_REPLAY_INTERVAL seconds, so records go out once SQS accepts
+messages again. Records SQS can never accept (too large, or rejected as a
+sender fault) go to `<spill file>.rejected` instead. Queued records are
+flushed when the interpreter exits.
+
+Usage records are billing data, so they carry message sizes, a SHA-256
+and a short preview rather than the messages themselves (see
+summarize_message). Full transcripts can optionally be offloaded to S3 with
+TranscriptStore; the record then only holds a reference to the object.
+
+Example:
+    reporter = UsageReporter(QUEUE_URL, lambda: get_client('sqs'))
+    reporter.submit({'tenant_id': 't-1', 'total_tokens': 1234})
+    reporter.metrics()  # queue depth, flush latency, sent/retried/spilled counts
+"""
+import atexit
+import hashlib
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+
+# Reporter settings (can be overridden with environment variables)
+USAGE_QUEUE_MAX = int(os.environ.get('USAGE_QUEUE_MAX', '10000'))
+USAGE_MAX_BATCH_DELAY = float(os.environ.get('USAGE_MAX_BATCH_DELAY', '1.0'))
+USAGE_MAX_RETRIES = int(os.environ.get('USAGE_MAX_RETRIES', '4'))
+USAGE_RETRY_BACKOFF = float(os.environ.get('USAGE_RETRY_BACKOFF', '0.2'))
+USAGE_SPILL_PATH = os.environ.get('USAGE_SPILL_PATH', '/tmp/agent-usage-spill.jsonl')
+USAGE_SPILL_REPLAY_INTERVAL = float(os.environ.get('USAGE_SPILL_REPLAY_INTERVAL', '60'))
+USAGE_SHUTDOWN_TIMEOUT = float(os.environ.get('USAGE_SHUTDOWN_TIMEOUT', '5'))
+
+# Record format settings (can be overridden with environment variables)
+USAGE_PREVIEW_CHARS = int(os.environ.get('USAGE_PREVIEW_CHARS', '120'))
+USAGE_TRANSCRIPT_BUCKET = os.environ.get('USAGE_TRANSCRIPT_BUCKET', '')
+USAGE_TRANSCRIPT_PREFIX = os.environ.get('USAGE_TRANSCRIPT_PREFIX', 'transcripts/')
+USAGE_TRANSCRIPT_MAX_PENDING = int(os.environ.get('USAGE_TRANSCRIPT_MAX_PENDING', '100'))
+
+# SQS limits for SendMessageBatch
+SQS_BATCH_MAX_ENTRIES = 10
+SQS_BATCH_MAX_BYTES = 256 * 1024
+
+_STOP = object()
+
+
+class UsageReporter:
+    """
+    Bounded in-memory queue of usage records drained by a background sender.
+
+    submit() never blocks and never raises. The sender thread starts on the
+    first submit, so creating a reporter is free on cold start.
+    """
+
+    def __init__(self, queue_url, client_factory, max_queue=USAGE_QUEUE_MAX,
+                 max_batch_delay=USAGE_MAX_BATCH_DELAY, max_retries=USAGE_MAX_RETRIES,
+                 retry_backoff=USAGE_RETRY_BACKOFF, spill_path=USAGE_SPILL_PATH, logger=None):
+        self.queue_url = queue_url
+        self.max_batch_delay = max_batch_delay
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.spill_path = spill_path
+        self._client_factory = client_factory
+        self._logger = logger or logging.getLogger(__name__)
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        self._carry = None
+        self._last_replay = 0.0
+        self._flush_ms = deque(maxlen=1000)
+        self.stats = {
+            'submitted': 0, 'sent': 0, 'batches': 0, 'retries': 0,
+            'spilled': 0, 'replayed': 0, 'send_errors': 0,
+        }
+
+    def submit(self, record):
+        """Queue a record (a JSON-serializable dict) for delivery. Returns False if it was spilled."""
+        self._count('submitted')
+        self._ensure_started()
+        if not self._closed:
+            try:
+                self._queue.put_nowait(record)
+                return True
+            except queue.Full:
+                pass
+        self._spill([json.dumps(record, default=str)])
+        return False
+
+    def close(self, timeout=USAGE_SHUTDOWN_TIMEOUT):
+        """Flush queued records and stop the sender; whatever is left after timeout is spilled."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is None:
+            return
+        deadline = time.monotonic() + timeout
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        thread.join(max(0.0, deadline - time.monotonic()))
+
+        # The sender didn't finish in time; keep the remaining records on disk
+        leftover = []
+        while True:
+            try:
+                record = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if record is not _STOP:
+                leftover.append(json.dumps(record, default=str))
+        if leftover:
+            self._spill(leftover)
+
+    def metrics(self):
+        """Return queue depth, flush latency (ms) and delivery counters."""
+        with self._lock:
+            samples = sorted(self._flush_ms)
+            metrics = dict(self.stats)
+        metrics['queue_depth'] = self._queue.qsize()
+        metrics['flush_ms_last'] = round(self._flush_ms[-1], 3) if self._flush_ms else None
+        metrics['flush_ms_p50'] = round(samples[len(samples) // 2], 3) if samples else None
+        metrics['flush_ms_p95'] = round(samples[int(len(samples) * 0.95)], 3) if samples else None
+        metrics['flush_ms_max'] = round(samples[-1], 3) if samples else None
+        return metrics
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name='usage-reporter', daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            bodies, stopping = self._next_batch()
+            if bodies:
+                self._send(bodies)
+            if not stopping and time.monotonic() - self._last_replay >= USAGE_SPILL_REPLAY_INTERVAL:
+                self._replay_spill()
+        if self._carry is not None:
+            self._send([self._carry])
+            self._carry = None
+
+    def _next_batch(self):
+        """
+        Collect up to 10 serialized records within the batch size limit.
+
+        Waits at most max_batch_delay after the first record. Returns
+        (bodies, whether the stop sentinel was reached).
+        """
+        bodies, size = [], 0
+        if self._carry is not None:
+            bodies, size = [self._carry], len(self._carry.encode('utf-8'))
+            self._carry = None
+        deadline = time.monotonic() + self.max_batch_delay
+        while len(bodies) < SQS_BATCH_MAX_ENTRIES:
+            try:
+                if bodies:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    record = self._queue.get(timeout=timeout)
+                else:
+                    record = self._queue.get(timeout=USAGE_SPILL_REPLAY_INTERVAL)
+                    deadline = time.monotonic() + self.max_batch_delay
+            except queue.Empty:
+                break
+            if record is _STOP:
+                return bodies, True
+            body = json.dumps(record, default=str)
+            body_size = len(body.encode('utf-8'))
+            if body_size > SQS_BATCH_MAX_BYTES:
+                # Can never be sent; keep it for manual recovery
+                self._spill([body], rejected=True)
+                continue
+            if size + body_size > SQS_BATCH_MAX_BYTES:
+                self._carry = body
+                break
+            bodies.append(body)
+            size += body_size
+        return bodies, False
+
+    def _send(self, bodies):
+        """Send one batch, retrying failed entries with backoff and spilling what still fails."""
+        started = time.perf_counter()
+        pending = [{'Id': str(index), 'MessageBody': body} for index, body in enumerate(bodies)]
+        attempt = 0
+        while pending:
+            try:
+                response = self._client_factory().send_message_batch(QueueUrl=self.queue_url, Entries=pending)
+                failed = {entry['Id']: entry for entry in response.get('Failed', [])}
+            except Exception as e:
+                self._count('send_errors')
+                self._logger.warning(f"Usage batch send failed: {str(e)}")
+                failed = {entry['Id']: {} for entry in pending}
+            self._count('sent', len(pending) - len(failed))
+            unsendable = [entry for entry in pending if failed.get(entry['Id'], {}).get('SenderFault')]
+            pending = [entry for entry in pending if entry['Id'] in failed and entry not in unsendable]
+            if unsendable:
+                self._spill([entry['MessageBody'] for entry in unsendable], rejected=True)
+            if not pending:
+                break
+            attempt += 1
+            if attempt > self.max_retries or self._closed:
+                self._spill([entry['MessageBody'] for entry in pending])
+                break
+            self._count('retries', len(pending))
+            time.sleep(self.retry_backoff * (2 ** (attempt - 1)) * (0.5 + random.random()))
+        with self._lock:
+            self.stats['batches'] += 1
+            self._flush_ms.append((time.perf_counter() - started) * 1000)
+
+    def _spill(self, bodies, rejected=False):
+        path = self.spill_path + '.rejected' if rejected else self.spill_path
+        try:
+            with self._spill_lock, open(path, 'a', encoding='utf-8') as f:
+                for body in bodies:
+                    f.write(body + '\n')
+            self._count('spilled', len(bodies))
+        except OSError as e:
+            self._logger.error(f"Failed to spill {len(bodies)} usage record(s): {str(e)}")
+
+    def _replay_spill(self):
+        """Re-send records from the spill file; anything that fails again is spilled again."""
+        self._last_replay = time.monotonic()
+        replay_path = self.spill_path + '.replay'
+        with self._spill_lock:
+            if not os.path.exists(self.spill_path):
+                return
+            try:
+                os.replace(self.spill_path, replay_path)
+            except OSError:
+                return
+        with open(replay_path, encoding='utf-8') as f:
+            bodies = [line.rstrip('\n') for line in f if line.strip()]
+        os.remove(replay_path)
+        self._count('replayed', len(bodies))
+        batch, size = [], 0
+        for body in bodies:
+            body_size = len(body.encode('utf-8'))
+            if batch and (len(batch) == SQS_BATCH_MAX_ENTRIES or size + body_size > SQS_BATCH_MAX_BYTES):
+                self._send(batch)
+                batch, size = [], 0
+            batch.append(body)
+            size += body_size
+        if batch:
+            self._send(batch)
+
+    def _count(self, counter, amount=1):
+        with self._lock:
+            self.stats[counter] += amount
+
+
+def message_text(message):
+    """
+    Return the text of a message.
+
+    Accepts a plain string or a Strands message dict
+    ({'role': ..., 'content': [{'text': ...}, ...]}); other content blocks
+    (tool use, images) are ignored.
+    """
+    if message is None:
+        return ''
+    if isinstance(message, str):
+        return message
+    if isinstance(message, dict):
+        content = message.get('content', [])
+        if isinstance(content, str):
+            return content
+        return '\n'.join(block['text'] for block in content if isinstance(block, dict) and 'text' in block)
+    return str(message)
+
+
+def summarize_message(message, prefix, preview_chars=USAGE_PREVIEW_CHARS):
+    """
+    Return compact usage record fields describing message.
+
+    The fields are `<prefix>_chars`, `<prefix>_sha256` and, unless
+    preview_chars is 0, `<prefix>_preview` (truncated with an ellipsis).
+    """
+    text = message_text(message)
+    fields = {
+        f'{prefix}_chars': len(text),
+        f'{prefix}_sha256': hashlib.sha256(text.encode('utf-8')).hexdigest(),
+    }
+    if preview_chars > 0:
+        fields[f'{prefix}_preview'] = text if len(text) <= preview_chars else text[:preview_chars] + '…'
+    return fields
+
+
+class TranscriptStore:
+    """
+    Uploads full transcripts to S3 from a background thread pool.
+
+    put() returns the object's s3:// URI immediately. When more than
+    max_pending uploads are outstanding (S3 slow or unreachable), put()
+    drops the transcript and returns None rather than buffering without
+    bound.
+    """
+
+    def __init__(self, bucket, client_factory, prefix=USAGE_TRANSCRIPT_PREFIX,
+                 max_pending=USAGE_TRANSCRIPT_MAX_PENDING, max_workers=2, logger=None):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.max_workers = max_workers
+        self._client_factory = client_factory
+        self._logger = logger or logging.getLogger(__name__)
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+        self.stats = {'uploaded': 0, 'dropped': 0, 'upload_errors': 0}
+
+    def put(self, record_id, tenant_id, transcript):
+        """Schedule an upload of transcript (a JSON-serializable dict); return its URI, or None if dropped."""
+        if not self._slots.acquire(blocking=False):
+            self._count('dropped')
+            return None
+        key = f"{self.prefix}{tenant_id}/{record_id}.json"
+        try:
+            self._get_executor().submit(self._upload, key, transcript)
+        except RuntimeError:
+            # Executor already shut down at interpreter exit
+            self._slots.release()
+            self._count('dropped')
+            return None
+        return f"s3://{self.bucket}/{key}"
+
+    def close(self, timeout=USAGE_SHUTDOWN_TIMEOUT):
+        """Wait for outstanding uploads (up to timeout seconds) and stop the workers."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        worker = threading.Thread(target=executor.shutdown, daemon=True)
+        worker.start()
+        worker.join(timeout)
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    from concurrent.futures import ThreadPoolExecutor
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                        thread_name_prefix='transcript-store')
+                    atexit.register(self.close)
+        return self._executor
+
+    def _upload(self, key, transcript):
+        try:
+            self._client_factory().put_object(
+                Bucket=self.bucket,
+                Key=key,
+                Body=json.dumps(transcript, default=str).encode('utf-8'),
+                ContentType='application/json',
+            )
+            self._count('uploaded')
+        except Exception as e:
+            self._count('upload_errors')
+            self._logger.warning(f"Transcript upload to s3://{self.bucket}/{key} failed: {str(e)}")
+        finally:
+            self._slots.release()
+
+    def _count(self, counter, amount=1):
+        with self._lock:
+            self.stats[counter] += amount
@@ -1,9 +1,16 @@
 from bedrock_agentcore import BedrockAgentCoreApp
 from strands import Agent
-import boto3
+from shared.agent_sessions import AgentSessionPool, AgentBusyError
+from shared.aws_clients import get_client, get_resource
+from shared.config_cache import ConfigCache
+from shared.instrumentation import record_turn, prometheus_text, start_emf_reporter
+from shared.usage_reporter import UsageReporter, TranscriptStore, summarize_message, USAGE_TRANSCRIPT_BUCKET
 from datetime import datetime
+from starlette.responses import PlainTextResponse
+import random
 import uuid
 import json
+import os
 
 app = BedrockAgentCoreApp(debug=True)
 
@@ -14,85 +21,214 @@ AGENT_RUNTIME_ID = 'AGENT_RUNTIME_ID_VALUE'
 MODEL_ID = 'MODEL_ID_VALUE'
 SYSTEM_PROMPT = '''SYSTEM_PROMPT_VALUE'''
 
-# Initialize AWS clients
-sqs = boto3.client('sqs', region_name='us-west-2')
-dynamodb = boto3.resource('dynamodb', region_name='us-west-2')
-config_table = dynamodb.Table('agent-configurations')
+# Request logging settings (can be overridden with environment variables).
+# Every request logs its size; only a sample logs the (truncated) payload.
+LOG_PAYLOAD_SAMPLE_RATE = float(os.environ.get('LOG_PAYLOAD_SAMPLE_RATE', '0.01'))
+LOG_PAYLOAD_MAX_CHARS = int(os.environ.get('LOG_PAYLOAD_MAX_CHARS', '2000'))
+
+# Stream responses unless the payload says otherwise (can be overridden with environment variables)
+STREAM_RESPONSES = os.environ.get('STREAM_RESPONSES', 'false').lower() in ('1', 'true', 'yes')
+
+# Partition key of this agent's item in the configuration table (can be overridden with environment variables)
+AGENT_CONFIG_KEY = os.environ.get('AGENT_CONFIG_KEY', 'agentRuntimeId')
+
+# AWS clients are shared with the injected tools and created on first use,
+# so boto3 stays off the cold-start path until a request needs it
+def get_config_table():
+    """Return the agent configuration table."""
+    return get_resource('dynamodb', region='us-west-2').Table('agent-configurations')
+
+def load_agent_config():
+    """Read this agent's model and system prompt overrides from the configuration table."""
+    item = get_config_table().get_item(Key={AGENT_CONFIG_KEY: AGENT_RUNTIME_ID}).get('Item') or {}
+    return {'model_id': item.get('modelId'), 'system_prompt': item.get('systemPrompt')}
+
+# Runtime configuration starts from the deployed values and is refreshed from
+# DynamoDB in the background, so prompt or model changes need no redeploy
+agent_config = ConfigCache(load_agent_config, {'model_id': MODEL_ID, 'system_prompt': SYSTEM_PROMPT}, logger=app.logger)
+agent_config.start()
+
+# Usage records are sent to SQS in batches by a background thread, off the request path
+usage_reporter = UsageReporter(QUEUE_URL, lambda: get_client('sqs', region='us-west-2'), logger=app.logger)
+
+# Usage records only reference the conversation; full transcripts go to S3 when a bucket is configured
+transcript_store = (
+    TranscriptStore(USAGE_TRANSCRIPT_BUCKET, lambda: get_client('s3', region='us-west-2'), logger=app.logger)
+    if USAGE_TRANSCRIPT_BUCKET else None
+)
+
+# Tool call metrics go to CloudWatch as EMF log lines every INSTRUMENTATION_EMF_INTERVAL
+# seconds, and are served in Prometheus format at /metrics
+start_emf_reporter(dimensions={'TenantId': TENANT_ID})
+
+async def serve_metrics(request):
+    """Serve tool call metrics in the Prometheus text format."""
+    return PlainTextResponse(prometheus_text(), media_type='text/plain; version=0.0.4')
+
+app.add_route('/metrics', serve_metrics, methods=['GET'])
 
 # Tools will be injected here by the build system
 
-# Initialize agent with configuration
-agent = Agent(model=MODEL_ID, system_prompt=SYSTEM_PROMPT)
+# Each session gets its own agent (and conversation history); sessions run
+# concurrently up to AGENT_MAX_CONCURRENCY per process
+def create_agent():
+    """Initialize an agent with configuration for a new session."""
+    config = agent_config.get()
+    return Agent(model=config['model_id'], system_prompt=config['system_prompt'])
+
+def apply_agent_config(agent):
+    """Bring an existing session's agent up to date with the current configuration."""
+    config = agent_config.get()
+    if agent.system_prompt != config['system_prompt']:
+        agent.system_prompt = config['system_prompt']
+    if agent.model.get_config().get('model_id') != config['model_id']:
+        agent.model.update_config(model_id=config['model_id'])
 
-def send_usage_to_sqs(input_tokens, output_tokens, total_tokens, user_message, response_message, tenant_id):
-    """Send token usage metrics to SQS for tracking and billing"""
+agent_sessions = AgentSessionPool(create_agent)
+
+def send_usage_to_sqs(input_tokens, output_tokens, total_tokens, user_message, response_message, tenant_id,
+                      tool_metrics=None):
+    """Queue a compact token usage record for delivery to SQS for tracking and billing"""
     try:
+        record_id = str(uuid.uuid4())
         message_body = {
-            'id': str(uuid.uuid4()),
+            'id': record_id,
+            'schema_version': 2,
             'timestamp': datetime.utcnow().isoformat(),
             'tenant_id': tenant_id,
             'input_tokens': input_tokens,
             'output_tokens': output_tokens,
             'total_tokens': total_tokens,
-            'user_message': user_message,
-            'response_message': response_message
+            **summarize_message(user_message, 'user_message'),
+            **summarize_message(response_message, 'response_message'),
         }
+        if tool_metrics:
+            message_body['tool_metrics'] = tool_metrics
+        if transcript_store is not None:
+            message_body['transcript_ref'] = transcript_store.put(
+                record_id, tenant_id, {'user_message': user_message, 'response_message': response_message}
+            )
         
-        response = sqs.send_message(
-            QueueUrl=QUEUE_URL,
-            MessageBody=json.dumps(message_body)
-        )
-        
-        app.logger.info(f"Sent usage to SQS for tenant {tenant_id}: {input_tokens} input, {output_tokens} output tokens")
+        if usage_reporter.submit(message_body):
+            app.logger.info(f"Queued usage for tenant {tenant_id}: {input_tokens} input, {output_tokens} output tokens")
+        else:
+            app.logger.warning(f"Usage queue full; spilled usage for tenant {tenant_id} to {usage_reporter.spill_path}")
     except Exception as e:
-        app.logger.error(f"Failed to send usage to SQS: {str(e)}")
+        app.logger.error(f"Failed to queue usage for SQS: {str(e)}")
 
 @app.entrypoint
-def invoke(payload):
+async def invoke(payload, context=None):
     """
     Agent entrypoint - handles incoming requests and returns responses.
     
-    Supports tool usage when tools are selected during deployment.
+    Supports tool usage when tools are selected during deployment. Requests
+    are served concurrently; the conversation is kept per runtime session
+    (or per 'session_id' in the payload). With "stream": true in the payload
+    (or STREAM_RESPONSES set), the response is streamed as events.
     """
     # Extract message from payload (supports both 'message' and 'prompt' keys)
     user_message = payload.get("message") or payload.get("prompt", "Hello!")
     
-    app.logger.info(f"Received request from tenant {TENANT_ID}")
-    app.logger.info(f"User message: {user_message}")
-    app.logger.info(f"Full payload: {json.dumps(payload)}")
+    app.logger.info(f"Received request from tenant {TENANT_ID} ({len(str(user_message))} chars)")
+    if LOG_PAYLOAD_SAMPLE_RATE > 0 and random.random() < LOG_PAYLOAD_SAMPLE_RATE:
+        payload_text = json.dumps(payload, default=str)
+        if len(payload_text) > LOG_PAYLOAD_MAX_CHARS:
+            payload_text = payload_text[:LOG_PAYLOAD_MAX_CHARS] + f"... ({len(payload_text)} chars)"
+        app.logger.info(f"Sampled payload: {payload_text}")
+    
+    session_id = getattr(context, 'session_id', None) or payload.get("session_id")
+    
+    if payload.get("stream", STREAM_RESPONSES):
+        return stream_response(user_message, session_id)
     
     try:
-        # Invoke agent (tools are automatically available if injected)
-        result = agent(user_message)
+        # Invoke the session's agent (tools are automatically available if injected)
+        async with agent_sessions.session(session_id) as agent:
+            apply_agent_config(agent)
+            with record_turn(TENANT_ID) as turn_metrics:
+                result = await agent.invoke_async(user_message)
         
         # Extract response
         response_message = result.message
         
         # Send usage metrics to SQS
-        if hasattr(result, 'metrics'):
-            input_tokens = result.metrics.accumulated_usage.get('inputTokens', 0)
-            output_tokens = result.metrics.accumulated_usage.get('outputTokens', 0)
-            total_tokens = result.metrics.accumulated_usage.get('totalTokens', 0)
-            
-            app.logger.info(f"Token usage - Input: {input_tokens}, Output: {output_tokens}, Total: {total_tokens}")
-            
-            send_usage_to_sqs(
-                input_tokens, 
-                output_tokens, 
-                total_tokens, 
-                user_message, 
-                response_message, 
-                TENANT_ID
-            )
-        else:
-            app.logger.warning("No metrics available in result")
+        record_usage(result, user_message, response_message, turn_metrics.summary())
         
         return {"result": response_message}
         
+    except AgentBusyError as e:
+        app.logger.warning(str(e))
+        return {"error": str(e)}
     except Exception as e:
         error_message = f"Error processing request: {str(e)}"
         app.logger.error(error_message)
         return {"error": error_message}
 
+async def stream_response(user_message, session_id):
+    """
+    Stream the agent's turn as events: text deltas and tool progress as they
+    happen, then one 'done' event with the full response.
+    
+    Usage (with the turn's tool call metrics) is sent to SQS once, after the
+    turn completes.
+    """
+    try:
+        result = None
+        tools_started = set()
+        async with agent_sessions.session(session_id) as agent:
+            apply_agent_config(agent)
+            with record_turn(TENANT_ID) as turn_metrics:
+                async for event in agent.stream_async(user_message):
+                    if "data" in event:
+                        yield {"type": "text", "data": event["data"]}
+                    elif "current_tool_use" in event:
+                        tool_use = event["current_tool_use"]
+                        tool_use_id = tool_use.get("toolUseId")
+                        if tool_use_id and tool_use_id not in tools_started:
+                            tools_started.add(tool_use_id)
+                            yield {"type": "tool_use", "tool_use_id": tool_use_id, "name": tool_use.get("name")}
+                    elif "message" in event:
+                        for block in event["message"].get("content", []):
+                            if "toolResult" in block:
+                                tool_result = block["toolResult"]
+                                yield {"type": "tool_result", "tool_use_id": tool_result.get("toolUseId"),
+                                       "status": tool_result.get("status")}
+                    elif "result" in event:
+                        result = event["result"]
+        
+        if result is None:
+            raise RuntimeError("Agent stream ended without a result")
+        record_usage(result, user_message, result.message, turn_metrics.summary())
+        yield {"type": "done", "result": result.message}
+    
+    except AgentBusyError as e:
+        app.logger.warning(str(e))
+        yield {"type": "error", "error": str(e)}
+    except Exception as e:
+        error_message = f"Error processing request: {str(e)}"
+        app.logger.error(error_message)
+        yield {"type": "error", "error": error_message}
+
+def record_usage(result, user_message, response_message, tool_metrics=None):
+    """Log token usage (and per-tool call metrics) for a completed agent turn and queue it for SQS."""
+    if hasattr(result, 'metrics'):
+        input_tokens = result.metrics.accumulated_usage.get('inputTokens', 0)
+        output_tokens = result.metrics.accumulated_usage.get('outputTokens', 0)
+        total_tokens = result.metrics.accumulated_usage.get('totalTokens', 0)
+        
+        app.logger.info(f"Token usage - Input: {input_tokens}, Output: {output_tokens}, Total: {total_tokens}")
+        
+        send_usage_to_sqs(
+            input_tokens,
+            output_tokens,
+            total_tokens,
+            user_message,
+            response_message,
+            TENANT_ID,
+            tool_metrics
+        )
+    else:
+        app.logger.warning("No metrics available in result")
+
 if __name__ == "__main__":
     app.run()
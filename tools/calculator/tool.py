@@ -1,8 +1,121 @@
 from strands import tool
+import ast
+import functools
 import math
-import re
+import os
+from shared.instrumentation import instrumented
+
+# Expression limits and compiled-expression cache size (can be overridden with environment variables)
+CALC_MAX_LENGTH = int(os.environ.get('CALC_MAX_LENGTH', '1000'))
+CALC_MAX_NODES = int(os.environ.get('CALC_MAX_NODES', '500'))
+CALC_MAX_DEPTH = int(os.environ.get('CALC_MAX_DEPTH', '50'))
+CALC_MAX_INT_BITS = int(os.environ.get('CALC_MAX_INT_BITS', '10000'))
+CALC_MAX_ROUND_DIGITS = int(os.environ.get('CALC_MAX_ROUND_DIGITS', '300'))
+CALC_CACHE_SIZE = int(os.environ.get('CALC_CACHE_SIZE', '1024'))
+CALC_BATCH_MAX_ROWS = int(os.environ.get('CALC_BATCH_MAX_ROWS', '1000'))
+
+
+class _ExpressionError(ValueError):
+    """An expression that is not allowed or exceeds the limits."""
+
+
+def _calc_pow(base, exponent, modulus=None):
+    """pow() that refuses integer results larger than CALC_MAX_INT_BITS."""
+    if (modulus is None and type(base) is int and type(exponent) is int
+            and exponent > 0 and abs(base) > 1
+            and math.log2(abs(base)) * exponent >= CALC_MAX_INT_BITS):
+        raise OverflowError(f"integer results are limited to {CALC_MAX_INT_BITS} bits")
+    return pow(base, exponent, modulus)
+
+
+def _calc_mul(left, right):
+    """Multiplication that refuses integer results larger than CALC_MAX_INT_BITS."""
+    if (type(left) is int and type(right) is int
+            and left.bit_length() + right.bit_length() - 1 > CALC_MAX_INT_BITS):
+        raise OverflowError(f"integer results are limited to {CALC_MAX_INT_BITS} bits")
+    return left * right
+
+
+def _check_round_digits(ndigits):
+    # int.__round__ computes 10 ** abs(ndigits) before rounding
+    if ndigits is not None and abs(ndigits) > CALC_MAX_ROUND_DIGITS:
+        raise OverflowError(f"round() digits are limited to {CALC_MAX_ROUND_DIGITS}")
+
+
+def _calc_round(number, ndigits=None):
+    """round() that refuses more than CALC_MAX_ROUND_DIGITS digits either side of the point."""
+    _check_round_digits(ndigits)
+    return round(number, ndigits)
+
+
+_CALC_FUNCTIONS = {
+    'abs': abs, 'round': _calc_round, 'min': min, 'max': max,
+    'sum': sum, 'pow': _calc_pow,
+    'sqrt': math.sqrt, 'sin': math.sin, 'cos': math.cos,
+    'tan': math.tan, 'log': math.log, 'log10': math.log10,
+    'exp': math.exp, 'floor': math.floor, 'ceil': math.ceil,
+}
+_CALC_CONSTANTS = {'pi': math.pi, 'e': math.e}
+_CALC_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow)
+_CALC_NAMESPACE = {
+    '__builtins__': {}, **_CALC_FUNCTIONS, **_CALC_CONSTANTS,
+    '_calc_pow': _calc_pow, '_calc_mul': _calc_mul,
+}
+
+
+def _vector_items(args):
+    # min/max/sum accept either several arguments or one list of them
+    return args[0] if len(args) == 1 and isinstance(args[0], (list, tuple)) else args
+
+
+def _vector_reduce(ufunc):
+    return lambda *args: functools.reduce(ufunc, _vector_items(args))
+
+
+def _vector_float(ufunc):
+    # Integer literals would otherwise be combined in int64, which wraps around silently
+    return lambda *args: ufunc(*args, dtype=float)
+
+
+# Largest magnitude below which float64 holds every integer exactly
+_CALC_EXACT_FLOAT = 2.0 ** 53
+
+
+@functools.lru_cache(maxsize=None)
+def _vector_namespace():
+    """
+    Return (numpy, element-wise equivalent of _CALC_NAMESPACE), or (None, None) without NumPy.
+    
+    NumPy is optional and only imported on the first calculator_batch call.
+    Arithmetic is done in float64, never int64. Rows that come out NaN,
+    infinite, or too large for float64 to hold exactly are re-evaluated with
+    the scalar namespace.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None, None
+    
+    def log(x, base=None):
+        return numpy.log(x) if base is None else numpy.log(x) / numpy.log(base)
+    
+    def round_(x, decimals=0):
+        _check_round_digits(decimals)
+        return numpy.round(x, decimals)
+    
+    return numpy, {
+        '__builtins__': {}, **_CALC_CONSTANTS,
+        'abs': numpy.abs, 'round': round_,
+        'min': _vector_reduce(_vector_float(numpy.minimum)), 'max': _vector_reduce(_vector_float(numpy.maximum)),
+        'sum': _vector_reduce(_vector_float(numpy.add)), 'pow': numpy.float_power,
+        'sqrt': numpy.sqrt, 'sin': numpy.sin, 'cos': numpy.cos,
+        'tan': numpy.tan, 'log': log, 'log10': numpy.log10,
+        'exp': numpy.exp, 'floor': numpy.floor, 'ceil': numpy.ceil,
+        '_calc_pow': numpy.float_power, '_calc_mul': _vector_float(numpy.multiply),
+    }
 
 @tool
+@instrumented
 def calculator(expression: str) -> str:
     """
     Perform mathematical calculations.
@@ -21,38 +134,237 @@ def calculator(expression: str) -> str:
         result = calculator("sqrt(144)")
     """
     try:
-        # Safe evaluation with limited scope
-        allowed_names = {
-            'abs': abs, 'round': round, 'min': min, 'max': max,
-            'sum': sum, 'pow': pow,
-            'sqrt': math.sqrt, 'sin': math.sin, 'cos': math.cos,
-            'tan': math.tan, 'log': math.log, 'log10': math.log10,
-            'exp': math.exp, 'floor': math.floor, 'ceil': math.ceil,
-            'pi': math.pi, 'e': math.e
-        }
-        
-        # Remove any potentially dangerous characters
-        if re.search(r'[^0-9+\-*/().a-z_\s]', expression.lower()):
-            return "Error: Invalid characters in expression. Only numbers, operators (+, -, *, /), parentheses, and math functions are allowed."
+        # Parsed, checked and compiled once per distinct expression
+        code = _compile_expression(expression)
         
         # Evaluate expression
-        result = eval(expression, {"__builtins__": {}}, allowed_names)
+        result = eval(code, _CALC_NAMESPACE)
         
         # Format result
-        if isinstance(result, float):
-            # Round to reasonable precision
-            if result.is_integer():
-                return f"Result: {int(result)}"
-            else:
-                return f"Result: {round(result, 10)}"
+        return f"Result: {_format_result(result)}"
+    
+    except Exception as e:
+        return _error_message(e, expression)
+
+
+@tool
+@instrumented
+def calculator_batch(expression: str, variables: dict[str, list[float] | float]) -> str:
+    """
+    Evaluate one formula over many input values in a single call.
+    
+    Use this instead of calling calculator once per value, e.g. to convert
+    a column of temperatures or project a balance over several rates. The
+    expression uses the same operators and functions as calculator, plus
+    the variable names given in variables. Each variable maps to a list of
+    values (all lists the same length) or to a single value used for every
+    row. Rows are evaluated together with NumPy when it is installed.
+    
+    Args:
+        expression: Formula using the variable names (e.g., "c * 9 / 5 + 32")
+        variables: Input values per variable name (e.g., {"c": [0, 37, 100]})
+    
+    Returns:
+        One result per row, with that row's inputs
+    
+    Example:
+        result = calculator_batch("c * 9 / 5 + 32", {"c": [0, 37, 100]})
+        result = calculator_batch("p * (1 + r / 12) ** (12 * y)", {"p": 1000, "r": [0.03, 0.05], "y": 10})
+    """
+    try:
+        columns, rows = _batch_columns(variables)
+        code = _compile_expression(expression, tuple(sorted(columns)))
+        
+        results = _evaluate_vectorized(code, columns, rows, expression)
+        if results is None:
+            results = [_evaluate_row(code, columns, index, expression) for index in range(rows)]
+        
+        lines = [f"Results for {expression} ({rows} row(s)):"]
+        for index, result in enumerate(results):
+            inputs = ", ".join(f"{name}={_format_result(values[index])}" for name, values in columns.items())
+            lines.append(f"{inputs} -> {result}" if inputs else str(result))
+        return "\n".join(lines)
+    
+    except Exception as e:
+        return _error_message(e, expression)
+
+
+def _batch_columns(variables: dict) -> tuple:
+    """Check variable names and values; return ({name: list of values}, row count)."""
+    if not isinstance(variables, dict):
+        raise _ExpressionError("variables must map variable names to lists of numbers.")
+    for name in variables:
+        if (not isinstance(name, str) or not name.isidentifier() or name.startswith('_')
+                or name in _CALC_FUNCTIONS or name in _CALC_CONSTANTS):
+            raise _ExpressionError(f"Invalid variable name: {name!r}. Use names like x or rate that are not function names.")
+    
+    lengths = {len(values) for values in variables.values() if isinstance(values, (list, tuple))}
+    if len(lengths) > 1:
+        raise _ExpressionError("All variable lists must have the same length.")
+    rows = lengths.pop() if lengths else 1
+    if rows > CALC_BATCH_MAX_ROWS:
+        raise _ExpressionError(f"Too many rows (limit is {CALC_BATCH_MAX_ROWS}).")
+    
+    columns = {}
+    for name, values in variables.items():
+        values = list(values) if isinstance(values, (list, tuple)) else [values] * rows
+        for value in values:
+            if type(value) not in (int, float):
+                raise _ExpressionError(f"Variable {name} must contain only numbers, got {value!r}.")
+        columns[name] = values
+    return columns, rows
+
+
+def _evaluate_vectorized(code, columns: dict, rows: int, expression: str):
+    """
+    Evaluate all rows at once with NumPy; return formatted results, or None to fall back.
+    
+    Rows that come out NaN or infinite (domain errors, division by zero,
+    overflow), or at or above 2**53 where float64 rounds integers, are
+    re-evaluated one at a time so they get the same result or error message
+    as calculator.
+    """
+    numpy, vector_namespace = _vector_namespace()
+    if numpy is None:
+        return None
+    
+    namespace = dict(vector_namespace)
+    try:
+        namespace.update((name, numpy.asarray(values, dtype=float)) for name, values in columns.items())
+        with numpy.errstate(all='ignore'):
+            values = numpy.broadcast_to(eval(code, namespace), (rows,))
+            finite = numpy.isfinite(values) & (numpy.abs(values) < _CALC_EXACT_FLOAT)
+    except Exception:
+        return None
+    
+    results = []
+    for index, (value, ok) in enumerate(zip(values.tolist(), finite.tolist())):
+        results.append(_format_result(value) if ok else _evaluate_row(code, columns, index, expression))
+    return results
+
+
+def _evaluate_row(code, columns: dict, index: int, expression):
+    """Evaluate one row with the scalar namespace and format its result or error."""
+    namespace = dict(_CALC_NAMESPACE)
+    namespace.update((name, values[index]) for name, values in columns.items())
+    try:
+        return _format_result(eval(code, namespace))
+    except Exception as e:
+        return _error_message(e, expression)
+
+
+def _format_result(result) -> str:
+    if isinstance(result, float):
+        # Round to reasonable precision
+        if result.is_integer():
+            return str(int(result))
         else:
-            return f"Result: {result}"
+            return str(round(result, 10))
+    else:
+        return str(result)
             
-    except ZeroDivisionError:
+
+def _error_message(e: Exception, expression) -> str:
+    if isinstance(e, _ExpressionError):
+        return f"Error: {str(e)}"
+    if isinstance(e, ZeroDivisionError):
         return "Error: Division by zero"
-    except SyntaxError:
+    if isinstance(e, OverflowError):
+        return f"Error: Result too large: {str(e)}"
+    if isinstance(e, SyntaxError):
         return f"Error: Invalid syntax in expression: '{expression}'"
-    except NameError as e:
+    if isinstance(e, NameError):
         return f"Error: Unknown function or variable: {str(e)}"
-    except Exception as e:
-        return f"Error calculating expression: {str(e)}"
+    return f"Error calculating expression: {str(e)}"
+
+
+@functools.lru_cache(maxsize=CALC_CACHE_SIZE)
+def _compile_expression(expression: str, variables: tuple = ()):
+    """Parse expression, check it against the whitelist and compile it to a code object."""
+    if len(expression) > CALC_MAX_LENGTH:
+        raise _ExpressionError(f"Expression is too long (limit is {CALC_MAX_LENGTH} characters).")
+    tree = ast.parse(expression.strip(), mode='eval')
+    _check_size(tree)
+    tree = ast.fix_missing_locations(_ExpressionCompiler(variables).visit(tree))
+    return compile(tree, '<calculator>', 'eval')
+
+
+def _check_size(tree):
+    """Reject trees with too many nodes or too deep nesting, without recursing."""
+    nodes = 0
+    stack = [(tree, 1)]
+    while stack:
+        node, depth = stack.pop()
+        nodes += 1
+        if nodes > CALC_MAX_NODES:
+            raise _ExpressionError(f"Expression is too complex (limit is {CALC_MAX_NODES} elements).")
+        if depth > CALC_MAX_DEPTH:
+            raise _ExpressionError(f"Expression is nested too deeply (limit is {CALC_MAX_DEPTH} levels).")
+        stack.extend((child, depth + 1) for child in ast.iter_child_nodes(node))
+
+
+class _ExpressionCompiler(ast.NodeTransformer):
+    """
+    Check an expression AST against the whitelist and add the cost limits.
+    
+    Only numbers, the allowed names and variables, arithmetic operators and
+    calls to the allowed functions are accepted; lists and tuples only as function
+    arguments (e.g. sum([1, 2])). * and ** are routed through _calc_mul and
+    _calc_pow, which cap the size of integer results.
+    """
+    
+    def __init__(self, variables=()):
+        self.variables = set(variables)
+    
+    def generic_visit(self, node):
+        # Anything without a visit_ method below is not allowed
+        raise _ExpressionError(
+            f"Unsupported element in expression: {type(node).__name__}. Only numbers, operators "
+            "(+, -, *, /, //, %, **), parentheses, and math functions are allowed."
+        )
+    
+    def visit_Expression(self, node):
+        node.body = self.visit(node.body)
+        return node
+    
+    def visit_Constant(self, node):
+        if type(node.value) not in (int, float, complex):
+            return self.generic_visit(node)
+        return node
+    
+    def visit_Name(self, node):
+        if node.id not in _CALC_FUNCTIONS and node.id not in _CALC_CONSTANTS and node.id not in self.variables:
+            raise NameError(f"name '{node.id}' is not defined")
+        return node
+    
+    def visit_UnaryOp(self, node):
+        if not isinstance(node.op, (ast.UAdd, ast.USub)):
+            return self.generic_visit(node)
+        node.operand = self.visit(node.operand)
+        return node
+    
+    def visit_BinOp(self, node):
+        if not isinstance(node.op, _CALC_OPERATORS):
+            return self.generic_visit(node)
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        if isinstance(node.op, ast.Pow):
+            return ast.copy_location(ast.Call(ast.Name('_calc_pow', ast.Load()), [left, right], []), node)
+        if isinstance(node.op, ast.Mult):
+            return ast.copy_location(ast.Call(ast.Name('_calc_mul', ast.Load()), [left, right], []), node)
+        node.left, node.right = left, right
+        return node
+    
+    def visit_Call(self, node):
+        if not isinstance(node.func, ast.Name) or node.keywords:
+            return self.generic_visit(node)
+        if node.func.id not in _CALC_FUNCTIONS:
+            raise NameError(f"name '{node.func.id}' is not defined")
+        node.args = [self._visit_argument(arg) for arg in node.args]
+        return node
+    
+    def _visit_argument(self, node):
+        if isinstance(node, (ast.List, ast.Tuple)):
+            node.elts = [self.visit(element) for element in node.elts]
+            return node
+        return self.visit(node)
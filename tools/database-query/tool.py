@@ -1,18 +1,97 @@
 from strands import tool
-import boto3
+import base64
+import hashlib
 import json
+import os
+import re
+from shared.aws_clients import get_client
+from shared.result_cache import get_cache, make_key
+from shared.instrumentation import instrumented
+from shared.output_shaping import clamp_budget, format_table
+
+# TODO: Replace these with your actual ARNs
+# You can also pass these as environment variables or configuration
+DB_RESOURCE_ARN = os.environ.get('DB_RESOURCE_ARN', 'arn:aws:rds:us-west-2:123456789012:cluster:your-db-cluster')
+DB_SECRET_ARN = os.environ.get('DB_SECRET_ARN', 'arn:aws:secretsmanager:us-west-2:123456789012:secret:your-db-secret')
+
+# Upper bound on rows returned per page
+DB_MAX_PAGE_SIZE = 200
+
+# Batch limits: statements per call, and parameter sets sent per BatchExecuteStatement request
+DB_BATCH_MAX_STATEMENTS = 25
+DB_BATCH_CHUNK_SIZE = 500
+
+# Read query cache (can be overridden with environment variables; DB_CACHE_TTL=0 disables it)
+DB_CACHE_TTL = float(os.environ.get('DB_CACHE_TTL', '60'))
+DB_CACHE_MAX_ENTRIES = int(os.environ.get('DB_CACHE_MAX_ENTRIES', '256'))
+DB_CACHE_MAX_BYTES = int(os.environ.get('DB_CACHE_MAX_BYTES', str(16 * 1024 * 1024)))
+
+# Plain SELECT / WITH queries can be wrapped to push the page limit down to the database
+_READ_QUERY_RE = re.compile(r'^\s*(select|with)\b', re.IGNORECASE)
+
+# Errors for valid queries that can't be wrapped in a derived table: duplicate
+# column names (MySQL) and data-modifying WITH clauses (PostgreSQL)
+_DB_WRAP_ERROR_RE = re.compile(r'duplicate column name|must be at the top level', re.IGNORECASE)
+
+# SQL tokens: string literals, dollar-quoted strings, quoted identifiers, comments, words and symbols
+_SQL_TOKEN_RE = re.compile(
+    r"'(?:[^']|'')*'|\$(\w*)\$.*?\$\1\$|\"(?:[^\"]|\"\")*\"|`[^`]*`|\[[^\]]*\]"
+    r"|--[^\n]*|/\*.*?\*/|[\w$]+|\S",
+    re.DOTALL
+)
+# Leading keywords of statements that only read, and data-modifying keywords that
+# can still appear inside them (WITH x AS (UPDATE ...), SELECT ... FOR UPDATE, EXPLAIN ANALYZE DELETE ...)
+_SQL_READ_WORDS = {'select', 'with', 'show', 'explain', 'describe', 'desc'}
+_SQL_MODIFY_WORDS = {'insert', 'update', 'delete', 'merge', 'upsert'}
+# Functions whose results change between calls, so queries using them are never cached
+_SQL_VOLATILE_WORDS = {
+    'now', 'current_timestamp', 'current_date', 'current_time', 'localtime', 'localtimestamp',
+    'sysdate', 'getdate', 'clock_timestamp', 'random', 'rand', 'uuid', 'gen_random_uuid',
+    'uuid_generate_v4', 'nextval', 'last_insert_id',
+}
+# Keywords followed by a table name
+_SQL_TABLE_WORDS = {'from', 'join', 'into', 'update', 'table', 'truncate', 'using'}
+_SQL_TABLE_SKIP_WORDS = {'only', 'lateral', 'if', 'not', 'exists', 'table', 'ignore', 'low_priority'}
+_SQL_CLAUSE_WORDS = {
+    'where', 'join', 'inner', 'left', 'right', 'full', 'cross', 'natural', 'outer', 'on', 'using',
+    'group', 'order', 'having', 'limit', 'offset', 'union', 'intersect', 'except', 'window',
+    'set', 'values', 'returning', 'for', 'fetch', 'select', 'as',
+}
+
+_DB_CACHE = get_cache(
+    'database_query', DB_CACHE_TTL, max_entries=DB_CACHE_MAX_ENTRIES,
+    max_bytes=DB_CACHE_MAX_BYTES, persistent=False
+)
+
 
 @tool
-def database_query(sql: str, database: str = "default") -> str:
+@instrumented
+def database_query(
+    sql: str,
+    database: str = "default",
+    max_rows: int = 20,
+    page_token: str = "",
+    max_tokens: int = 2000
+) -> str:
     """
     Query a database using SQL via AWS RDS Data API.
     
     This tool allows the agent to execute SQL queries against
-    configured databases using AWS RDS Data API.
+    configured databases using AWS RDS Data API. Results of SELECT
+    queries are returned one page at a time, as compact CSV; a page
+    ends at max_rows or when max_tokens is reached, and when more rows
+    are available the output includes a page_token for the next page.
+    Use ORDER BY when paging; without it the database may return rows
+    in a different order for each page. Repeated SELECT queries are served from a short-lived cache that
+    is cleared for a table whenever a statement run through these
+    tools writes to it.
     
     Args:
         sql: SQL query to execute
         database: Database name (default: "default")
+        max_rows: Maximum number of rows to return in this page (default: 20, max: 200)
+        page_token: Token from a previous call to fetch the next page of the same query (default: none)
+        max_tokens: Approximate size limit of the page in tokens (default: 2000, max: 32000)
         
     Returns:
         Query results as formatted text
@@ -20,6 +99,7 @@ def database_query(sql: str, database: str = "default") -> str:
     Example:
         result = database_query("SELECT * FROM users LIMIT 10")
         result = database_query("SELECT COUNT(*) FROM orders", database="analytics")
+        result = database_query("SELECT * FROM orders", page_token="eyJvIjogMjB9")
     
     Note:
         Requires AWS RDS Data API to be configured with appropriate
@@ -27,71 +107,550 @@ def database_query(sql: str, database: str = "default") -> str:
         before using this tool.
     """
     try:
-        # Initialize RDS Data API client
-        rds_client = boto3.client('rds-data', region_name='us-west-2')
-        
-        # TODO: Replace these with your actual ARNs
-        # You can also pass these as environment variables or configuration
-        resource_arn = 'arn:aws:rds:us-west-2:123456789012:cluster:your-db-cluster'
-        secret_arn = 'arn:aws:secretsmanager:us-west-2:123456789012:secret:your-db-secret'
-        
-        # Execute SQL statement
-        response = rds_client.execute_statement(
-            resourceArn=resource_arn,
-            secretArn=secret_arn,
-            database=database,
-            sql=sql
-        )
-        
-        # Check if query returned records
-        records = response.get('records', [])
-        column_metadata = response.get('columnMetadata', [])
+        # Get the shared RDS Data API client
+        rds_client = get_client('rds-data', region='us-west-2')
         
-        if not records:
-            rows_updated = response.get('numberOfRecordsUpdated', 0)
-            if rows_updated > 0:
-                return f"Query executed successfully. {rows_updated} row(s) affected."
-            else:
-                return "Query executed successfully. No results returned."
-        
-        # Format results as table
-        result_text = f"Query returned {len(records)} row(s):\n\n"
+        # Limit max_rows and max_tokens to reasonable ranges
+        max_rows = min(max(1, max_rows), DB_MAX_PAGE_SIZE)
+        max_tokens = clamp_budget(max_tokens)
+        offset = _decode_page_token(page_token, sql, database) if page_token else 0
         
-        # Add column headers
-        if column_metadata:
-            headers = [col.get('label', col.get('name', f'col_{i}')) 
-                      for i, col in enumerate(column_metadata)]
-            result_text += " | ".join(headers) + "\n"
-            result_text += "-" * (len(" | ".join(headers))) + "\n"
+        statement = sql.strip().rstrip(';').strip()
+        tokens = _sql_tokens(statement)
+        # Statements that may write (e.g. WITH x AS (UPDATE ... RETURNING ...) SELECT ...)
+        # are never cached or paged, and clear the cached reads of what they touch
+        if _READ_QUERY_RE.match(statement) and _is_read_statement(tokens):
+            # Only fetch this page (plus one row to tell whether there is another)
+            if DB_CACHE_TTL > 0 and _is_cacheable_read(tokens):
+                key = make_key('database_query', " ".join(tokens), database=database,
+                               max_rows=max_rows, offset=offset, max_tokens=max_tokens)
+                return _DB_CACHE.get_or_compute(
+                    key,
+                    lambda: _query_page(rds_client, statement, sql, database, max_rows, offset, max_tokens),
+                    tags=_referenced_tables(tokens)
+                )
+            return _query_page(rds_client, statement, sql, database, max_rows, offset, max_tokens)
         
-        # Add rows (limit to first 20 for readability)
-        for i, record in enumerate(records[:20], 1):
-            row_values = []
-            for field in record:
-                # Extract value from field (handles different data types)
-                if 'stringValue' in field:
-                    row_values.append(field['stringValue'])
-                elif 'longValue' in field:
-                    row_values.append(str(field['longValue']))
-                elif 'doubleValue' in field:
-                    row_values.append(str(field['doubleValue']))
-                elif 'booleanValue' in field:
-                    row_values.append(str(field['booleanValue']))
-                elif 'isNull' in field and field['isNull']:
-                    row_values.append('NULL')
-                else:
-                    row_values.append(str(field))
-            
-            result_text += " | ".join(row_values) + "\n"
+        if page_token:
+            # Fetching another page would run the statement again
+            raise ValueError("page_token only applies to SELECT queries. The statement was not run again.")
         
-        if len(records) > 20:
-            result_text += f"\n... and {len(records) - 20} more row(s)"
+        # Execute SQL statement
+        try:
+            response = rds_client.execute_statement(
+                resourceArn=DB_RESOURCE_ARN,
+                secretArn=DB_SECRET_ARN,
+                database=database,
+                sql=sql,
+                includeResultMetadata=True
+            )
+        finally:
+            _invalidate_cached_reads([sql])
         
-        return result_text
+        # Rows returned by a write (e.g. INSERT ... RETURNING) are not paged
+        return _format_statement_result(response, max_rows, 0, None, database, max_tokens)
         
+    except ValueError as e:
+        return f"Error: {str(e)}"
     except rds_client.exceptions.BadRequestException as e:
         return f"Invalid SQL query: {str(e)}"
     except rds_client.exceptions.StatementTimeoutException:
         return "Query timed out. Try simplifying your query or adding appropriate indexes."
     except Exception as e:
         return f"Error executing database query: {str(e)}\n\nNote: Ensure RDS Data API is configured with correct resource and secret ARNs."
+
+
+@tool
+@instrumented
+def database_query_batch(
+    statements: list[str] | None = None,
+    sql: str = "",
+    parameter_sets: list[dict] | None = None,
+    database: str = "default",
+    transaction: bool = False,
+    max_rows: int = 20,
+    max_tokens: int = 4000
+) -> str:
+    """
+    Run several SQL statements, or one statement with many parameter sets, in one call.
+    
+    Use this instead of calling database_query repeatedly for related
+    statements. Either pass a list of statements, which are executed in
+    order, or a single parameterized statement with a list of parameter
+    sets, which is sent with BatchExecuteStatement (for example bulk
+    inserts). With transaction=True everything is committed together, or
+    rolled back if any statement fails.
+    
+    Args:
+        statements: SQL statements to execute in order (up to 25)
+        sql: A single parameterized statement using :name placeholders, used with parameter_sets
+        parameter_sets: One dict of placeholder values per execution of sql, e.g. [{"id": 1, "name": "a"}]
+        database: Database name (default: "default")
+        transaction: Run everything in a single transaction (default: False)
+        max_rows: Maximum number of rows shown per statement result (default: 20, max: 200)
+        max_tokens: Approximate size limit of the output in tokens, shared by the statements (default: 4000, max: 32000)
+    
+    Returns:
+        The result of each statement, or a summary of the batch execution
+    
+    Example:
+        result = database_query_batch(statements=["SELECT COUNT(*) FROM users", "SELECT COUNT(*) FROM orders"])
+        result = database_query_batch(
+            sql="INSERT INTO tags (id, name) VALUES (:id, :name)",
+            parameter_sets=[{"id": 1, "name": "red"}, {"id": 2, "name": "blue"}],
+            transaction=True
+        )
+    """
+    transaction_id = None
+    written = []
+    try:
+        # Get the shared RDS Data API client
+        rds_client = get_client('rds-data', region='us-west-2')
+        max_rows = min(max(1, max_rows), DB_MAX_PAGE_SIZE)
+        max_tokens = clamp_budget(max_tokens)
+        
+        if statements and (sql or parameter_sets):
+            return "Error: Pass either statements or sql with parameter_sets, not both."
+        if not statements and not (sql and parameter_sets):
+            return "Error: Pass a list of statements, or sql together with parameter_sets."
+        if statements and len(statements) > DB_BATCH_MAX_STATEMENTS:
+            return f"Error: At most {DB_BATCH_MAX_STATEMENTS} statements can be run in one batch."
+        
+        # Cached reads of the tables these statements write to are dropped once the batch is done
+        written = statements or [sql]
+        if transaction:
+            transaction_id = rds_client.begin_transaction(
+                resourceArn=DB_RESOURCE_ARN,
+                secretArn=DB_SECRET_ARN,
+                database=database
+            )['transactionId']
+        
+        if statements:
+            output_parts, failed = _execute_statements(
+                rds_client, statements, database, max_rows, clamp_budget(max_tokens // len(statements)), transaction_id
+            )
+        else:
+            output_parts, failed = _execute_parameter_sets(rds_client, sql, parameter_sets, database, transaction_id)
+        
+        if transaction_id:
+            if failed:
+                _rollback(rds_client, transaction_id)
+                output_parts.append("Transaction rolled back; no changes were saved.")
+            else:
+                rds_client.commit_transaction(
+                    resourceArn=DB_RESOURCE_ARN,
+                    secretArn=DB_SECRET_ARN,
+                    transactionId=transaction_id
+                )
+                output_parts.append("Transaction committed.")
+        
+        return "\n\n".join(output_parts)
+    
+    except Exception as e:
+        if transaction_id:
+            _rollback(rds_client, transaction_id)
+        return f"Error executing database batch: {str(e)}\n\nNote: Ensure RDS Data API is configured with correct resource and secret ARNs."
+    finally:
+        _invalidate_cached_reads(written)
+
+
+def _execute_statements(
+    rds_client, statements: list, database: str, max_rows: int, max_tokens: int, transaction_id
+) -> tuple:
+    """
+    Execute statements in order and format each result.
+    
+    Inside a transaction execution stops at the first failure; otherwise the
+    remaining statements still run. Returns (output parts, whether any failed).
+    """
+    output_parts = []
+    failed = False
+    for index, statement in enumerate(statements, 1):
+        request = {
+            'resourceArn': DB_RESOURCE_ARN,
+            'secretArn': DB_SECRET_ARN,
+            'database': database,
+            'sql': statement,
+            'includeResultMetadata': True,
+        }
+        if transaction_id:
+            request['transactionId'] = transaction_id
+        try:
+            response = rds_client.execute_statement(**request)
+            result = _format_statement_result(response, max_rows, 0, None, database, max_tokens).rstrip()
+        except Exception as e:
+            failed = True
+            result = f"Failed: {str(e)}"
+        output_parts.append(f"### Statement {index}: {statement}\n{result}")
+        if failed and transaction_id:
+            skipped = len(statements) - index
+            if skipped:
+                output_parts.append(f"Skipped the remaining {skipped} statement(s).")
+            break
+    return output_parts, failed
+
+
+def _execute_parameter_sets(rds_client, sql: str, parameter_sets: list, database: str, transaction_id) -> tuple:
+    """
+    Execute sql once per parameter set with BatchExecuteStatement, in chunks.
+    
+    Returns (output parts, whether any chunk failed).
+    """
+    executed = 0
+    generated = []
+    for start in range(0, len(parameter_sets), DB_BATCH_CHUNK_SIZE):
+        chunk = parameter_sets[start:start + DB_BATCH_CHUNK_SIZE]
+        request = {
+            'resourceArn': DB_RESOURCE_ARN,
+            'secretArn': DB_SECRET_ARN,
+            'database': database,
+            'sql': sql,
+            'parameterSets': [_sql_parameters(parameters) for parameters in chunk],
+        }
+        if transaction_id:
+            request['transactionId'] = transaction_id
+        try:
+            response = rds_client.batch_execute_statement(**request)
+        except Exception as e:
+            summary = f"Batch failed after {executed} of {len(parameter_sets)} parameter set(s): {str(e)}"
+            return [summary], True
+        executed += len(chunk)
+        for update in response.get('updateResults', []):
+            fields = update.get('generatedFields') or []
+            if fields:
+                generated.append(", ".join(_field_value(field) for field in fields))
+    
+    output_parts = [f"Batch executed successfully for {executed} parameter set(s)."]
+    if generated:
+        shown = generated[:DB_MAX_PAGE_SIZE]
+        output_parts.append("Generated values:\n" + "\n".join(shown))
+        if len(generated) > len(shown):
+            output_parts.append(f"... and {len(generated) - len(shown)} more")
+    return output_parts, False
+
+
+def _sql_parameters(parameters: dict) -> list:
+    """Convert a dict of placeholder values to Data API SqlParameter entries."""
+    return [{'name': name, 'value': _sql_field(value)} for name, value in parameters.items()]
+
+
+def _sql_field(value) -> dict:
+    """Convert a Python value to a typed Data API field."""
+    if value is None:
+        return {'isNull': True}
+    if isinstance(value, bool):
+        return {'booleanValue': value}
+    if isinstance(value, int):
+        return {'longValue': value}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    if isinstance(value, str):
+        return {'stringValue': value}
+    return {'stringValue': json.dumps(value)}
+
+
+def _rollback(rds_client, transaction_id: str):
+    try:
+        rds_client.rollback_transaction(
+            resourceArn=DB_RESOURCE_ARN,
+            secretArn=DB_SECRET_ARN,
+            transactionId=transaction_id
+        )
+    except Exception:
+        # The transaction times out on the server if the rollback can't be sent
+        pass
+
+
+def _sql_tokens(sql: str) -> list:
+    """Split sql into tokens, dropping comments, so formatting differences don't matter."""
+    return [
+        match.group(0) for match in _SQL_TOKEN_RE.finditer(sql)
+        if not match.group(0).startswith(('--', '/*'))
+    ]
+
+
+def _sql_words(tokens: list) -> set:
+    return {token.lower() for token in tokens if token[0].isalpha() or token[0] == '_'}
+
+
+def _is_read_statement(tokens: list) -> bool:
+    """
+    True for a single statement that only reads.
+    
+    The statement must start with a read keyword. It must not modify data
+    at the top level (SELECT ... INTO, FOR UPDATE, WITH ... INSERT) or at
+    the start of a parenthesized statement (a data-modifying CTE). String
+    literals and quoted identifiers are single tokens, so their contents
+    never count.
+    """
+    while tokens and tokens[-1] == ';':
+        tokens = tokens[:-1]
+    if not tokens or tokens[0].lower() not in _SQL_READ_WORDS:
+        return False
+    depth, previous = 0, None
+    for token in tokens[1:]:
+        word = token.lower()
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth -= 1
+        elif token == ';':
+            # Several statements
+            return False
+        elif word in _SQL_MODIFY_WORDS and (depth == 0 or previous == '('):
+            return False
+        elif word == 'into' and depth == 0:
+            return False
+        previous = token
+    return True
+
+
+def _is_cacheable_read(tokens: list) -> bool:
+    """True for SELECT / WITH queries that neither write nor call volatile functions."""
+    return (
+        bool(tokens) and tokens[0].lower() in ('select', 'with')
+        and _is_read_statement(tokens) and not _sql_words(tokens) & _SQL_VOLATILE_WORDS
+    )
+
+
+def _referenced_tables(tokens: list) -> set:
+    """
+    Return the unqualified, lowercased names of the tables a statement refers to.
+    
+    Schema prefixes are dropped so a write to "public.users" also clears
+    cached reads of "users". The result may include CTE names and aliases,
+    which only ever cause extra invalidation.
+    """
+    tables = set()
+    i = 0
+    while i < len(tokens):
+        word = tokens[i].lower()
+        i += 1
+        if word not in _SQL_TABLE_WORDS:
+            continue
+        while True:
+            while i < len(tokens) and tokens[i].lower() in _SQL_TABLE_SKIP_WORDS:
+                i += 1
+            name, i = _read_table_name(tokens, i)
+            if name is None:
+                break
+            tables.add(name)
+            if word != 'from':
+                break
+            # FROM a [AS] x, b [AS] y: skip the alias and continue after a comma
+            if i < len(tokens) and tokens[i].lower() == 'as':
+                i += 2
+            elif i < len(tokens) and tokens[i][0].isalpha() and tokens[i].lower() not in _SQL_CLAUSE_WORDS:
+                i += 1
+            if i < len(tokens) and tokens[i] == ',':
+                i += 1
+            else:
+                break
+    return tables
+
+
+def _read_table_name(tokens: list, i: int) -> tuple:
+    """Read a possibly schema-qualified name at tokens[i]; return (last part or None, next index)."""
+    name = None
+    while i < len(tokens):
+        token = tokens[i]
+        if not (token[0].isalnum() or token[0] in '_"`['):
+            break
+        name = token.strip('"`[]').lower()
+        i += 1
+        if i < len(tokens) and tokens[i] == '.':
+            i += 1
+        else:
+            break
+    return name, i
+
+
+def _invalidate_cached_reads(statements: list):
+    """Drop cached reads of every table the given statements may have written to."""
+    tables = set()
+    for statement in statements:
+        tokens = _sql_tokens(statement)
+        if not tokens:
+            continue
+        if _is_read_statement(tokens):
+            continue
+        written = _referenced_tables(tokens)
+        if not written:
+            # Can't tell what this statement touches (e.g. a procedure call), so drop everything
+            _DB_CACHE.clear()
+            return
+        tables |= written
+    if tables:
+        _DB_CACHE.invalidate_tags(tables)
+
+
+def _query_page(
+    rds_client, statement: str, sql: str, database: str, max_rows: int, offset: int, max_tokens: int
+) -> str:
+    """
+    Run a read query with the page limit pushed down and format the page.
+    
+    Queries the database won't accept as a derived table (e.g. duplicate
+    column names on MySQL) are run as written, and the page is cut from
+    the full result instead. Other errors are raised as they are.
+    """
+    paged_sql = f"SELECT * FROM ({statement}) AS _page LIMIT {max_rows + 1} OFFSET {offset}"
+    try:
+        response = rds_client.execute_statement(
+            resourceArn=DB_RESOURCE_ARN,
+            secretArn=DB_SECRET_ARN,
+            database=database,
+            sql=paged_sql,
+            includeResultMetadata=True,
+            formatRecordsAs='JSON'
+        )
+    except rds_client.exceptions.BadRequestException as e:
+        if not _DB_WRAP_ERROR_RE.search(str(e)):
+            raise
+        response = rds_client.execute_statement(
+            resourceArn=DB_RESOURCE_ARN,
+            secretArn=DB_SECRET_ARN,
+            database=database,
+            sql=statement,
+            includeResultMetadata=True
+        )
+        headers = _column_labels(response.get('columnMetadata', []))
+        records = response.get('records', [])[offset:offset + max_rows + 1]
+        rows = [[_field_value(field) for field in record] for record in records]
+        return _format_query_page(headers, rows, max_rows, offset, sql, database, max_tokens)
+    
+    headers = _column_labels(response.get('columnMetadata', []))
+    if len(set(headers)) != len(headers):
+        # JSON objects can't hold duplicate column names, so use typed records instead
+        response = rds_client.execute_statement(
+            resourceArn=DB_RESOURCE_ARN,
+            secretArn=DB_SECRET_ARN,
+            database=database,
+            sql=paged_sql,
+            includeResultMetadata=True
+        )
+        rows = [[_field_value(field) for field in record] for record in response.get('records', [])]
+    else:
+        rows = [
+            [_json_value(record.get(header)) for header in headers]
+            for record in json.loads(response.get('formattedRecords') or '[]')
+        ]
+    return _format_query_page(headers, rows, max_rows, offset, sql, database, max_tokens)
+
+
+def _format_query_page(
+    headers: list, rows: list, max_rows: int, offset: int, sql: str, database: str, max_tokens: int
+) -> str:
+    """Format one page of a read query, or say that it has no (more) rows."""
+    if not rows:
+        if offset:
+            return "No more rows. This query has no further pages."
+        return "Query executed successfully. No results returned."
+    return _format_page(headers, rows, max_rows, offset, sql, database, max_tokens)
+
+
+def _format_statement_result(response: dict, max_rows: int, offset: int, sql, database: str, max_tokens: int) -> str:
+    """Format an ExecuteStatement response with typed records."""
+    # Check if query returned records
+    records = response.get('records', [])
+    column_metadata = response.get('columnMetadata', [])
+    
+    if not records:
+        rows_updated = response.get('numberOfRecordsUpdated', 0)
+        if rows_updated > 0:
+            return f"Query executed successfully. {rows_updated} row(s) affected."
+        else:
+            return "Query executed successfully. No results returned."
+    
+    headers = _column_labels(column_metadata)
+    rows = [[_field_value(field) for field in record] for record in records[offset:offset + max_rows + 1]]
+    return _format_page(headers, rows, max_rows, offset, sql, database, max_tokens)
+
+
+def _format_page(headers: list, rows: list, max_rows: int, offset: int, sql, database: str, max_tokens: int) -> str:
+    """
+    Format one page of rows as a compact table.
+    
+    rows may hold one row more than max_rows, which signals that another
+    page is available. The page also ends early at max_tokens, and the rows
+    left out start the next page. A page_token for it is included when sql
+    is given; without sql (statements that must not run twice) the output
+    only says that it was truncated.
+    """
+    table, shown, _ = format_table(headers, rows[:max_rows], max_tokens)
+    has_more = len(rows) > shown
+    rows = rows[:shown]
+    
+    if offset or has_more:
+        first = offset + 1
+        status = (" (more rows available):" if sql is not None else " (output truncated):") if has_more else ":"
+        lines = [f"Query returned rows {first}-{offset + len(rows)}" + status, ""]
+    else:
+        lines = [f"Query returned {len(rows)} row(s):", ""]
+    
+    lines.append(table)
+    
+    if has_more and sql is not None:
+        token = _encode_page_token(offset + len(rows), sql, database)
+        lines.append("")
+        lines.append(f'... more rows available. To get the next page, call database_query again with the same sql and page_token="{token}"')
+        if 'order' not in _sql_words(_sql_tokens(sql)):
+            lines.append("Without ORDER BY, rows may move between pages; add one for stable paging.")
+    elif has_more:
+        lines.append("")
+        lines.append("... output truncated: the statement returned more rows than are shown.")
+    
+    return "\n".join(lines) + "\n"
+
+
+def _column_labels(column_metadata: list) -> list:
+    return [col.get('label', col.get('name', f'col_{i}')) for i, col in enumerate(column_metadata)]
+
+
+def _field_value(field: dict) -> str:
+    """Extract value from a typed Data API field (handles different data types)."""
+    if 'stringValue' in field:
+        return field['stringValue']
+    elif 'longValue' in field:
+        return str(field['longValue'])
+    elif 'doubleValue' in field:
+        return str(field['doubleValue'])
+    elif 'booleanValue' in field:
+        return str(field['booleanValue'])
+    elif 'isNull' in field and field['isNull']:
+        return 'NULL'
+    else:
+        return str(field)
+
+
+def _json_value(value) -> str:
+    """Render a value from a JSON-formatted record the same way as a typed field."""
+    if value is None:
+        return 'NULL'
+    if isinstance(value, str):
+        return value
+    return str(value)
+
+
+def _query_fingerprint(sql: str, database: str) -> str:
+    # Tokenized so page tokens from a cached page work for any formatting of the same query
+    normalized = " ".join(_sql_tokens(sql.strip().rstrip(';')))
+    return hashlib.sha256(f"{database}\0{normalized}".encode('utf-8')).hexdigest()[:12]
+
+
+def _encode_page_token(offset: int, sql: str, database: str) -> str:
+    payload = json.dumps({'o': offset, 'q': _query_fingerprint(sql, database)})
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def _decode_page_token(page_token: str, sql: str, database: str) -> int:
+    """Return the row offset stored in page_token, checking it belongs to this query."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(page_token.encode('ascii')))
+        offset = int(payload['o'])
+        fingerprint = payload['q']
+    except Exception:
+        raise ValueError("Invalid page_token. Use the token returned by the previous page.")
+    if fingerprint != _query_fingerprint(sql, database) or offset < 0:
+        raise ValueError("page_token does not belong to this query. Pass the same sql and database as the previous page.")
+    return offset
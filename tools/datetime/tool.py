@@ -1,9 +1,50 @@
 from strands import tool
 from datetime import datetime
-import pytz
+import difflib
+import functools
+from shared.instrumentation import instrumented
+
+# Upper bound on timezones per get_datetime_many call
+DATETIME_BATCH_MAX_TIMEZONES = 50
+
+# Common abbreviations and informal names mapped to a representative IANA timezone
+_TIMEZONE_ALIASES = {
+    'pt': 'America/Los_Angeles', 'pst': 'America/Los_Angeles', 'pdt': 'America/Los_Angeles',
+    'pacific': 'America/Los_Angeles', 'pacific time': 'America/Los_Angeles',
+    'mt': 'America/Denver', 'mdt': 'America/Denver', 'mountain': 'America/Denver',
+    'mountain time': 'America/Denver',
+    'ct': 'America/Chicago', 'cst': 'America/Chicago', 'cdt': 'America/Chicago',
+    'central': 'America/Chicago', 'central time': 'America/Chicago',
+    'et': 'America/New_York', 'edt': 'America/New_York', 'eastern': 'America/New_York',
+    'eastern time': 'America/New_York',
+    'akst': 'America/Anchorage', 'akdt': 'America/Anchorage', 'alaska': 'America/Anchorage',
+    'hawaii': 'Pacific/Honolulu',
+    'bst': 'Europe/London', 'uk': 'Europe/London',
+    'cest': 'Europe/Paris', 'eest': 'Europe/Athens',
+    'ist': 'Asia/Kolkata', 'india': 'Asia/Kolkata',
+    'jst': 'Asia/Tokyo', 'kst': 'Asia/Seoul', 'sgt': 'Asia/Singapore', 'hkt': 'Asia/Hong_Kong',
+    'aest': 'Australia/Sydney', 'aedt': 'Australia/Sydney', 'awst': 'Australia/Perth',
+    'nzst': 'Pacific/Auckland', 'nzdt': 'Pacific/Auckland',
+    'z': 'UTC', 'zulu': 'UTC', 'utc': 'UTC',
+}
+
+# Everything get_datetime shows, rendered with a single strftime call
+_DATETIME_TEMPLATE = "\n".join([
+    "**Current Date & Time Information**{note}",
+    "",
+    "📅 **Date**: %A, %B %d, %Y",
+    "🕐 **Time**: %I:%M:%S %p",
+    "⏰ **24-Hour Time**: %H:%M:%S",
+    "🌍 **Timezone**: {timezone} (%Z)",
+    "📍 **UTC Offset**: %z",
+    "📊 **ISO Format**: {iso}",
+    "🗓️  **Day of Year**: Day %j of %Y",
+    "📆 **Week Number**: Week %U",
+])
 
 
 @tool
+@instrumented
 def get_datetime(timezone: str = "UTC") -> str:
     """
     Get the current date, time, and timezone information.
@@ -13,7 +54,8 @@ def get_datetime(timezone: str = "UTC") -> str:
     
     Args:
         timezone: Timezone name (e.g., "UTC", "America/New_York", "Europe/London", "Asia/Tokyo")
-                 Default is "UTC". Use standard IANA timezone names.
+                 Default is "UTC". Use standard IANA timezone names; common
+                 abbreviations ("PST", "CET") and city names ("tokyo") are also accepted.
         
     Returns:
         Formatted string with current date, time, day of week, and timezone information
@@ -26,11 +68,13 @@ def get_datetime(timezone: str = "UTC") -> str:
     try:
         # Get timezone object
         try:
-            tz = pytz.timezone(timezone)
-        except pytz.exceptions.UnknownTimeZoneError:
-            # If invalid timezone, default to UTC and note the error
-            tz = pytz.UTC
-            timezone_note = f" (Note: '{timezone}' is not a valid timezone, using UTC instead)"
+            name, tz = _resolve_timezone(timezone)
+        except KeyError:
+            # pytz.exceptions.UnknownTimeZoneError
+            return _unknown_timezone_message(timezone)
+        
+        if name.lower() != timezone.strip().lower():
+            timezone_note = f" (Note: '{timezone}' interpreted as {name})"
         else:
             timezone_note = ""
         
@@ -38,19 +82,102 @@ def get_datetime(timezone: str = "UTC") -> str:
         now = datetime.now(tz)
         
         # Format the response
-        result = []
-        result.append(f"**Current Date & Time Information**{timezone_note}")
-        result.append(f"")
-        result.append(f"📅 **Date**: {now.strftime('%A, %B %d, %Y')}")
-        result.append(f"🕐 **Time**: {now.strftime('%I:%M:%S %p')}")
-        result.append(f"⏰ **24-Hour Time**: {now.strftime('%H:%M:%S')}")
-        result.append(f"🌍 **Timezone**: {timezone} ({now.strftime('%Z')})")
-        result.append(f"📍 **UTC Offset**: {now.strftime('%z')}")
-        result.append(f"📊 **ISO Format**: {now.isoformat()}")
-        result.append(f"🗓️  **Day of Year**: Day {now.strftime('%j')} of {now.year}")
-        result.append(f"📆 **Week Number**: Week {now.strftime('%U')}")
+        return now.strftime(_DATETIME_TEMPLATE).format(
+            note=timezone_note, timezone=name, iso=now.isoformat()
+        )
         
-        return "\n".join(result)
+    except Exception as e:
+        return f"Error getting datetime information: {str(e)}"
+
+
+@tool
+@instrumented
+def get_datetime_many(timezones: list[str]) -> str:
+    """
+    Get the current date and time in several timezones at once.
+    
+    Use this instead of calling get_datetime repeatedly, e.g. for "what
+    time is it in New York, London and Tokyo?". All times are taken from
+    the same instant.
+    
+    Args:
+        timezones: Timezone names, abbreviations or city names (up to 50)
+    
+    Returns:
+        One line per timezone with its local date, time and UTC offset
+    
+    Example:
+        result = get_datetime_many(["America/New_York", "Europe/London", "Asia/Tokyo"])
+    """
+    try:
+        if not timezones:
+            return "Error: Pass at least one timezone."
+        if len(timezones) > DATETIME_BATCH_MAX_TIMEZONES:
+            return f"Error: At most {DATETIME_BATCH_MAX_TIMEZONES} timezones can be requested at once."
         
+        now = datetime.now(_resolve_timezone('UTC')[1])
+        lines = [f"**Current Date & Time** ({now.strftime('%Y-%m-%d %H:%M:%S')} UTC)", ""]
+        for timezone in timezones:
+            try:
+                name, tz = _resolve_timezone(timezone)
+            except KeyError:
+                lines.append(f"- {timezone}: {_unknown_timezone_message(timezone)}")
+                continue
+            local = now.astimezone(tz)
+            lines.append(local.strftime(f"- {name}: %A, %B %d, %Y %I:%M %p (%H:%M) %Z, UTC%z"))
+        return "\n".join(lines)
+    
     except Exception as e:
         return f"Error getting datetime information: {str(e)}"
+
+
+@functools.lru_cache(maxsize=256)
+def _resolve_timezone(timezone: str) -> tuple:
+    """
+    Resolve a timezone name to (IANA name, tzinfo), caching the result.
+    
+    Tries the exact IANA name, then abbreviations and informal names, then
+    case- and space-insensitive IANA names, then city names. Raises
+    pytz.exceptions.UnknownTimeZoneError (a KeyError) if nothing matches.
+    """
+    import pytz
+    
+    key = timezone.strip()
+    if key in pytz.all_timezones_set:
+        return key, pytz.timezone(key)
+    
+    names, cities = _timezone_index()
+    lowered = ' '.join(key.lower().split())
+    name = (
+        _TIMEZONE_ALIASES.get(lowered)
+        or names.get(lowered.replace(' ', '_'))
+        or cities.get(lowered.replace('_', ' '))
+    )
+    if name is None:
+        raise pytz.exceptions.UnknownTimeZoneError(timezone)
+    return name, pytz.timezone(name)
+
+
+@functools.lru_cache(maxsize=None)
+def _timezone_index() -> tuple:
+    """
+    Return lowercased IANA names and unambiguous city names, each mapped to the IANA name.
+    
+    Built on first use so importing the tool doesn't load the pytz database.
+    """
+    import pytz
+    
+    names = {name.lower(): name for name in pytz.all_timezones}
+    cities = {}
+    for name in pytz.common_timezones:
+        city = name.rsplit('/', 1)[-1].lower().replace('_', ' ')
+        # Ambiguous cities (e.g. "eastern" in US/ and Canada/) map to None
+        cities[city] = None if city in cities else name
+    return names, cities
+
+
+def _unknown_timezone_message(timezone: str) -> str:
+    names = _timezone_index()[0]
+    suggestions = difflib.get_close_matches(timezone.strip().lower(), list(names), n=3, cutoff=0.6)
+    hint = f" Did you mean: {', '.join(names[s] for s in suggestions)}?" if suggestions else ""
+    return f"Error: Unknown timezone '{timezone}'.{hint} Use an IANA name such as 'America/New_York'."
@@ -1,22 +1,83 @@
 from strands import tool
-import boto3
+import atexit
+import json
+import logging
+import os
+import queue
+import random
 import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from shared.aws_clients import get_client
+from shared.instrumentation import instrumented
+
+# Bulk sending (can be overridden with environment variables; EMAIL_MAX_SEND_RATE=0 uses the account's SES send rate)
+EMAIL_MAX_SEND_RATE = float(os.environ.get('EMAIL_MAX_SEND_RATE', '0'))
+EMAIL_BULK_MAX_RECIPIENTS = int(os.environ.get('EMAIL_BULK_MAX_RECIPIENTS', '500'))
+EMAIL_BULK_WORKERS = int(os.environ.get('EMAIL_BULK_WORKERS', '8'))
+EMAIL_MAX_RETRIES = int(os.environ.get('EMAIL_MAX_RETRIES', '5'))
+EMAIL_RETRY_BACKOFF = float(os.environ.get('EMAIL_RETRY_BACKOFF', '0.5'))
+
+# Background sending for send_email(wait=False) (can be overridden with environment variables)
+EMAIL_QUEUE_MAX = int(os.environ.get('EMAIL_QUEUE_MAX', '1000'))
+EMAIL_SEND_WORKERS = int(os.environ.get('EMAIL_SEND_WORKERS', '4'))
+EMAIL_STATUS_MAX = int(os.environ.get('EMAIL_STATUS_MAX', '10000'))
+EMAIL_SHUTDOWN_TIMEOUT = float(os.environ.get('EMAIL_SHUTDOWN_TIMEOUT', '10'))
+
+# SES accepts at most 50 recipients per message (to, cc and bcc combined)
+# and 50 destinations per SendBulkTemplatedEmail request
+EMAIL_MAX_RECIPIENTS = 50
+EMAIL_BULK_CHUNK_SIZE = 50
+
+_EMAIL_ADDRESS_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+_EMAIL_SEPARATOR_RE = re.compile(r'[,;\s]+')
+
+# {{name}} placeholders, the same syntax SES templates use
+_EMAIL_PLACEHOLDER_RE = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+
+# Error codes and bulk destination statuses worth retrying after a pause
+_EMAIL_THROTTLE_CODES = {'Throttling', 'ThrottlingException', 'TooManyRequestsException', 'AccountThrottled'}
+_EMAIL_RETRY_STATUSES = {'AccountThrottled', 'TransientFailure'}
+
+_EMAIL_RATE_LIMITER = None
+_EMAIL_RATE_LIMITER_LOCK = threading.Lock()
+_EMAIL_OUTBOX = None
+_EMAIL_OUTBOX_LOCK = threading.Lock()
+_EMAIL_LOGGER = logging.getLogger(__name__)
 
 @tool
-def send_email(to: str, subject: str, body: str, from_email: str = "noreply@example.com") -> str:
+@instrumented
+def send_email(
+    to: str | list[str],
+    subject: str,
+    body: str,
+    from_email: str = "noreply@example.com",
+    cc: str | list[str] = "",
+    bcc: str | list[str] = "",
+    wait: bool = True
+) -> str:
     """
     Send an email using AWS SES (Simple Email Service).
     
-    This tool allows the agent to send emails to users or systems.
+    This tool allows the agent to send emails to users or systems. Pass
+    wait=False to queue the email for a background sender and get a
+    tracking ID back immediately instead of waiting for SES; check it later
+    with get_email_status.
     
     Args:
-        to: Recipient email address
+        to: Recipient email address, or several (a list or a comma-separated string)
         subject: Email subject line
         body: Email body content (plain text)
         from_email: Sender email address (default: noreply@example.com)
+        cc: Carbon copy recipients (a list or a comma-separated string)
+        bcc: Blind carbon copy recipients (a list or a comma-separated string)
+        wait: Wait until SES accepts the email (default: True)
         
     Returns:
-        Success message with message ID or error message
+        Success message with message ID (or tracking ID when wait=False) or error message
         
     Example:
         result = send_email(
@@ -24,6 +85,8 @@ def send_email(to: str, subject: str, body: str, from_email: str = "noreply@exam
             subject="Welcome!",
             body="Thank you for signing up."
         )
+        result = send_email(to=["a@example.com", "b@example.com"], cc="team@example.com",
+                            subject="Status", body="All green.", wait=False)
     
     Note:
         - Sender email must be verified in AWS SES
@@ -32,12 +95,11 @@ def send_email(to: str, subject: str, body: str, from_email: str = "noreply@exam
     """
     try:
         # Validate email addresses
-        email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+        destination, error = _email_destination(to, cc, bcc)
+        if error:
+            return f"Error: {error}"
         
-        if not re.match(email_pattern, to):
-            return f"Error: Invalid recipient email address: {to}"
-        
-        if not re.match(email_pattern, from_email):
+        if not _EMAIL_ADDRESS_RE.match(from_email):
             return f"Error: Invalid sender email address: {from_email}"
         
         # Validate subject and body
@@ -47,41 +109,458 @@ def send_email(to: str, subject: str, body: str, from_email: str = "noreply@exam
         if not body or not body.strip():
             return "Error: Email body cannot be empty"
         
-        # Initialize SES client
-        ses_client = boto3.client('ses', region_name='us-west-2')
-        
-        # Send email
-        response = ses_client.send_email(
-            Source=from_email,
-            Destination={
-                'ToAddresses': [to]
+        message = {
+            'Subject': {
+                'Data': subject,
+                'Charset': 'UTF-8'
             },
-            Message={
-                'Subject': {
-                    'Data': subject,
+            'Body': {
+                'Text': {
+                    'Data': body,
                     'Charset': 'UTF-8'
-                },
-                'Body': {
-                    'Text': {
-                        'Data': body,
-                        'Charset': 'UTF-8'
-                    }
                 }
             }
+        }
+        recipients = _format_destination(destination)
+        
+        if not wait:
+            tracking_id = _email_outbox().submit(from_email, destination, message)
+            if tracking_id is None:
+                return f"Error: The email queue is full ({EMAIL_QUEUE_MAX} emails). Try again shortly, or send with wait=True."
+            return f"Email queued for sending.\n{recipients}\nSubject: {subject}\nTracking ID: {tracking_id}\n\nUse get_email_status to check whether it was sent."
+        
+        # Send with the shared SES client, paced and retried like bulk sends
+        ses_client = get_client('ses', region='us-west-2')
+        message_id = _send_with_retries(ses_client, _email_rate_limiter(ses_client), from_email, destination, message)
+        return f"Email sent successfully!\n{recipients}\nSubject: {subject}\nMessage ID: {message_id}"
+    
+    except Exception as e:
+        return _email_error_message(e, from_email)
+
+
+@tool
+@instrumented
+def get_email_status(tracking_id: str) -> str:
+    """
+    Check on an email queued with send_email(wait=False).
+    
+    Statuses are "queued", "sending", "sent" (accepted by SES, with its
+    message ID) and "failed" (with the error). Statuses are kept in memory
+    for the most recent emails queued by this agent process.
+    
+    Args:
+        tracking_id: The tracking ID returned by send_email
+    
+    Returns:
+        The email's status, recipients and message ID or error
+    
+    Example:
+        result = get_email_status("email-3f2a9c0d81b44e6a")
+    """
+    status = _EMAIL_OUTBOX.status(tracking_id.strip()) if _EMAIL_OUTBOX is not None else None
+    if status is None:
+        return f"Error: Unknown tracking ID: {tracking_id}. Only the last {EMAIL_STATUS_MAX} queued emails are tracked."
+    
+    lines = [
+        f"Email {tracking_id.strip()}: {status['status']}",
+        _format_destination(status['destination']),
+        f"Subject: {status['subject']}",
+        f"Queued: {time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime(status['queued_at']))}",
+    ]
+    if status['message_id']:
+        lines.append(f"Message ID: {status['message_id']}")
+    if status['error']:
+        lines.append(f"Error: {status['error']}")
+    return "\n".join(lines)
+
+
+@tool
+@instrumented
+def send_email_bulk(
+    recipients: list[dict],
+    subject: str = "",
+    body: str = "",
+    from_email: str = "noreply@example.com",
+    template_name: str = "",
+    default_variables: dict | None = None
+) -> str:
+    """
+    Send a personalized email to many recipients in one call.
+    
+    Use this instead of calling send_email once per recipient. Each
+    recipient is a dict with a "to" address plus the variables for that
+    recipient. Subject and body may contain {{variable}} placeholders,
+    which are filled in per recipient. Alternatively, pass the name of a
+    template stored in SES; it is sent with SendBulkTemplatedEmail, 50
+    recipients per request. Sends are paced to the account's SES send rate
+    and retried when SES throttles.
+    
+    Args:
+        recipients: One dict per recipient, e.g. [{"to": "ann@example.com", "name": "Ann"}] (up to 500)
+        subject: Subject line with optional {{variable}} placeholders (not used with template_name)
+        body: Plain text body with optional {{variable}} placeholders (not used with template_name)
+        from_email: Sender email address (default: noreply@example.com)
+        template_name: Name of an SES email template to send instead of subject/body
+        default_variables: Variables used when a recipient doesn't define them
+    
+    Returns:
+        A summary with the result for each recipient
+    
+    Example:
+        result = send_email_bulk(
+            recipients=[{"to": "ann@example.com", "name": "Ann"}, {"to": "bo@example.com", "name": "Bo"}],
+            subject="Your report is ready, {{name}}",
+            body="Hi {{name}},\n\nYour weekly report is ready."
         )
+    """
+    try:
+        if not recipients:
+            return "Error: Pass at least one recipient."
+        if len(recipients) > EMAIL_BULK_MAX_RECIPIENTS:
+            return f"Error: At most {EMAIL_BULK_MAX_RECIPIENTS} recipients can be sent to in one call."
+        if not _EMAIL_ADDRESS_RE.match(from_email):
+            return f"Error: Invalid sender email address: {from_email}"
+        if not template_name and (not subject.strip() or not body.strip()):
+            return "Error: Pass a subject and body, or the name of an SES template."
+        
+        defaults = default_variables or {}
+        results = [None] * len(recipients)
+        valid = []
+        for index, recipient in enumerate(recipients):
+            to = str(recipient.get('to') or '') if isinstance(recipient, dict) else ''
+            if not _EMAIL_ADDRESS_RE.match(to):
+                results[index] = (str(to or recipient), False, "invalid email address")
+            else:
+                valid.append((index, to, {**defaults, **{k: v for k, v in recipient.items() if k != 'to'}}))
+        
+        ses_client = get_client('ses', region='us-west-2')
+        limiter = _email_rate_limiter(ses_client)
+        if template_name:
+            # Keep each request within about one second of the send rate
+            chunk_size = max(1, min(EMAIL_BULK_CHUNK_SIZE, int(limiter.rate))) if limiter.rate else EMAIL_BULK_CHUNK_SIZE
+            for start in range(0, len(valid), chunk_size):
+                chunk = valid[start:start + chunk_size]
+                for (index, to, _), result in zip(chunk, _send_templated_chunk(ses_client, limiter, from_email, template_name, defaults, chunk)):
+                    results[index] = (to, *result)
+        else:
+            with ThreadPoolExecutor(max_workers=EMAIL_BULK_WORKERS) as executor:
+                futures = {
+                    index: executor.submit(_send_rendered, ses_client, limiter, from_email, to, subject, body, variables)
+                    for index, to, variables in valid
+                }
+            for index, to, _ in valid:
+                results[index] = (to, *futures[index].result())
         
-        message_id = response['MessageId']
-        return f"Email sent successfully!\nTo: {to}\nSubject: {subject}\nMessage ID: {message_id}"
+        sent = sum(1 for _, ok, _ in results if ok)
+        lines = [f"Bulk email: {sent} sent, {len(results) - sent} failed (of {len(results)} recipient(s))", ""]
+        for to, ok, detail in results:
+            lines.append(f"- {to}: sent (Message ID: {detail})" if ok else f"- {to}: failed - {detail}")
+        return "\n".join(lines)
+    
+    except Exception as e:
+        return f"Error sending bulk email: {str(e)}"
+
+
+class _EmailTokenBucket:
+    """
+    Token bucket pacing SES sends across all tool calls in the process.
+    
+    The SES send rate is an account-wide limit, so every send takes a token
+    first. The bucket holds a single token, so sends are spaced evenly
+    instead of bursting past the limit. A request for several tokens (a bulk
+    request) goes out once a token is available and leaves the bucket in
+    debt, so later sends wait until the rate catches up. A rate of 0 leaves
+    sends unpaced.
+    """
+    
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.capacity = 1.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self, count: int = 1):
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= min(count, self.capacity):
+                    self._tokens -= count
+                    return
+                wait = (min(count, self.capacity) - self._tokens) / self.rate
+            time.sleep(wait)
+    
+    def drain(self):
+        """Empty the bucket after SES reports throttling."""
+        with self._lock:
+            self._tokens = min(self._tokens, 0.0)
+            self._updated = time.monotonic()
+
+
+def _email_rate_limiter(ses_client) -> _EmailTokenBucket:
+    """
+    Return the process-wide token bucket, sized from EMAIL_MAX_SEND_RATE or the account's SES quota.
+    
+    If the quota can't be read (e.g. ses:GetSendQuota is not allowed), sends
+    are not paced and throttled sends are only retried.
+    """
+    global _EMAIL_RATE_LIMITER
+    if _EMAIL_RATE_LIMITER is None:
+        with _EMAIL_RATE_LIMITER_LOCK:
+            if _EMAIL_RATE_LIMITER is None:
+                rate = EMAIL_MAX_SEND_RATE
+                if rate > 0:
+                    rate = max(rate, 0.1)
+                else:
+                    try:
+                        rate = max(float(ses_client.get_send_quota()['MaxSendRate']), 0.1)
+                    except Exception as e:
+                        _EMAIL_LOGGER.warning(f"Could not read the SES send quota, sending without pacing: {str(e)}")
+                        rate = 0.0
+                _EMAIL_RATE_LIMITER = _EmailTokenBucket(rate)
+    return _EMAIL_RATE_LIMITER
+
+
+def _send_rendered(ses_client, limiter, from_email: str, to: str, subject: str, body: str, variables: dict) -> tuple:
+    """Fill in one recipient's placeholders and send; returns (sent, message ID or error)."""
+    missing = sorted({name for name in _EMAIL_PLACEHOLDER_RE.findall(subject + body) if name not in variables})
+    if missing:
+        return False, f"missing variable(s): {', '.join(missing)}"
+    
+    def render(text):
+        return _EMAIL_PLACEHOLDER_RE.sub(lambda match: str(variables[match.group(1)]), text)
+    
+    message = {
+        'Subject': {'Data': render(subject), 'Charset': 'UTF-8'},
+        'Body': {'Text': {'Data': render(body), 'Charset': 'UTF-8'}},
+    }
+    try:
+        return True, _send_with_retries(ses_client, limiter, from_email, {'ToAddresses': [to]}, message)
+    except Exception as e:
+        return False, str(e)
+
+
+def _send_with_retries(ses_client, limiter, from_email: str, destination: dict, message: dict) -> str:
+    """Send one message at the paced rate, retrying throttled attempts; returns the SES message ID."""
+    for attempt in range(EMAIL_MAX_RETRIES + 1):
+        limiter.acquire()
+        try:
+            return ses_client.send_email(Source=from_email, Destination=destination, Message=message)['MessageId']
+        except Exception as e:
+            if not _is_throttling_error(e) or attempt == EMAIL_MAX_RETRIES:
+                raise
+            limiter.drain()
+            _email_backoff(attempt)
+
+
+def _send_templated_chunk(ses_client, limiter, from_email: str, template_name: str, defaults: dict, chunk: list) -> list:
+    """
+    Send up to 50 recipients with one SendBulkTemplatedEmail request.
+    
+    Destinations that fail with a throttling or transient status are retried.
+    Returns (sent, message ID or error) for each recipient in chunk.
+    """
+    results = [None] * len(chunk)
+    pending = list(range(len(chunk)))
+    for attempt in range(EMAIL_MAX_RETRIES + 1):
+        limiter.acquire(len(pending))
+        try:
+            response = ses_client.send_bulk_templated_email(
+                Source=from_email,
+                Template=template_name,
+                DefaultTemplateData=json.dumps(defaults, default=str),
+                Destinations=[
+                    {
+                        'Destination': {'ToAddresses': [chunk[i][1]]},
+                        'ReplacementTemplateData': json.dumps(chunk[i][2], default=str),
+                    }
+                    for i in pending
+                ]
+            )
+        except Exception as e:
+            if not _is_throttling_error(e) or attempt == EMAIL_MAX_RETRIES:
+                for i in pending:
+                    results[i] = (False, str(e))
+                return results
+            limiter.drain()
+            _email_backoff(attempt)
+            continue
         
-    except ses_client.exceptions.MessageRejected as e:
-        return f"Email rejected: {str(e)}\n\nNote: Ensure sender email is verified in AWS SES."
-    except ses_client.exceptions.MailFromDomainNotVerifiedException:
+        retry = []
+        for i, status in zip(pending, response.get('Status', [])):
+            if status.get('Status') == 'Success':
+                results[i] = (True, status.get('MessageId', ''))
+            elif status.get('Status') in _EMAIL_RETRY_STATUSES and attempt < EMAIL_MAX_RETRIES:
+                retry.append(i)
+            else:
+                results[i] = (False, f"{status.get('Status')}: {status.get('Error', 'unknown error')}")
+        if not retry:
+            break
+        pending = retry
+        limiter.drain()
+        _email_backoff(attempt)
+    return [result or (False, "no status returned by SES") for result in results]
+
+
+def _is_throttling_error(error: Exception) -> bool:
+    code = getattr(error, 'response', {}).get('Error', {}).get('Code', '')
+    return code in _EMAIL_THROTTLE_CODES or 'Maximum sending rate exceeded' in str(error)
+
+
+def _email_backoff(attempt: int):
+    time.sleep(EMAIL_RETRY_BACKOFF * (2 ** attempt) * (0.5 + random.random()))
+
+
+class _EmailOutbox:
+    """
+    Bounded queue of emails sent by background worker threads.
+    
+    Backs send_email(wait=False). Every email gets a tracking ID whose
+    status is kept for the last EMAIL_STATUS_MAX emails. The workers start
+    with the first email; emails still queued when the process exits are
+    given up to EMAIL_SHUTDOWN_TIMEOUT seconds to go out.
+    """
+    
+    def __init__(self, workers: int = EMAIL_SEND_WORKERS, max_queue: int = EMAIL_QUEUE_MAX,
+                 max_statuses: int = EMAIL_STATUS_MAX):
+        self.workers = workers
+        self.max_statuses = max_statuses
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._statuses = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+    
+    def submit(self, from_email: str, destination: dict, message: dict):
+        """Queue an email; returns its tracking ID, or None if the queue is full."""
+        tracking_id = f"email-{uuid.uuid4().hex[:16]}"
+        with self._lock:
+            self._statuses[tracking_id] = {
+                'status': 'queued',
+                'destination': destination,
+                'subject': message['Subject']['Data'],
+                'queued_at': time.time(),
+                'message_id': None,
+                'error': None,
+            }
+            while len(self._statuses) > self.max_statuses:
+                self._statuses.popitem(last=False)
+            if not self._threads:
+                self._start()
+        try:
+            self._queue.put_nowait((tracking_id, from_email, destination, message))
+        except queue.Full:
+            with self._lock:
+                self._statuses.pop(tracking_id, None)
+            return None
+        return tracking_id
+    
+    def status(self, tracking_id: str):
+        """Return a copy of the email's status dict, or None if it isn't tracked."""
+        with self._lock:
+            status = self._statuses.get(tracking_id)
+            return dict(status) if status is not None else None
+    
+    def close(self, timeout: float = EMAIL_SHUTDOWN_TIMEOUT):
+        """Let the workers finish the queued emails, waiting at most timeout seconds."""
+        deadline = time.monotonic() + timeout
+        for _ in self._threads:
+            try:
+                self._queue.put(None, timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Full:
+                break
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+    
+    def _start(self):
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f'email-sender-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        atexit.register(self.close)
+    
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            tracking_id, from_email, destination, message = job
+            self._update(tracking_id, status='sending')
+            try:
+                ses_client = get_client('ses', region='us-west-2')
+                message_id = _send_with_retries(ses_client, _email_rate_limiter(ses_client), from_email, destination, message)
+                self._update(tracking_id, status='sent', message_id=message_id)
+            except Exception as e:
+                self._update(tracking_id, status='failed', error=_email_error_message(e, from_email))
+    
+    def _update(self, tracking_id: str, **fields):
+        with self._lock:
+            status = self._statuses.get(tracking_id)
+            if status is not None:
+                status.update(fields)
+
+
+def _email_outbox() -> _EmailOutbox:
+    """Return the process-wide background sender, creating it on first use."""
+    global _EMAIL_OUTBOX
+    if _EMAIL_OUTBOX is None:
+        with _EMAIL_OUTBOX_LOCK:
+            if _EMAIL_OUTBOX is None:
+                _EMAIL_OUTBOX = _EmailOutbox()
+    return _EMAIL_OUTBOX
+
+
+def _email_addresses(value) -> list:
+    """Split a comma/semicolon-separated string (or a list) into unique addresses."""
+    if not value:
+        return []
+    items = value if isinstance(value, (list, tuple)) else [value]
+    addresses = []
+    for item in items:
+        addresses.extend(part for part in _EMAIL_SEPARATOR_RE.split(str(item)) if part)
+    return list(dict.fromkeys(addresses))
+
+
+def _email_destination(to, cc, bcc) -> tuple:
+    """Validate to/cc/bcc; returns (SES Destination dict, None) or (None, error message)."""
+    destination = {}
+    for key, label, value in (('ToAddresses', 'recipient', to), ('CcAddresses', 'cc', cc), ('BccAddresses', 'bcc', bcc)):
+        addresses = _email_addresses(value)
+        invalid = [address for address in addresses if not _EMAIL_ADDRESS_RE.match(address)]
+        if invalid:
+            return None, f"Invalid {label} email address: {', '.join(invalid)}"
+        if addresses:
+            destination[key] = addresses
+    if not destination.get('ToAddresses'):
+        return None, "At least one recipient email address is required"
+    total = sum(len(addresses) for addresses in destination.values())
+    if total > EMAIL_MAX_RECIPIENTS:
+        return None, f"At most {EMAIL_MAX_RECIPIENTS} recipients (to, cc and bcc combined) per email; use send_email_bulk for more"
+    return destination, None
+
+
+def _format_destination(destination: dict) -> str:
+    lines = [f"To: {', '.join(destination['ToAddresses'])}"]
+    if destination.get('CcAddresses'):
+        lines.append(f"Cc: {', '.join(destination['CcAddresses'])}")
+    if destination.get('BccAddresses'):
+        lines.append(f"Bcc: {', '.join(destination['BccAddresses'])}")
+    return "\n".join(lines)
+
+
+def _email_error_message(error: Exception, from_email: str) -> str:
+    """Turn an SES error into the message returned to the agent."""
+    code = getattr(error, 'response', {}).get('Error', {}).get('Code', '')
+    if code == 'MessageRejected':
+        return f"Email rejected: {str(error)}\n\nNote: Ensure sender email is verified in AWS SES."
+    if code == 'MailFromDomainNotVerifiedException':
         return f"Error: Sender domain not verified in AWS SES. Please verify {from_email} in SES console."
-    except ses_client.exceptions.ConfigurationSetDoesNotExistException:
+    if code == 'ConfigurationSetDoesNotExist':
         return "Error: SES configuration set does not exist."
-    except Exception as e:
-        error_msg = str(e)
-        if "Email address is not verified" in error_msg:
-            return f"Error: Email address not verified in AWS SES.\n\nTo use this tool:\n1. Go to AWS SES console\n2. Verify {from_email}\n3. For production, move out of SES sandbox"
-        else:
-            return f"Error sending email: {error_msg}"
+    error_msg = str(error)
+    if "Email address is not verified" in error_msg:
+        return f"Error: Email address not verified in AWS SES.\n\nTo use this tool:\n1. Go to AWS SES console\n2. Verify {from_email}\n3. For production, move out of SES sandbox"
+    return f"Error sending email: {error_msg}"
@@ -1,27 +1,307 @@
 from strands import tool
 import asyncio
-from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig
+import atexit
+import concurrent.futures
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import urllib.parse
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING
+from shared.result_cache import get_cache, make_key, normalize_url
+from shared.instrumentation import instrumented
+from shared.output_shaping import clamp_budget, shape_pages, shape_text, shaping_note
+
+if TYPE_CHECKING:
+    from crawl4ai import AsyncWebCrawler, CrawlerRunConfig
+
+
+# Crawler pool settings (can be overridden with environment variables)
+CRAWLER_POOL_SIZE = int(os.environ.get('CRAWLER_POOL_SIZE', '2'))
+CRAWLER_MAX_PAGES_PER_BROWSER = int(os.environ.get('CRAWLER_MAX_PAGES_PER_BROWSER', '50'))
+CRAWLER_HEALTH_CHECK_INTERVAL = float(os.environ.get('CRAWLER_HEALTH_CHECK_INTERVAL', '60'))
+CRAWLER_CALL_TIMEOUT = float(os.environ.get('CRAWLER_CALL_TIMEOUT', '120'))
+CRAWLER_BATCH_MAX_URLS = 30
+
+# Cache TTLs in seconds (can be overridden with environment variables)
+CRAWLER_CACHE_TTL = float(os.environ.get('CRAWLER_CACHE_TTL', '900'))
+CRAWLER_CACHE_STALE_TTL = float(os.environ.get('CRAWLER_CACHE_STALE_TTL', '3600'))
+
+# Pages are cached and stored whole, up to this many characters of content, and
+# shaped to each call's max_tokens when returned (can be overridden with environment variables)
+CRAWLER_MAX_PAGE_CHARS = int(os.environ.get('CRAWLER_MAX_PAGE_CHARS', '200000'))
+
+# Site crawl settings (can be overridden with environment variables; CRAWLER_STORE_PATH='' disables revalidation)
+CRAWLER_SITE_MAX_PAGES = int(os.environ.get('CRAWLER_SITE_MAX_PAGES', '100'))
+CRAWLER_SITE_MAX_DEPTH = int(os.environ.get('CRAWLER_SITE_MAX_DEPTH', '5'))
+CRAWLER_SITE_HOST_DELAY = float(os.environ.get('CRAWLER_SITE_HOST_DELAY', '0.25'))
+CRAWLER_STORE_PATH = os.environ.get('CRAWLER_STORE_PATH', '/tmp/agent-crawl-store.sqlite3')
+CRAWLER_STORE_MAX_AGE = float(os.environ.get('CRAWLER_STORE_MAX_AGE', str(30 * 24 * 3600)))
+
+# Links to files a browser would download rather than render
+_CRAWLER_SKIP_EXTENSIONS = (
+    '.pdf', '.zip', '.gz', '.tgz', '.tar', '.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.ico',
+    '.mp3', '.mp4', '.mov', '.avi', '.woff', '.woff2', '.ttf', '.css', '.js', '.json', '.xml', '.exe', '.dmg',
+)
+
+
+class CrawlerPool:
+    """
+    Process-wide pool of warm Crawl4AI browser instances.
+    
+    Browsers are bound to the event loop they were started on, so the pool
+    owns a dedicated event loop running in a daemon thread and every crawl is
+    submitted to it. Browsers are started lazily up to `size`, health-checked
+    when they have been idle for a while, recycled after `max_pages` crawls
+    and closed on interpreter shutdown.
+    """
+    
+    def __init__(self, size=CRAWLER_POOL_SIZE, max_pages=CRAWLER_MAX_PAGES_PER_BROWSER,
+                 health_check_interval=CRAWLER_HEALTH_CHECK_INTERVAL):
+        self.size = max(1, size)
+        self.max_pages = max(1, max_pages)
+        self.health_check_interval = health_check_interval
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._slots = None
+        self._idle = []
+        self._closed = False
+        self.stats = {'launched': 0, 'recycled': 0, 'unhealthy': 0, 'crawls': 0}
+    
+    def run(self, crawl_fn, timeout=CRAWLER_CALL_TIMEOUT, pages=1):
+        """
+        Run `crawl_fn(crawler)` with a pooled crawler and return its result.
+        
+        `pages` is how many pages crawl_fn will load, or a function of its
+        result that returns how many it loaded; this counts towards
+        recycling the browser. Safe to call from any thread that is not the
+        pool's own event loop.
+        """
+        loop = self._ensure_started()
+        future = asyncio.run_coroutine_threadsafe(self._run(crawl_fn, pages), loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise concurrent.futures.TimeoutError(f"Crawl timed out after {timeout:g}s") from None
+        except Exception:
+            future.cancel()
+            raise
+    
+    def shutdown(self):
+        """Close every browser and stop the pool's event loop."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            loop, thread = self._loop, self._thread
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close_all(), loop).result(30)
+        except Exception:
+            pass
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=10)
+    
+    def _ensure_started(self):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Crawler pool has been shut down")
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._slots = asyncio.Semaphore(self.size)
+                self._thread = threading.Thread(
+                    target=loop.run_forever, name='crawler-pool', daemon=True
+                )
+                self._thread.start()
+                self._loop = loop
+            return self._loop
+    
+    async def _run(self, crawl_fn, pages):
+        async with self._slots:
+            entry = await self._checkout()
+            healthy = False
+            loaded = 0 if callable(pages) else pages
+            try:
+                result = await crawl_fn(entry['crawler'])
+                if callable(pages):
+                    loaded = pages(result)
+                healthy = True
+                return result
+            finally:
+                await self._checkin(entry, healthy, loaded)
+    
+    async def _checkout(self):
+        while self._idle:
+            entry = self._idle.pop()
+            idle_for = time.monotonic() - entry['last_used']
+            if idle_for < self.health_check_interval or await self._is_healthy(entry):
+                return entry
+            self.stats['unhealthy'] += 1
+            await self._close(entry)
+        return await self._launch()
+    
+    async def _checkin(self, entry, healthy, pages):
+        entry['pages'] += pages
+        entry['last_used'] = time.monotonic()
+        self.stats['crawls'] += pages
+        if not healthy or self._closed:
+            await self._close(entry)
+        elif entry['pages'] >= self.max_pages:
+            self.stats['recycled'] += 1
+            await self._close(entry)
+        else:
+            self._idle.append(entry)
+    
+    async def _launch(self):
+        # crawl4ai (and Playwright) are imported on first use, keeping them off the cold-start path
+        from crawl4ai import AsyncWebCrawler, BrowserConfig
+        browser_config = BrowserConfig(
+            headless=True,
+            verbose=False
+        )
+        crawler = AsyncWebCrawler(config=browser_config)
+        await crawler.start()
+        self.stats['launched'] += 1
+        return {'crawler': crawler, 'pages': 0, 'last_used': time.monotonic()}
+    
+    async def _is_healthy(self, entry):
+        # Render a tiny inline page to confirm the browser is still responsive
+        from crawl4ai import CrawlerRunConfig
+        try:
+            result = await asyncio.wait_for(
+                entry['crawler'].arun(url='raw:<html><body>ok</body></html>', config=CrawlerRunConfig()),
+                timeout=10
+            )
+            return bool(result.success)
+        except Exception:
+            return False
+    
+    async def _close(self, entry):
+        try:
+            await entry['crawler'].close()
+        except Exception:
+            pass
+    
+    async def _close_all(self):
+        idle, self._idle = self._idle, []
+        for entry in idle:
+            await self._close(entry)
+
+
+_CRAWLER_POOL = CrawlerPool()
+atexit.register(_CRAWLER_POOL.shutdown)
+
+_CRAWLER_CACHE = get_cache('web_crawler', CRAWLER_CACHE_TTL, stale_ttl=CRAWLER_CACHE_STALE_TTL)
+
+
+class _CrawlStore:
+    """
+    SQLite store of site-crawled pages and their validators (ETag, Last-Modified).
+    
+    Pages with validators are revalidated with a conditional GET on the next
+    site crawl, and served from the store when the server answers 304.
+    """
+    
+    def __init__(self, path, max_age=CRAWLER_STORE_MAX_AGE):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS pages ('
+            'key TEXT PRIMARY KEY, url TEXT, etag TEXT, last_modified TEXT, page TEXT, links TEXT, crawled_at REAL)'
+        )
+        self._conn.execute('DELETE FROM pages WHERE crawled_at < ?', (time.time() - max_age,))
+    
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT etag, last_modified, page, links, crawled_at FROM pages WHERE key = ?', (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, page, links, crawled_at = row
+        return {'etag': etag, 'last_modified': last_modified, 'page': page,
+                'links': json.loads(links), 'crawled_at': crawled_at}
+    
+    def put(self, key, url, etag, last_modified, page, links):
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, url, etag, last_modified, page, json.dumps(links), time.time())
+            )
+
+
+_CRAWL_STORE = None
+_CRAWL_STORE_LOCK = threading.Lock()
+
+
+class _SeenUrls:
+    """Set of normalized URLs kept as 64-bit digests, so large frontiers stay small in memory."""
+    
+    def __init__(self):
+        self._digests = set()
+    
+    def add(self, url: str) -> bool:
+        """Add url; return False if it was already seen."""
+        digest = int.from_bytes(hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(), 'big')
+        if digest in self._digests:
+            return False
+        self._digests.add(digest)
+        return True
+
+
+class _HostGate:
+    """Per-host politeness: at most `concurrency` requests at once, started at least `delay` seconds apart."""
+    
+    def __init__(self, concurrency: int, delay: float):
+        self._slots = asyncio.Semaphore(concurrency)
+        self._delay = delay
+        self._next_start = 0.0
+    
+    async def __aenter__(self):
+        await self._slots.acquire()
+        now = asyncio.get_running_loop().time()
+        start = max(now, self._next_start)
+        self._next_start = start + self._delay
+        if start > now:
+            await asyncio.sleep(start - now)
+        return self
+    
+    async def __aexit__(self, *exc):
+        self._slots.release()
 
 
 @tool
+@instrumented
 def web_crawler(
     url: str,
     extract_links: bool = True,
     extract_images: bool = False,
-    word_count_threshold: int = 10
+    word_count_threshold: int = 10,
+    query: str = "",
+    max_tokens: int = 2500
 ) -> str:
     """
     Crawl a website and extract its content using Crawl4AI.
     
     This tool allows the agent to crawl specific web pages and extract
     their content in a clean, readable format. It handles JavaScript-rendered
-    pages and provides structured content extraction.
+    pages and provides structured content extraction. Pages longer than
+    max_tokens are cut down to the sections most relevant to query.
     
     Args:
         url: The URL of the website to crawl
         extract_links: Whether to include extracted links in the output (default: True)
         extract_images: Whether to include image URLs in the output (default: False)
         word_count_threshold: Minimum words per content block to include (default: 10)
+        query: What you are looking for on the page, used to pick the sections to keep (default: none, keep the start)
+        max_tokens: Approximate size limit of the output in tokens (default: 2500, max: 32000)
         
     Returns:
         Extracted content from the website including text, and optionally links and images
@@ -29,18 +309,227 @@ def web_crawler(
     Example:
         result = web_crawler("https://example.com")
         result = web_crawler("https://docs.python.org", extract_links=True)
+        result = web_crawler("https://example.com/pricing", query="enterprise plan price", max_tokens=1000)
     """
     try:
-        # Run the async crawler
-        result = asyncio.run(_crawl_website(
-            url, extract_links, extract_images, word_count_threshold
-        ))
-        return result
+        # Run the crawl on a warm browser from the shared pool, unless the
+        # same page was crawled recently with the same options
+        cache_key = _crawl_cache_key(url, extract_links, extract_images, word_count_threshold)
+        result = _CRAWLER_CACHE.get_or_compute(
+            cache_key,
+            lambda: _CRAWLER_POOL.run(lambda crawler: _crawl_website(
+                crawler, url, extract_links, extract_images, word_count_threshold
+            )),
+            should_cache=_is_cacheable_page
+        )
+        
+        # The whole page is cached; only what fits this call's budget is returned
+        max_tokens = clamp_budget(max_tokens)
+        shaped = shape_text(result, max_tokens, query, pinned=1)
+        return shaped.text + shaping_note(shaped.original_tokens, shaped.tokens, max_tokens)
     except Exception as e:
         return f"Error crawling website: {str(e)}"
 
 
+@tool
+@instrumented
+def web_crawl_many(
+    urls: list[str],
+    extract_links: bool = True,
+    extract_images: bool = False,
+    word_count_threshold: int = 10,
+    max_concurrency: int = 5,
+    per_host_concurrency: int = 2,
+    timeout: int = 60,
+    query: str = "",
+    max_tokens: int = 6000
+) -> str:
+    """
+    Crawl several websites concurrently and extract their content using Crawl4AI.
+    
+    Use this instead of calling web_crawler repeatedly when you need the
+    content of more than one page. Pages are crawled in parallel over a single
+    browser session, and pages that have not finished when the timeout is
+    reached are reported as skipped while completed pages are still returned.
+    The pages share max_tokens; sections repeated across pages (navigation,
+    footers) are shown once, and long pages are cut down to the sections
+    most relevant to query.
+    
+    Args:
+        urls: The URLs of the websites to crawl (up to 30)
+        extract_links: Whether to include extracted links in the output (default: True)
+        extract_images: Whether to include image URLs in the output (default: False)
+        word_count_threshold: Minimum words per content block to include (default: 10)
+        max_concurrency: Maximum number of pages crawled at once (default: 5, max: 10)
+        per_host_concurrency: Maximum number of pages crawled at once per host (default: 2)
+        timeout: Deadline in seconds for the whole batch, including waiting for a browser (default: 60, max: 300)
+        query: What you are looking for, used to pick the sections to keep (default: none, keep the start of each page)
+        max_tokens: Approximate size limit of the whole output in tokens (default: 6000, max: 32000)
+    
+    Returns:
+        Extracted content for each page, in the order the URLs were given
+    
+    Example:
+        result = web_crawl_many(["https://example.com", "https://example.org"])
+        result = web_crawl_many(urls, extract_links=False, timeout=30)
+    """
+    try:
+        # Drop duplicates while keeping the requested order
+        urls = list(dict.fromkeys(url.strip() for url in urls if url and url.strip()))
+        if not urls:
+            return "Error crawling websites: No URLs provided"
+        if len(urls) > CRAWLER_BATCH_MAX_URLS:
+            return f"Error crawling websites: At most {CRAWLER_BATCH_MAX_URLS} URLs can be crawled at once"
+        
+        # Limit concurrency and deadline to reasonable ranges
+        max_concurrency = min(max(1, max_concurrency), 10)
+        per_host_concurrency = min(max(1, per_host_concurrency), max_concurrency)
+        timeout = min(max(1, timeout), 300)
+        
+        # The deadline covers waiting for a pooled browser as well as crawling
+        started = time.monotonic()
+        deadline = started + timeout
+        
+        # Only crawl the pages that are not already cached
+        pages = {}
+        for url in urls:
+            cache_key = _crawl_cache_key(url, extract_links, extract_images, word_count_threshold)
+            cached = _CRAWLER_CACHE.get(cache_key)
+            if cached is not None:
+                pages[url] = cached
+        to_crawl = [url for url in urls if url not in pages]
+        
+        if to_crawl:
+            crawled = {}
+            try:
+                _CRAWLER_POOL.run(
+                    lambda crawler: _crawl_many(
+                        crawler, to_crawl, extract_links, extract_images, word_count_threshold,
+                        max_concurrency, per_host_concurrency, deadline, crawled
+                    ),
+                    # Two seconds past the deadline for unfinished pages to be cancelled
+                    timeout=max(0.0, deadline - time.monotonic()) + 2,
+                    pages=len(to_crawl)
+                )
+            except concurrent.futures.TimeoutError:
+                # Still waiting for a browser at the deadline; keep the pages that finished
+                pass
+            for url, page in dict(crawled).items():
+                pages[url] = page
+                if _is_cacheable_page(page):
+                    cache_key = _crawl_cache_key(url, extract_links, extract_images, word_count_threshold)
+                    _CRAWLER_CACHE.put(cache_key, page)
+        
+        # Assemble pages in the requested order
+        elapsed = time.monotonic() - started
+        output_parts = []
+        succeeded = failed = unfinished = 0
+        for url in urls:
+            if url in pages:
+                output_parts.append(pages[url])
+                if _is_cacheable_page(pages[url]):
+                    succeeded += 1
+                else:
+                    failed += 1
+            else:
+                output_parts.append(f"Skipped {url}: not finished within the {timeout}s batch deadline")
+                unfinished += 1
+        
+        # Fit every page into one budget
+        max_tokens = clamp_budget(max_tokens)
+        shaped, repeated = shape_pages(output_parts, max_tokens, query, pinned=1)
+        note = shaping_note(
+            sum(page.original_tokens for page in shaped), sum(page.tokens for page in shaped), max_tokens, repeated
+        )
+        header = f"Crawled {succeeded} of {len(urls)} page(s) in {elapsed:.1f}s"
+        if failed:
+            header += f"; {failed} failed"
+        if unfinished:
+            header += f"; timed out after {timeout}s with {unfinished} page(s) not finished"
+        header += "\n\n"
+        return header + "\n\n---\n\n".join(page.text for page in shaped) + note
+    except Exception as e:
+        return f"Error crawling websites: {str(e)}"
+
+
+@tool
+@instrumented
+def web_crawl_site(
+    start_url: str,
+    max_depth: int = 2,
+    max_pages: int = 20,
+    path_prefix: str = "",
+    word_count_threshold: int = 10,
+    max_concurrency: int = 4,
+    per_host_concurrency: int = 2,
+    timeout: int = 120,
+    query: str = "",
+    max_tokens: int = 8000
+) -> str:
+    """
+    Crawl a website by following its links, and return the content of every page found.
+    
+    Use this instead of calling web_crawler on each link of a page when you
+    need several pages of one site (for example a documentation section).
+    Links are followed breadth-first from start_url, staying on the same
+    host (and under path_prefix, if given), up to max_depth links away and
+    max_pages pages in total. Pages that have not changed since a previous
+    crawl are served from a local store instead of being downloaded again.
+    The pages share max_tokens; sections repeated across pages (navigation,
+    footers) are shown once, and long pages are cut down to the sections
+    most relevant to query.
+    
+    Args:
+        start_url: The page to start from
+        max_depth: How many links away from start_url to follow (default: 2, max: 5)
+        max_pages: Maximum number of pages to crawl (default: 20, max: 100)
+        path_prefix: Only follow links whose path starts with this (e.g. "/docs/"); default: any path on the host
+        word_count_threshold: Minimum words per content block to include (default: 10)
+        max_concurrency: Maximum number of pages crawled at once (default: 4, max: 10)
+        per_host_concurrency: Maximum number of pages crawled at once per host (default: 2)
+        timeout: Deadline in seconds for the whole crawl (default: 120, max: 600)
+        query: What you are looking for, used to pick the sections to keep (default: none, keep the start of each page)
+        max_tokens: Approximate size limit of the whole output in tokens (default: 8000, max: 32000)
+    
+    Returns:
+        A summary of the crawl followed by the content of each page, closest pages first
+    
+    Example:
+        result = web_crawl_site("https://docs.example.com/guide/", max_depth=1)
+        result = web_crawl_site("https://example.com", max_pages=50, path_prefix="/blog/")
+        result = web_crawl_site("https://docs.example.com/", query="rate limits", max_tokens=4000)
+    """
+    try:
+        start_url = normalize_url(start_url)
+        parts = urllib.parse.urlsplit(start_url)
+        if parts.scheme not in ('http', 'https') or not parts.netloc:
+            return f"Error crawling site: Not an http(s) URL: {start_url}"
+        
+        # Limit the crawl to reasonable ranges
+        max_depth = min(max(0, max_depth), CRAWLER_SITE_MAX_DEPTH)
+        max_pages = min(max(1, max_pages), CRAWLER_SITE_MAX_PAGES)
+        max_concurrency = min(max(1, max_concurrency), 10)
+        per_host_concurrency = min(max(1, per_host_concurrency), max_concurrency)
+        timeout = min(max(1, timeout), 600)
+        
+        started = time.monotonic()
+        report = _CRAWLER_POOL.run(
+            lambda crawler: _crawl_site(
+                crawler, start_url, max_depth, max_pages, path_prefix, word_count_threshold,
+                max_concurrency, per_host_concurrency, timeout
+            ),
+            timeout=CRAWLER_CALL_TIMEOUT + timeout,
+            pages=lambda report: report['rendered']
+        )
+        return _format_site_report(
+            start_url, report, max_pages, timeout, time.monotonic() - started, query, clamp_budget(max_tokens)
+        )
+    except Exception as e:
+        return f"Error crawling site: {str(e)}"
+
+
 async def _crawl_website(
+    crawler: 'AsyncWebCrawler',
     url: str,
     extract_links: bool,
     extract_images: bool,
@@ -48,77 +537,340 @@ async def _crawl_website(
 ) -> str:
     """Async helper function to perform the actual crawling."""
     
-    # Configure browser settings
-    browser_config = BrowserConfig(
-        headless=True,
-        verbose=False
+    # Configure crawler run settings
+    crawler_config = _crawler_run_config(word_count_threshold)
+    
+    result = await crawler.arun(
+        url=url,
+        config=crawler_config
     )
     
-    # Configure crawler run settings
-    crawler_config = CrawlerRunConfig(
+    return _format_crawl_result(url, result, extract_links, extract_images)
+
+
+def _crawler_run_config(word_count_threshold: int) -> 'CrawlerRunConfig':
+    """Build the per-crawl settings shared by every crawl mode."""
+    from crawl4ai import CrawlerRunConfig
+    return CrawlerRunConfig(
         word_count_threshold=word_count_threshold,
         exclude_external_links=False,
         remove_overlay_elements=True,
         process_iframes=False
     )
     
-    async with AsyncWebCrawler(config=browser_config) as crawler:
-        result = await crawler.arun(
-            url=url,
-            config=crawler_config
-        )
         
-        if not result.success:
-            return f"Failed to crawl {url}: {result.error_message or 'Unknown error'}"
+def _format_crawl_result(url: str, result, extract_links: bool, extract_images: bool) -> str:
+    """Format a single Crawl4AI result as markdown for the agent."""
+    if not result.success:
+        return f"Failed to crawl {url}: {result.error_message or 'Unknown error'}"
         
-        # Build the output
-        output_parts = []
+    # Build the output
+    output_parts = []
+        
+    # Add page title
+    if result.metadata and result.metadata.get('title'):
+        output_parts.append(f"# {result.metadata['title']}\n")
+        
+    output_parts.append(f"**URL:** {url}\n")
         
-        # Add page title
-        if result.metadata and result.metadata.get('title'):
-            output_parts.append(f"# {result.metadata['title']}\n")
-        
-        output_parts.append(f"**URL:** {url}\n")
-        
-        # Add main content (markdown format)
-        if result.markdown:
-            output_parts.append("## Content\n")
-            # Truncate if too long
-            content = result.markdown
-            if len(content) > 10000:
-                content = content[:10000] + "\n\n... [Content truncated]"
-            output_parts.append(content)
-        
-        # Add extracted links if requested
-        if extract_links and result.links:
-            internal_links = result.links.get('internal', [])
-            external_links = result.links.get('external', [])
+    # Add main content (markdown format); callers shape it to their token budget
+    if result.markdown:
+        output_parts.append("## Content\n")
+        content = result.markdown
+        if len(content) > CRAWLER_MAX_PAGE_CHARS:
+            content = content[:CRAWLER_MAX_PAGE_CHARS] + "\n\n... [Content truncated]"
+        output_parts.append(content)
+        
+    # Add extracted links if requested
+    if extract_links and result.links:
+        internal_links = result.links.get('internal', [])
+        external_links = result.links.get('external', [])
             
-            if internal_links or external_links:
-                output_parts.append("\n## Extracted Links\n")
+        if internal_links or external_links:
+            output_parts.append("\n## Extracted Links\n")
                 
-                if internal_links:
-                    output_parts.append("### Internal Links")
-                    for link in internal_links[:20]:  # Limit to 20 links
-                        href = link.get('href', '')
-                        text = link.get('text', 'No text')
-                        output_parts.append(f"- [{text[:50]}]({href})")
+            if internal_links:
+                output_parts.append("### Internal Links")
+                for link in internal_links:
+                    href = link.get('href', '')
+                    text = link.get('text', 'No text')
+                    output_parts.append(f"- [{text[:50]}]({href})")
                 
-                if external_links:
-                    output_parts.append("\n### External Links")
-                    for link in external_links[:20]:  # Limit to 20 links
-                        href = link.get('href', '')
-                        text = link.get('text', 'No text')
-                        output_parts.append(f"- [{text[:50]}]({href})")
-        
-        # Add extracted images if requested
-        if extract_images and result.media:
-            images = result.media.get('images', [])
-            if images:
-                output_parts.append("\n## Images\n")
-                for img in images[:10]:  # Limit to 10 images
-                    src = img.get('src', '')
-                    alt = img.get('alt', 'No description')
-                    output_parts.append(f"- {alt}: {src}")
-        
-        return "\n".join(output_parts)
+            if external_links:
+                output_parts.append("\n### External Links")
+                for link in external_links:
+                    href = link.get('href', '')
+                    text = link.get('text', 'No text')
+                    output_parts.append(f"- [{text[:50]}]({href})")
+        
+    # Add extracted images if requested
+    if extract_images and result.media:
+        images = result.media.get('images', [])
+        if images:
+            output_parts.append("\n## Images\n")
+            for img in images:
+                src = img.get('src', '')
+                alt = img.get('alt', 'No description')
+                output_parts.append(f"- {alt}: {src}")
+        
+    return "\n".join(output_parts)
+
+
+async def _crawl_many(
+    crawler: 'AsyncWebCrawler',
+    urls: list,
+    extract_links: bool,
+    extract_images: bool,
+    word_count_threshold: int,
+    max_concurrency: int,
+    per_host_concurrency: int,
+    deadline: float,
+    pages: dict
+) -> dict:
+    """
+    Crawl urls concurrently on one crawler until deadline (a time.monotonic() value).
+    
+    Each page is added to pages (url to formatted page) as soon as it
+    finishes, so the caller keeps them even if this call is abandoned.
+    Unfinished pages are cancelled and left out. Returns pages.
+    """
+    crawler_config = _crawler_run_config(word_count_threshold)
+    overall_slots = asyncio.Semaphore(max_concurrency)
+    host_slots = {}
+    
+    async def crawl_one(url):
+        host = urllib.parse.urlsplit(url).netloc.lower()
+        if host not in host_slots:
+            host_slots[host] = asyncio.Semaphore(per_host_concurrency)
+        async with host_slots[host], overall_slots:
+            try:
+                result = await crawler.arun(url=url, config=crawler_config)
+                pages[url] = _format_crawl_result(url, result, extract_links, extract_images)
+            except Exception as e:
+                pages[url] = f"Error crawling {url}: {str(e)}"
+    
+    tasks = [asyncio.ensure_future(crawl_one(url)) for url in urls]
+    _, pending = await asyncio.wait(tasks, timeout=max(0.0, deadline - time.monotonic()))
+    
+    # Abandon pages that missed the deadline so they can't hold back the rest
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+    
+    return pages
+
+
+async def _crawl_site(
+    crawler: 'AsyncWebCrawler',
+    start_url: str,
+    max_depth: int,
+    max_pages: int,
+    path_prefix: str,
+    word_count_threshold: int,
+    max_concurrency: int,
+    per_host_concurrency: int,
+    timeout: float
+) -> dict:
+    """
+    Breadth-first site crawl from start_url on one crawler.
+    
+    A queue of (url, depth) is served by max_concurrency workers, each
+    request passing through its host's politeness gate. Pages with stored
+    validators are revalidated first and not rendered again if unchanged.
+    Returns {'pages': [...], 'not_visited': int, 'timed_out': bool,
+    'rendered': pages loaded in the browser}.
+    """
+    crawler_config = _crawler_run_config(word_count_threshold)
+    # SQLite calls run in threads, off the crawler pool's event loop
+    store = await asyncio.to_thread(_crawl_store)
+    session = None
+    if store is not None:
+        try:
+            import aiohttp
+            session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30))
+        except ImportError:
+            store = None
+    
+    scope = urllib.parse.urlsplit(start_url)
+    seen = _SeenUrls()
+    frontier = asyncio.Queue()
+    host_gates = {}
+    pages = []
+    counts = {'scheduled': 0, 'not_visited': 0, 'rendered': 0}
+    
+    def schedule(url, depth):
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in ('http', 'https') or parts.netloc != scope.netloc:
+            return
+        if path_prefix and not parts.path.startswith(path_prefix):
+            return
+        if parts.path.lower().endswith(_CRAWLER_SKIP_EXTENSIONS) or not seen.add(url):
+            return
+        if counts['scheduled'] >= max_pages:
+            counts['not_visited'] += 1
+            return
+        frontier.put_nowait((counts['scheduled'], url, depth))
+        counts['scheduled'] += 1
+    
+    async def visit(index, url, depth):
+        store_key = make_key('web_crawl_site', url, word_count_threshold=word_count_threshold)
+        stored = await asyncio.to_thread(store.get, store_key) if store is not None else None
+        host = urllib.parse.urlsplit(url).netloc
+        if host not in host_gates:
+            host_gates[host] = _HostGate(per_host_concurrency, CRAWLER_SITE_HOST_DELAY)
+        async with host_gates[host]:
+            if stored and session is not None and await _is_unchanged(session, url, stored):
+                page = {'index': index, 'url': url, 'depth': depth, 'status': 'unchanged',
+                        'text': stored['page'], 'crawled_at': stored['crawled_at']}
+                links = stored['links']
+            else:
+                counts['rendered'] += 1
+                try:
+                    result = await crawler.arun(url=url, config=crawler_config)
+                except Exception as e:
+                    result = None
+                    text = f"Error crawling {url}: {str(e)}"
+                if result is not None:
+                    text = _format_crawl_result(url, result, False, False)
+                if result is None or not result.success:
+                    pages.append({'index': index, 'url': url, 'depth': depth, 'status': 'failed', 'text': text})
+                    return
+                links = _page_links(result, url)
+                page = {'index': index, 'url': url, 'depth': depth, 'status': 'crawled', 'text': text}
+                headers = {name.lower(): value for name, value in (result.response_headers or {}).items()}
+                if store is not None and (headers.get('etag') or headers.get('last-modified')):
+                    await asyncio.to_thread(
+                        store.put, store_key, url, headers.get('etag'), headers.get('last-modified'), text, links
+                    )
+        pages.append(page)
+        if depth < max_depth:
+            for link in links:
+                schedule(link, depth + 1)
+    
+    async def worker():
+        while True:
+            index, url, depth = await frontier.get()
+            try:
+                await visit(index, url, depth)
+            except Exception as e:
+                # Record the page and keep the worker serving the frontier
+                pages.append({'index': index, 'url': url, 'depth': depth, 'status': 'failed',
+                              'text': f"Error crawling {url}: {str(e)}"})
+            finally:
+                frontier.task_done()
+    
+    schedule(start_url, 0)
+    workers = [asyncio.ensure_future(worker()) for _ in range(max_concurrency)]
+    timed_out = False
+    try:
+        await asyncio.wait_for(frontier.join(), timeout)
+    except asyncio.TimeoutError:
+        timed_out = True
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        if session is not None:
+            await session.close()
+    
+    # Pages that were queued but not reached before the deadline
+    not_visited = counts['not_visited'] + counts['scheduled'] - len(pages)
+    pages.sort(key=lambda page: (page['depth'], page['index']))
+    return {'pages': pages, 'not_visited': not_visited, 'timed_out': timed_out, 'rendered': counts['rendered']}
+
+
+async def _is_unchanged(session, url: str, stored: dict) -> bool:
+    """Conditional GET with the stored validators; True if the server answers 304 Not Modified."""
+    headers = {}
+    if stored['etag']:
+        headers['If-None-Match'] = stored['etag']
+    if stored['last_modified']:
+        headers['If-Modified-Since'] = stored['last_modified']
+    if not headers:
+        return False
+    try:
+        # The body of a 200 is not read; the page is rendered by the crawler instead
+        async with session.get(url, headers=headers, allow_redirects=False) as response:
+            return response.status == 304
+    except Exception:
+        return False
+
+
+def _page_links(result, url: str) -> list:
+    """Normalized absolute URLs of a crawled page's internal links, in page order."""
+    base = getattr(result, 'redirected_url', None) or url
+    links = []
+    for link in (result.links or {}).get('internal', []):
+        href = link.get('href', '')
+        if href:
+            links.append(normalize_url(urllib.parse.urljoin(base, href)))
+    return list(dict.fromkeys(links))
+
+
+def _format_site_report(
+    start_url: str,
+    report: dict,
+    max_pages: int,
+    timeout: int,
+    elapsed: float,
+    query: str,
+    max_tokens: int
+) -> str:
+    """Format a site crawl as a summary plus one section per page, shaped to max_tokens together."""
+    pages = report['pages']
+    counts = {status: sum(1 for page in pages if page['status'] == status)
+              for status in ('crawled', 'unchanged', 'failed')}
+    depth = max((page['depth'] for page in pages), default=0)
+    lines = [
+        f"Crawled {len(pages)} page(s) of {start_url} to depth {depth} in {elapsed:.1f}s "
+        f"({counts['crawled']} downloaded, {counts['unchanged']} unchanged since the last crawl, "
+        f"{counts['failed']} failed)"
+    ]
+    if report['timed_out']:
+        lines.append(f"Stopped at the {timeout}s deadline; {report['not_visited']} queued page(s) were not visited.")
+    elif report['not_visited']:
+        lines.append(f"{report['not_visited']} more in-scope page(s) were not visited (max_pages={max_pages}).")
+    
+    shaped, repeated = shape_pages([page['text'] for page in pages], max_tokens, query, pinned=1)
+    sections = []
+    for page, shaped_page in zip(pages, shaped):
+        text = shaped_page.text
+        if page['status'] == 'unchanged':
+            crawled_at = datetime.fromtimestamp(page['crawled_at'], timezone.utc).strftime('%Y-%m-%d %H:%M UTC')
+            text = f"_Unchanged since {crawled_at}_\n\n{text}"
+        sections.append(f"[depth {page['depth']}] {page['url']}\n\n{text}")
+    note = shaping_note(
+        sum(page.original_tokens for page in shaped), sum(page.tokens for page in shaped), max_tokens, repeated
+    )
+    return "\n".join(lines) + "\n\n---\n\n" + "\n\n---\n\n".join(sections) + note
+
+
+def _crawl_store():
+    """Return the process-wide crawl store, or None when it is disabled or cannot be opened."""
+    global _CRAWL_STORE
+    if not CRAWLER_STORE_PATH:
+        return None
+    with _CRAWL_STORE_LOCK:
+        if _CRAWL_STORE is None:
+            try:
+                _CRAWL_STORE = _CrawlStore(CRAWLER_STORE_PATH)
+            except sqlite3.Error:
+                return None
+        return _CRAWL_STORE
+
+
+def _crawl_cache_key(url: str, extract_links: bool, extract_images: bool, word_count_threshold: int) -> str:
+    """Cache key for a crawled page: the normalized URL plus every option that changes the output."""
+    # Pages are cached before shaping (format 2), so query and max_tokens are not part of the key
+    return make_key(
+        'web_crawler', normalize_url(url), format=2,
+        extract_links=extract_links,
+        extract_images=extract_images,
+        word_count_threshold=word_count_threshold
+    )
+
+
+def _is_cacheable_page(page: str) -> bool:
+    """Only successfully crawled pages are cached; failures are retried on the next call."""
+    return not page.startswith(('Failed to crawl', 'Error crawling'))
@@ -1,11 +1,93 @@
 from strands import tool
-import requests
-from bs4 import BeautifulSoup
+import json
+import os
+import threading
 import urllib.parse
+from html.parser import HTMLParser
+from typing import TYPE_CHECKING
+from shared.result_cache import get_cache, make_key, normalize_query
+from shared.instrumentation import instrumented
+from shared.output_shaping import clamp_budget, shape_text, shaping_note
+
+if TYPE_CHECKING:
+    import requests
+
+# DuckDuckGo HTML interface
+SEARCH_URL = os.environ.get('SEARCH_URL', 'https://html.duckduckgo.com/html/')
+
+# Connection pool settings (can be overridden with environment variables)
+SEARCH_POOL_SIZE = int(os.environ.get('SEARCH_POOL_SIZE', '8'))
+SEARCH_MAX_IN_FLIGHT = int(os.environ.get('SEARCH_MAX_IN_FLIGHT', '4'))
+SEARCH_RETRIES = int(os.environ.get('SEARCH_RETRIES', '2'))
+SEARCH_BACKOFF_FACTOR = float(os.environ.get('SEARCH_BACKOFF_FACTOR', '0.5'))
+SEARCH_TIMEOUT = float(os.environ.get('SEARCH_TIMEOUT', '10'))
+
+# Cache TTLs in seconds (can be overridden with environment variables)
+SEARCH_CACHE_TTL = float(os.environ.get('SEARCH_CACHE_TTL', '600'))
+SEARCH_CACHE_STALE_TTL = float(os.environ.get('SEARCH_CACHE_STALE_TTL', '3000'))
+
+# Headers to mimic a browser
+SEARCH_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1'
+}
+
+
+def _create_search_session() -> 'requests.Session':
+    """Create a keep-alive session whose pool is shared by every search in the process."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    
+    session = requests.Session()
+    session.headers.update(SEARCH_HEADERS)
+    retry = Retry(
+        total=SEARCH_RETRIES,
+        backoff_factor=SEARCH_BACKOFF_FACTOR,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(['GET', 'POST']),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=SEARCH_POOL_SIZE, max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def _search_session() -> 'requests.Session':
+    """Return the shared session, creating it (and importing requests) on the first search."""
+    global _SEARCH_SESSION
+    if _SEARCH_SESSION is None:
+        with _SEARCH_SESSION_LOCK:
+            if _SEARCH_SESSION is None:
+                _SEARCH_SESSION = _create_search_session()
+    return _SEARCH_SESSION
+
+
+def _search_slots() -> threading.BoundedSemaphore:
+    """Return the process-wide limit on searches waiting on the network."""
+    global _SEARCH_SLOTS
+    if _SEARCH_SLOTS is None:
+        with _SEARCH_SESSION_LOCK:
+            if _SEARCH_SLOTS is None:
+                _SEARCH_SLOTS = threading.BoundedSemaphore(max(1, SEARCH_MAX_IN_FLIGHT))
+    return _SEARCH_SLOTS
+
+
+_SEARCH_SESSION = None
+_SEARCH_SLOTS = None
+_SEARCH_SESSION_LOCK = threading.Lock()
+_SEARCH_CACHE = get_cache('web_search', SEARCH_CACHE_TTL, stale_ttl=SEARCH_CACHE_STALE_TTL)
 
 
 @tool
-def web_search(query: str, max_results: int = 5) -> str:
+@instrumented
+def web_search(query: str, max_results: int = 5, max_tokens: int = 1000) -> str:
     """
     Search the web for information using DuckDuckGo.
     
@@ -16,6 +98,7 @@ def web_search(query: str, max_results: int = 5) -> str:
     Args:
         query: The search query string
         max_results: Maximum number of results to return (default: 5, max: 10)
+        max_tokens: Approximate size limit of the output in tokens; lower-ranked results are dropped first (default: 1000)
         
     Returns:
         Formatted search results as a string with titles, snippets, and URLs
@@ -28,95 +111,287 @@ def web_search(query: str, max_results: int = 5) -> str:
         # Limit max_results to reasonable range
         max_results = min(max(1, max_results), 10)
         
-        # Use DuckDuckGo HTML interface
-        url = "https://html.duckduckgo.com/html/"
-        
-        # Prepare search parameters
-        params = {
-            'q': query,
-            'kl': 'us-en'  # Region/language
-        }
+        # Serve repeat searches from the shared result cache. It holds the raw
+        # results, so the text is built for this query; empty results aren't kept
+        cache_key = make_key('web_search_results', normalize_query(query), max_results=max_results)
+        results = _SEARCH_CACHE.get_or_compute(
+            cache_key, lambda: _search(query, max_results), should_cache=_has_search_results
+        )
+        return _shape_results(_format_results(query, json.loads(results)), max_tokens)
         
-        # Set headers to mimic a browser
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1'
-        }
-        
-        # Make the request
-        response = requests.post(url, data=params, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        # Parse HTML
-        soup = BeautifulSoup(response.text, 'html.parser')
+    except Exception as e:
+        return _search_error_message(query, e)
+
+
+def _search_error_message(query: str, error: Exception) -> str:
+    """Turn a search failure into the message returned to the agent."""
+    import requests
+    
+    if isinstance(error, requests.exceptions.Timeout):
+        return f"Search timed out for query: '{query}'. Please try again."
+    if isinstance(error, requests.exceptions.RequestException):
+        return f"Network error during search: {str(error)}"
+    return f"Error performing web search: {str(error)}"
+
+
+def _shape_results(text: str, max_tokens: int) -> str:
+    """Fit formatted results into max_tokens, keeping the header and the highest-ranked results."""
+    max_tokens = clamp_budget(max_tokens)
+    shaped = shape_text(text, max_tokens, pinned=1, partial=False)
+    return shaped.text + shaping_note(shaped.original_tokens, shaped.tokens, max_tokens)
+
+
+def _search(query: str, max_results: int) -> str:
+    """Fetch DuckDuckGo results as a JSON list of result dicts. Network errors propagate to the caller."""
+    # Prepare search parameters
+    params = {
+        'q': query,
+        'kl': 'us-en'  # Region/language
+    }
+    
+    # Make the request over the pooled keep-alive session, capping concurrent
+    # searches (Strands runs sync tools in threads) so a burst can't exhaust the pool
+    with _search_slots():
+        response = _search_session().post(SEARCH_URL, data=params, timeout=SEARCH_TIMEOUT)
+    response.raise_for_status()
+    
+    # Extract results from the page, dropping repeats of the same URL
+    results = []
+    seen_urls = set()
+    for result in _parse_results(response.text, max_results):
+        if result['url'] and result['url'] in seen_urls:
+            continue
+        seen_urls.add(result['url'])
+        results.append(result)
+    
+    return json.dumps(results)
+
+
+def _has_search_results(results: str) -> bool:
+    """Whether a search returned anything worth caching."""
+    return results != '[]'
+
+
+def _format_results(query: str, results: list) -> str:
+    """Format result dicts as the numbered list returned to the agent."""
+    if not results:
+        return f"No results found for query: '{query}'"
+    
+    # Format results
+    formatted_results = []
+    for idx, result in enumerate(results, 1):
+        result_text = f"{idx}. **{result['title']}**\n"
+        result_text += f"   {result['snippet']}\n"
+        if result['url']:
+            result_text += f"   URL: {result['url']}\n"
         
-        # Find search results
-        results = []
-        result_divs = soup.find_all('div', class_='result')
+        formatted_results.append(result_text)
+    
+    header = f"Found {len(results)} results for '{query}':\n\n"
+    return header + "\n".join(formatted_results)
+
+
+def _parse_results(html: str, max_results: int) -> list:
+    """
+    Extract up to max_results result dicts from a DuckDuckGo HTML page.
+    
+    Returns the same title/snippet/url dicts as walking a full BeautifulSoup
+    tree with the selectors below, but only the first max_results result
+    blocks are parsed.
+    """
+    extractor = _ResultExtractor(max_results)
+    try:
+        extractor.feed(html)
+        extractor.close()
+        extractor.flush()
+    except _ExtractionDone:
+        pass
+    
+    # Find search results
+    results = []
+    result_divs = extractor.blocks['result']
+    
+    if not result_divs:
+        # Try alternative selectors
+        result_divs = extractor.blocks['results_links']
+    
+    for result_div in result_divs[:max_results]:
+        try:
+            # Extract title and link
+            found = result_div['found']
+            title_elem = found.get(('a', 'result__a'))
+            if not title_elem:
+                title_elem = found.get(('a', 'large'))
+            
+            if title_elem:
+                title = ''.join(title_elem['strings'])
+                link = title_elem['href']
+                
+                # Extract snippet/description
+                snippet_elem = found.get(('a', 'result__snippet'))
+                if not snippet_elem:
+                    snippet_elem = found.get(('div', 'result__snippet'))
+                if not snippet_elem:
+                    snippet_elem = found.get(('td', 'result-snippet'))
+                
+                snippet = ''.join(snippet_elem['strings']) if snippet_elem else 'No description available'
+                
+                # Clean up the link (DuckDuckGo sometimes uses redirect URLs)
+                if link.startswith('/'):
+                    # Try to extract the actual URL from redirect
+                    if 'uddg=' in link:
+                        link = urllib.parse.unquote(link.split('uddg=')[1].split('&')[0])
+                
+                results.append({
+                    'title': title,
+                    'snippet': snippet,
+                    'url': link
+                })
+        except Exception:
+            # Skip this result if there's an error parsing it
+            continue
+    
+    return results
+
+
+# Result blocks are <div>s with one of these classes
+_RESULT_BLOCK_CLASSES = ('result', 'results_links')
+
+# (tag, class) of the title and snippet elements looked up inside a block
+_RESULT_FIELDS = frozenset([
+    ('a', 'result__a'), ('a', 'large'),
+    ('a', 'result__snippet'), ('div', 'result__snippet'), ('td', 'result-snippet'),
+])
+
+# Elements that never have children, so they are never left open
+_VOID_ELEMENTS = frozenset([
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen', 'link',
+    'menuitem', 'meta', 'param', 'source', 'track', 'wbr', 'basefont', 'bgsound',
+    'command', 'frame', 'image', 'isindex', 'nextid', 'spacer',
+])
+
+# Elements whose text is not part of the visible page text
+_NON_TEXT_ELEMENTS = frozenset(['script', 'style', 'template'])
+
+
+class _ExtractionDone(Exception):
+    """Raised to stop parsing once enough result blocks are complete."""
+
+
+class _ResultExtractor(HTMLParser):
+    """
+    Streaming extractor for DuckDuckGo result blocks.
+    
+    Builds no tree: it tracks open elements the way BeautifulSoup's
+    html.parser builder nests them, records the first title/snippet element
+    of each kind inside every result block, and collects their stripped text
+    strings as get_text(strip=True) would. Parsing stops as soon as the
+    first max_results `result` blocks have been closed.
+    """
+    
+    def __init__(self, max_results: int):
+        super().__init__(convert_charrefs=True)
+        self.max_results = max_results
+        self.blocks = {name: [] for name in _RESULT_BLOCK_CLASSES}
+        self._stack = []  # (tag, blocks opened by the element, field captured by the element)
+        self._capturing = 0
+        self._non_text = 0
+        self._data = []
+    
+    def handle_starttag(self, tag, attrs):
+        self.flush()
+        if tag in _VOID_ELEMENTS:
+            return
         
-        if not result_divs:
-            # Try alternative selectors
-            result_divs = soup.find_all('div', class_='results_links')
+        classes = ()
+        href = ''
+        for name, value in attrs:
+            if name == 'class':
+                classes = (value or '').split()
+            elif name == 'href':
+                href = value or ''
         
-        for result_div in result_divs[:max_results]:
-            try:
-                # Extract title and link
-                title_elem = result_div.find('a', class_='result__a')
-                if not title_elem:
-                    title_elem = result_div.find('a', class_='large')
-                
-                if title_elem:
-                    title = title_elem.get_text(strip=True)
-                    link = title_elem.get('href', '')
-                    
-                    # Extract snippet/description
-                    snippet_elem = result_div.find('a', class_='result__snippet')
-                    if not snippet_elem:
-                        snippet_elem = result_div.find('div', class_='result__snippet')
-                    if not snippet_elem:
-                        snippet_elem = result_div.find('td', class_='result-snippet')
-                    
-                    snippet = snippet_elem.get_text(strip=True) if snippet_elem else 'No description available'
-                    
-                    # Clean up the link (DuckDuckGo sometimes uses redirect URLs)
-                    if link.startswith('/'):
-                        # Try to extract the actual URL from redirect
-                        if 'uddg=' in link:
-                            link = urllib.parse.unquote(link.split('uddg=')[1].split('&')[0])
-                    
-                    results.append({
-                        'title': title,
-                        'snippet': snippet,
-                        'url': link
-                    })
-            except Exception as e:
-                # Skip this result if there's an error parsing it
-                continue
+        # Record the element as a field of every enclosing block that hasn't found one yet
+        field = None
+        for cls in classes:
+            if (tag, cls) in _RESULT_FIELDS:
+                for _, blocks, _ in self._stack:
+                    for block in blocks:
+                        if (tag, cls) not in block['found']:
+                            if field is None:
+                                field = {'strings': [], 'href': href}
+                            block['found'][(tag, cls)] = field
         
-        if not results:
-            return f"No results found for query: '{query}'"
+        opened = []
+        if tag == 'div':
+            for cls in _RESULT_BLOCK_CLASSES:
+                if cls in classes:
+                    block = {'found': {}, 'closed': False}
+                    self.blocks[cls].append(block)
+                    opened.append(block)
         
-        # Format results
-        formatted_results = []
-        for idx, result in enumerate(results, 1):
-            result_text = f"{idx}. **{result['title']}**\n"
-            result_text += f"   {result['snippet']}\n"
-            if result['url']:
-                result_text += f"   URL: {result['url']}\n"
-            
-            formatted_results.append(result_text)
+        if field is not None:
+            self._capturing += 1
+        if tag in _NON_TEXT_ELEMENTS:
+            self._non_text += 1
+        self._stack.append((tag, opened, field))
+    
+    def handle_endtag(self, tag):
+        self.flush()
+        # Close the most recent open element with this name and everything inside it
+        for index in range(len(self._stack) - 1, -1, -1):
+            if self._stack[index][0] == tag:
+                break
+        else:
+            return
         
-        header = f"Found {len(results)} results for '{query}':\n\n"
-        return header + "\n".join(formatted_results)
+        closed_block = False
+        for name, blocks, field in self._stack[index:]:
+            for block in blocks:
+                block['closed'] = True
+                closed_block = True
+            if field is not None:
+                self._capturing -= 1
+            if name in _NON_TEXT_ELEMENTS:
+                self._non_text -= 1
+        del self._stack[index:]
         
-    except requests.exceptions.Timeout:
-        return f"Search timed out for query: '{query}'. Please try again."
-    except requests.exceptions.RequestException as e:
-        return f"Network error during search: {str(e)}"
-    except Exception as e:
-        return f"Error performing web search: {str(e)}"
+        if closed_block:
+            done = self.blocks['result'][:self.max_results]
+            if len(done) == self.max_results and all(block['closed'] for block in done):
+                raise _ExtractionDone()
+    
+    def handle_data(self, data):
+        self._data.append(data)
+    
+    def handle_comment(self, data):
+        self.flush()
+    
+    def handle_decl(self, decl):
+        self.flush()
+    
+    def handle_pi(self, data):
+        self.flush()
+    
+    def unknown_decl(self, data):
+        self.flush()
+        if data.upper().startswith('CDATA['):
+            # CDATA sections count as text even inside <script>/<template>
+            self._add_string(data[len('CDATA['):])
+    
+    def flush(self):
+        """Hand the text collected since the last tag to every open field."""
+        if not self._data:
+            return
+        text = ''.join(self._data)
+        self._data = []
+        if not self._non_text:
+            self._add_string(text)
+    
+    def _add_string(self, text):
+        text = text.strip()
+        if not text or not self._capturing:
+            return
+        for _, _, field in self._stack:
+            if field is not None:
+                field['strings'].append(text)